@@ -0,0 +1,571 @@
+"""
+aggregate_livestock.py
+Reads excel_extract_livestocks.json and produces the 4 Livestock dashboard
+sector files per district: milk-production, fisheries,
+artificial-insemination and infrastructure (<sector>--<district>.json, plus
+the plain <sector>.json for Ahilyanagar).  Same engine as
+aggregate_health.py: sheets are indexed once into the binary extract cache,
+grouped by taluka × year, and the section × district builds run on a
+process pool with incremental rebuilds (pipeline.py).
+
+Run: python aggregate_livestock.py [--section NAME ...] [--district SLUG ...]
+                                   [--out-dir DIR] [--input FILE] [--no-cache]
+                                   [--jobs N] [--force] [--cube] [--db FILE]
+                                   [--compact] [--gzip]
+                                   [--report FILE] [--trace-memory] [--profile DIR]
+                                   [--validation FILE] [--strict] [--no-validate]
+     (from project/data/ directory, needs numpy)
+     python build_dashboards.py refreshes livestock and health together.
+"""
+import pipeline
+from pipeline import Pipeline
+from derived import DerivedMetric
+from state_stats import StateMetric
+from talukas import DISTRICTS_FILE
+
+INPUT = "excel_extract_livestocks.json"
+
+AI = "Artificial Insemination (DSA)"
+LIVESTOCK = "Number of Livestock (DSA)"
+FISHERIES = "Fisheries (DSA)"
+VETERINARY = "Veterinary (DSA)"
+DAIRY_COOP = "Dairy Co-op (DSA)"
+BY_PRODUCTS = "Dairy ByProducts"
+
+# Long-format sheets exposed as wide ones (alias → sheet, category, value)
+PIVOTS = {
+    BY_PRODUCTS: ("Dairy ByProducts (DSA) (not gra", "Items", "Units"),
+}
+
+DERIVED = {
+    # "Total Veterinary Facilities" is only filled in from 2018; before that
+    # the facility types are the total
+    VETERINARY: [DerivedMetric("Facilities", "max(Total Veterinary Facilities, "
+                               "Veterinary Hospitals + Veterinary First-Aid Centres + "
+                               "Other Veterinary Facilities)")],
+}
+
+CHART_YEARS = range(2012, 2022)
+LIVESTOCK_TYPES = ["Hybrid Cows", "Native Cows", "Buffalo"]
+LIVESTOCK_COLORS = ["#3c4e6a", "#2c699a", "#d4af37"]
+# Dashboard label → by-product item
+BY_PRODUCT_ITEMS = {"Ghee": "Ghee", "Powder": "Milk Powder", "Butter": "White butter",
+                    "Lassi": "Lassi"}
+
+
+def fmt_indian(v):
+    """Integer with Indian digit grouping (2,62,111)."""
+    n = int(round(v))
+    s = str(abs(n))
+    head, tail = s[:-3], s[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    return ("-" if n < 0 else "") + ",".join(groups + [tail])
+
+def fmt_lakh(v):
+    return f"{v / 1e5:.2f}L"
+
+def fmt_rupees(v, space=""):
+    """₹48.5L below a crore, ₹1.08Cr above."""
+    if v >= 1e7:
+        return f"₹{v / 1e7:.2f}{space}Cr"
+    return f"₹{v / 1e5:.1f}{space}L"
+
+def fmt_num(v):
+    """Up to one decimal, without a trailing .0 (96, 95.2)."""
+    return f"{round(v, 1):g}"
+
+def change(old, new, context):
+    """Trend as unsigned percentage with direction."""
+    if old == 0:
+        return {"direction": "neutral", "value": "N/A", "context": context}
+    pct = (new - old) / abs(old) * 100
+    d = "up" if pct > 0 else ("down" if pct < 0 else "neutral")
+    return {"direction": d, "value": f"{abs(pct):.1f}%", "context": context}
+
+def stable_since(series, years):
+    """First year of the run of equal values ending at the latest year."""
+    since = years[-1]
+    for yr in reversed(years[:-1]):
+        if series(yr) != series(years[-1]):
+            break
+        since = yr
+    return since
+
+def sampled(years):
+    """Every other year plus the latest (2012, 2014, …, 2020, 2021)."""
+    picked = list(years[::2])
+    if years and picked[-1] != years[-1]:
+        picked.append(years[-1])
+    return picked
+
+def chart_years(district):
+    years = [y for y in CHART_YEARS if y in district]
+    return years or sorted(district)[-10:]
+
+
+# ═══════════════════════════════════════════════════════════════════
+# RELATED METRICS shared by the sector pages
+# ═══════════════════════════════════════════════════════════════════
+def livestock_counts(dist):
+    counts = dist.get_hmis_data(LIVESTOCK, LIVESTOCK_TYPES)
+    return counts, (max(counts) if counts else None)
+
+def composition_metric(dist, title, subtitle):
+    counts, yr = livestock_counts(dist)
+    latest = counts.get(yr, {})
+    total = sum(latest.values()) or 1
+    return {
+        "title": title,
+        "subtitle": subtitle.format(name=dist.name, year=yr),
+        "icon": "PawPrint",
+        "chartType": "donut",
+        "data": [{"label": t, "value": round(latest.get(t, 0) / total * 100)} for t in LIVESTOCK_TYPES],
+        "colors": LIVESTOCK_COLORS,
+    }
+
+def by_products_metric(dist):
+    items = dist.get_hmis_data(BY_PRODUCTS, list(BY_PRODUCT_ITEMS.values()))
+    yr = max(items) if items else None
+    latest = items.get(yr, {})
+    return {
+        "title": "Dairy By-Products",
+        "subtitle": f"Production (MT) — {yr}",
+        "icon": "FlaskConical",
+        "chartType": "bar",
+        "data": [{"label": label, "value": round(latest.get(item, 0))}
+                 for label, item in BY_PRODUCT_ITEMS.items()],
+        "colors": ["#3c4e6a"],
+    }
+
+def series_metric(dist, sheet, col, scale, title, subtitle, icon, chart_type, color):
+    _, district = dist.get_dsa_data(sheet, [col])
+    return {
+        "title": title,
+        "subtitle": subtitle,
+        "icon": icon,
+        "chartType": chart_type,
+        "data": [{"label": str(yr), "value": round(district[yr][col] / scale)}
+                 for yr in sampled(chart_years(district))],
+        "colors": [color],
+    }
+
+def milk_metric(dist, title, subtitle):
+    return series_metric(dist, DAIRY_COOP, "Average milk collected per day", 1000,
+                         title, subtitle, "Droplets", "area", "#2c699a")
+
+
+def taluka_entry(name, meta, **values):
+    return {"name": name, "lng": meta["lng"], "lat": meta["lat"], **values, "color": meta["color"]}
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 1. MILK PRODUCTION
+# ═══════════════════════════════════════════════════════════════════
+def build_milk_production(dist):
+    print(f"\n=== 1. Milk Production ({dist.name}) ===")
+
+    cols = ["Dairy Development Cooperative Societies", "Memberships in Dairy Co-op Societies",
+            "Average milk collected per day", "Cold Storage Capacity"]
+    SOC, MEM, MILK, COLD = cols
+    coop_taluka, coop_district = dist.get_dsa_data(DAIRY_COOP, cols)
+    years = chart_years(coop_district)
+    latest_yr, prev_yr = years[-1], years[-2] if len(years) > 1 else years[-1]
+    latest, prev = coop_district[latest_yr], coop_district.get(prev_yr, {})
+    print(f"Chart years: {years}")
+
+    talukas = sorted(
+        (taluka_entry(t, meta,
+                      milkDaily=round(coop_taluka.get(t, {}).get(latest_yr, {}).get(MILK, 0) / 1000),
+                      societies=int(coop_taluka.get(t, {}).get(latest_yr, {}).get(SOC, 0)),
+                      members=int(coop_taluka.get(t, {}).get(latest_yr, {}).get(MEM, 0)))
+         for t, meta in dist.talukas.items()),
+        key=lambda e: -e["milkDaily"])
+    top = talukas[:2]
+
+    chart, table = [], []
+    for yr in years:
+        row = {"year": str(yr), "districtTotal": round(coop_district[yr][MILK] / 1000)}
+        for e in top:
+            row[e["name"].lower()] = round(coop_taluka.get(e["name"], {}).get(yr, {}).get(MILK, 0) / 1000)
+        chart.append(row)
+        table.append(dict(row, societies=int(coop_district[yr][SOC]),
+                          members=int(coop_district[yr][MEM])))
+
+    vs = f"vs {prev_yr}"
+    return {
+        "kpis": [
+            {
+                "label": "District Daily Milk",
+                "value": f"{fmt_lakh(latest[MILK])} L/day",
+                "icon": "Droplets",
+                "iconBg": "bg-blue-50",
+                "trend": change(prev.get(MILK, 0), latest[MILK], vs),
+                "href": "/livestock/milk-production"
+            },
+            {
+                "label": "Top Taluka",
+                "value": top[0]["name"] if top else "N/A",
+                "icon": "Award",
+                "iconBg": "bg-amber-50",
+                "trend": {"direction": "up", "value": f"{top[0]['milkDaily'] if top else 0}k L/day",
+                          "context": "daily avg"}
+            },
+            {
+                "label": "Dairy Societies",
+                "value": f"{int(latest[SOC]):,}",
+                "icon": "Building2",
+                "iconBg": "bg-emerald-50",
+                "trend": change(prev.get(SOC, 0), latest[SOC], vs)
+            },
+            {
+                "label": "Total Members",
+                "value": f"{int(latest[MEM]):,}",
+                "icon": "Users",
+                "iconBg": "bg-violet-50",
+                "trend": change(prev.get(MEM, 0), latest[MEM], vs)
+            }
+        ],
+        "chartData": chart,
+        "tableData": table,
+        "talukas": talukas,
+        "relatedMetrics": [
+            composition_metric(dist, "Livestock Population", "{name} Census {year}"),
+            by_products_metric(dist),
+            series_metric(dist, DAIRY_COOP, COLD, 1000, "Cold Storage Capacity",
+                          "District Total ('000 L)", "Snowflake", "area", "#2c699a"),
+        ]
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 2. FISHERIES
+# ═══════════════════════════════════════════════════════════════════
+def build_fisheries(dist):
+    print(f"\n=== 2. Fisheries ({dist.name}) ===")
+
+    cols = ["Groundwater Fish Production", "Price Received by Producers for Fish Caught",
+            "Fish Business Cooperatives", "Members in Fish Business Cooperatives",
+            "Area Used for Commercial Fisheries"]
+    PROD, PRICE, COOPS, MEM, AREA = cols
+    fish_taluka, fish_district = dist.get_dsa_data(FISHERIES, cols)
+    items = dist.get_hmis_data(BY_PRODUCTS, list(BY_PRODUCT_ITEMS.values()))
+    years = chart_years(fish_district)
+    latest_yr, prev_yr = years[-1], years[-2] if len(years) > 1 else years[-1]
+    latest, prev = fish_district[latest_yr], fish_district.get(prev_yr, {})
+    print(f"Chart years: {years}")
+
+    talukas = sorted(
+        (taluka_entry(t, meta,
+                      fishProd=round(fish_taluka.get(t, {}).get(latest_yr, {}).get(PROD, 0)),
+                      revenue=round(fish_taluka.get(t, {}).get(latest_yr, {}).get(PRICE, 0) / 1e5, 1),
+                      coops=int(fish_taluka.get(t, {}).get(latest_yr, {}).get(COOPS, 0)))
+         for t, meta in dist.talukas.items()),
+        key=lambda e: -e["fishProd"])
+
+    chart, table, by_products = [], [], []
+    for yr in years:
+        d = fish_district[yr]
+        chart.append({"year": str(yr), "fishProd": round(d[PROD]), "revenue": round(d[PRICE] / 1e5)})
+        table.append({
+            "year": str(yr),
+            "fishProd": fmt_indian(d[PROD]),
+            "revenue": fmt_rupees(d[PRICE]),
+            "coops": int(d[COOPS]),
+            "members": fmt_indian(d[MEM]),
+            "areaUsed": f"{fmt_indian(d[AREA])} ha",
+        })
+        p = items.get(yr, {})
+        by_products.append({"year": str(yr), **{label.lower(): round(p.get(item, 0))
+                                                for label, item in BY_PRODUCT_ITEMS.items()}})
+
+    vs = f"vs {prev_yr}"
+    return {
+        "kpis": [
+            {
+                "label": f"Fish Production ({latest_yr})",
+                "value": f"{fmt_indian(latest[PROD])} T",
+                "icon": "Fish",
+                "iconBg": "bg-blue-50",
+                "trend": change(prev.get(PROD, 0), latest[PROD], vs)
+            },
+            {
+                "label": f"Revenue ({latest_yr})",
+                "value": fmt_rupees(latest[PRICE], " "),
+                "icon": "IndianRupee",
+                "iconBg": "bg-emerald-50",
+                "trend": change(prev.get(PRICE, 0), latest[PRICE], vs)
+            },
+            {
+                "label": "Cooperatives",
+                "value": str(int(latest[COOPS])),
+                "icon": "Building2",
+                "iconBg": "bg-amber-50",
+                "trend": change(prev.get(COOPS, 0), latest[COOPS], vs)
+            },
+            {
+                "label": "Top Taluka",
+                "value": talukas[0]["name"] if talukas else "N/A",
+                "icon": "Award",
+                "iconBg": "bg-violet-50",
+                "trend": {"direction": "up", "value": f"{talukas[0]['fishProd'] if talukas else 0} T",
+                          "context": "production"}
+            }
+        ],
+        "chartData": chart,
+        "tableData": table,
+        "byProducts": by_products,
+        "talukas": talukas,
+        "relatedMetrics": [
+            by_products_metric(dist),
+            composition_metric(dist, "Livestock Composition", "{name} {year}"),
+            milk_metric(dist, "Daily Milk Production", "District Total (k L/day)"),
+        ]
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 3. ARTIFICIAL INSEMINATION
+# ═══════════════════════════════════════════════════════════════════
+def build_artificial_insemination(dist):
+    print(f"\n=== 3. Artificial Insemination ({dist.name}) ===")
+
+    # "Actual Artificial Insemination Numbers" is a flat share of the target
+    # in the extract; the reported percentage is the real achievement
+    cols = ["Annual Target for Artificial Insemination",
+            "Percentage of Artificial Insemination Target Achieved"]
+    TARGET, PCT = cols
+    ai_taluka, ai_district = dist.get_dsa_data(AI, cols)
+    years = chart_years(ai_district)
+    latest_yr, prev_yr = years[-1], years[-2] if len(years) > 1 else years[-1]
+    print(f"Chart years: {years}")
+
+    def ranked(yr):
+        """[(achievement, taluka)] of talukas with a target, best first."""
+        return sorted(((ai_taluka[t][yr].get(PCT, 0), t) for t in dist.talukas
+                       if ai_taluka.get(t, {}).get(yr, {}).get(TARGET)), key=lambda a: -a[0])
+
+    def district_year(yr):
+        """(target, achieved, achievement %) summed over the talukas."""
+        target = ai_district.get(yr, {}).get(TARGET, 0)
+        actual = sum(ai_taluka[t][yr][TARGET] * pct / 100 for pct, t in ranked(yr))
+        return target, actual, (actual / target * 100 if target else 0)
+
+    chart, table = [], []
+    for yr in years:
+        target, actual, pct = district_year(yr)
+        best = ranked(yr)
+        chart.append({
+            "year": str(yr),
+            "districtTarget": round(target / 1000),
+            "districtActual": round(actual / 1000),
+            "achievement": round(pct, 1),
+        })
+        table.append({
+            "year": str(yr),
+            "districtTarget": fmt_indian(target),
+            "districtActual": fmt_indian(actual),
+            "achievement": f"{pct:.1f}%",
+            "topTaluka": f"{best[0][1]} ({fmt_num(best[0][0])}%)" if best else "N/A",
+        })
+
+    talukas = sorted(
+        (taluka_entry(t, meta,
+                      target=int(ai_taluka.get(t, {}).get(latest_yr, {}).get(TARGET, 0)),
+                      achievement=round(ai_taluka.get(t, {}).get(latest_yr, {}).get(PCT, 0), 1))
+         for t, meta in dist.talukas.items()),
+        key=lambda e: -e["achievement"])
+    best = ranked(latest_yr)
+    latest_target, _, latest_pct = district_year(latest_yr)
+    diff = latest_pct - district_year(prev_yr)[2]
+
+    return {
+        "kpis": [
+            {
+                "label": f"District Target ({latest_yr})",
+                "value": fmt_lakh(latest_target),
+                "icon": "Target",
+                "iconBg": "bg-blue-50",
+                "trend": {"direction": "neutral", "value": f"{len(best)} Talukas", "context": "covered"}
+            },
+            {
+                "label": f"Achieved ({latest_yr})",
+                "value": f"{latest_pct:.1f}%",
+                "icon": "TrendingUp",
+                "iconBg": "bg-amber-50",
+                "trend": {"direction": "up" if diff > 0 else ("down" if diff < 0 else "neutral"),
+                          "value": f"{abs(diff):.1f}%", "context": f"vs {prev_yr}"}
+            },
+            {
+                "label": "Top Performer",
+                "value": best[0][1] if best else "N/A",
+                "icon": "Award",
+                "iconBg": "bg-emerald-50",
+                "trend": {"direction": "up", "value": f"{best[0][0]:.1f}%" if best else "N/A",
+                          "context": "achievement"}
+            },
+            {
+                "label": "Lowest Performer",
+                "value": best[-1][1] if best else "N/A",
+                "icon": "AlertTriangle",
+                "iconBg": "bg-red-50",
+                "trend": {"direction": "down", "value": f"{best[-1][0]:.1f}%" if best else "N/A",
+                          "context": "achievement"}
+            }
+        ],
+        "chartData": chart,
+        "tableData": table,
+        "talukas": talukas,
+        "relatedMetrics": [
+            series_metric(dist, VETERINARY, "Facilities", 1, "Veterinary Facilities",
+                          "Total across district", "Stethoscope", "bar", "#008450"),
+            composition_metric(dist, "Livestock Composition", "{name} {year}"),
+            milk_metric(dist, "Dairy Production", "District Daily Milk (k L/day)"),
+        ]
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 4. INFRASTRUCTURE (veterinary facilities & livestock)
+# ═══════════════════════════════════════════════════════════════════
+def build_infrastructure(dist):
+    print(f"\n=== 4. Infrastructure ({dist.name}) ===")
+
+    cols = ["Facilities", "Veterinary Hospitals", "Veterinary First-Aid Centres"]
+    TOTAL, HOSP, FIRST_AID = cols
+    vet_taluka, vet_district = dist.get_dsa_data(VETERINARY, cols)
+    counts, _ = livestock_counts(dist)
+    years = chart_years(vet_district)
+    latest_yr, prev_yr = years[-1], years[-2] if len(years) > 1 else years[-1]
+    latest, prev = vet_district[latest_yr], vet_district.get(prev_yr, {})
+    print(f"Chart years: {years}")
+
+    def livestock(yr):
+        return sum(counts.get(yr, {}).values())
+
+    def steady(col):
+        if latest[col] != prev.get(col):
+            return change(prev.get(col, 0), latest[col], f"vs {prev_yr}")
+        since = stable_since(lambda yr: vet_district.get(yr, {}).get(col), years)
+        return {"direction": "neutral", "value": "Stable", "context": f"since {since}"}
+
+    chart, table = [], []
+    for yr in years:
+        d = vet_district[yr]
+        row = {"year": str(yr), "totalFacilities": int(d[TOTAL]), "vetHospitals": int(d[HOSP]),
+               "firstAidCentres": int(d[FIRST_AID])}
+        chart.append(dict(row, livestock=round(livestock(yr) / 1000)))
+        table.append(dict(row, livestock=fmt_indian(livestock(yr))))
+
+    def breakdown(yr):
+        return [{"name": t, "value": int(counts.get(yr, {}).get(t, 0)), "color": c}
+                for t, c in zip(LIVESTOCK_TYPES, LIVESTOCK_COLORS)]
+
+    talukas = []
+    for t, meta in dist.talukas.items():
+        v = vet_taluka.get(t, {}).get(latest_yr, {})
+        talukas.append(taluka_entry(t, meta, totalFacilities=int(v.get(TOTAL, 0)),
+                                    vetHospitals=int(v.get(HOSP, 0)),
+                                    firstAidCentres=int(v.get(FIRST_AID, 0))))
+
+    return {
+        "kpis": [
+            {
+                "label": "Total Vet Facilities",
+                "value": f"{int(latest[TOTAL]):,}",
+                "icon": "Stethoscope",
+                "iconBg": "bg-emerald-50",
+                "trend": change(prev.get(TOTAL, 0), latest[TOTAL], f"vs {prev_yr}")
+            },
+            {
+                "label": "Vet Hospitals",
+                "value": f"{int(latest[HOSP]):,}",
+                "icon": "Hospital",
+                "iconBg": "bg-blue-50",
+                "trend": steady(HOSP)
+            },
+            {
+                "label": "First-Aid Centres",
+                "value": f"{int(latest[FIRST_AID]):,}",
+                "icon": "BriefcaseMedical",
+                "iconBg": "bg-amber-50",
+                "trend": steady(FIRST_AID)
+            },
+            {
+                "label": "Total Livestock",
+                "value": fmt_lakh(livestock(latest_yr)),
+                "icon": "PawPrint",
+                "iconBg": "bg-violet-50",
+                "trend": change(livestock(prev_yr), livestock(latest_yr), f"vs {prev_yr}")
+            }
+        ],
+        "chartData": chart,
+        "tableData": table,
+        "livestockBreakdown": {str(latest_yr): breakdown(latest_yr), str(prev_yr): breakdown(prev_yr)},
+        "talukas": talukas,
+        "relatedMetrics": [
+            series_metric(dist, DAIRY_COOP, "Dairy Development Cooperative Societies", 1,
+                          "Dairy Cooperatives", f"Active Societies ({years[0]}–{latest_yr})",
+                          "Building2", "bar", "#3c4e6a"),
+            composition_metric(dist, "Livestock Composition", "{name} {year}"),
+            series_metric(dist, FISHERIES, "Groundwater Fish Production", 1, "Fisheries Production",
+                          "District Total (MT)", "Fish", "area", "#008450"),
+        ]
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════
+# RUN: selected sections for every district with source rows
+# ═══════════════════════════════════════════════════════════════════
+# Section → (builder, output file stem, (sheet, reduction) pairs it reads)
+SECTIONS = {
+    "milk-production": (build_milk_production, "milk-production", [
+        (DAIRY_COOP, "sum"), (LIVESTOCK, "last"), (BY_PRODUCTS, "last")]),
+    "fisheries": (build_fisheries, "fisheries", [
+        (FISHERIES, "sum"), (BY_PRODUCTS, "last"), (LIVESTOCK, "last"), (DAIRY_COOP, "sum")]),
+    "artificial-insemination": (build_artificial_insemination, "artificial-insemination", [
+        (AI, "sum"), (VETERINARY, "sum"), (LIVESTOCK, "last"), (DAIRY_COOP, "sum")]),
+    "infrastructure": (build_infrastructure, "infrastructure", [
+        (VETERINARY, "sum"), (LIVESTOCK, "last"), (DAIRY_COOP, "sum"), (FISHERIES, "sum")]),
+}
+
+
+# Output stem → state-wide metric (state_stats.py, state-averages.json)
+STATE_METRICS = {
+    "milk-production": StateMetric("Maharashtra Avg Daily Milk (k L/day)",
+                                   [(DAIRY_COOP, "Average milk collected per day / 1000")]),
+    "infrastructure": StateMetric("Maharashtra Avg Vet Facilities / District",
+                                  [(VETERINARY, "Facilities")], "left"),
+    "fisheries": StateMetric("Maharashtra Avg Fish Production (T) / District",
+                             [(FISHERIES, "Groundwater Fish Production")], "left"),
+    "artificial-insemination": StateMetric(
+        "Maharashtra Avg AI Achievement %",
+        [(AI, "Annual Target for Artificial Insemination * "
+              "Percentage of Artificial Insemination Target Achieved / 100")], "right",
+        kind="ratio", denominator=[(AI, "Annual Target for Artificial Insemination")], digits=1),
+}
+
+
+LIVESTOCK_PIPELINE = Pipeline("livestock", INPUT, SECTIONS, __file__, derived=DERIVED, pivots=PIVOTS,
+                              state_metrics=STATE_METRICS)
+SOURCE_SHEETS = LIVESTOCK_PIPELINE.source_sheets()
+
+
+def load_store(path=INPUT, districts_file=DISTRICTS_FILE, cache=True):
+    """DistrictStore over the livestock extract (pivoted sheets included)."""
+    return LIVESTOCK_PIPELINE.load_store(path, districts_file, cache)
+
+
+run = LIVESTOCK_PIPELINE.run
+
+
+def main(argv=None):
+    pipeline.main(LIVESTOCK_PIPELINE, argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,251 @@
-import json
-
-with open('health_extract.json', 'r', encoding='utf-8') as f:
-    d = json.load(f)
-
-for name, info in d.items():
-    print(f"Sheet: {name}")
-    print(f"  Rows: {info['row_count']}  Ahilyanagar: {info['ahilyanagar_count']}")
-    print(f"  Headers: {info['headers']}")
-    if info.get('district_columns'):
-        for col_name, vals in info['district_columns'].items():
-            print(f"  DistCol '{col_name}': {vals[:8]}")
-    if info.get('year_range'):
-        print(f"  Years: {info['year_range']}")
-    if info['ahilyanagar_count'] > 0:
-        row = info['ahilyanagar_data'][0]
-        print(f"  Sample row: {row}")
-    elif info.get('sample_all'):
-        print(f"  Sample (all): {info['sample_all'][0]}")
+"""
+analyze_health.py
+Profiles every sheet of the extracts (health_extract.json and
+excel_extract_livestocks.json by default, or any extract / workbook given).
+
+Each sheet is read once into its SheetIndex columns (memory-mapped from the
+binary cache when warm) and profiled with whole-matrix NumPy reductions:
+
+  sheet    rows, kind, live / text / pruned columns, years covered and
+           missing, rows per district (aliases folded), talukas, bad cells
+  float    null rate, min / max / mean, distinct values, unparseable cells
+  text     null rate, distinct values, most frequent values
+
+Distinct counts are exact up to EXACT_DISTINCT non-null values and above
+that estimated from a k-minimum-values sketch of hashed values (flagged
+"distinct_approx"), which costs one partial sort instead of a full one.
+
+Profiles are kept next to the extract (health_extract.json →
+health_extract.profile.json) with each sheet's digest (the SHA-1 of its own
+JSON text, or of its worksheet XML).  Later runs only re-profile sheets
+whose digest changed, so unchanged sheets of a new dump are never parsed;
+if the file's size and mtime are unchanged, not even the digests are
+recomputed.
+
+Run: python analyze_health.py [EXTRACT ...] [--sheet NAME ...] [--json FILE]
+                              [--force] [--no-cache]
+     (from project/data/ directory, needs numpy)
+"""
+import json, os, sys, time, argparse
+import numpy as np
+
+from sheet_index import ExtractIndex
+from talukas import district_key
+
+EXTRACTS = ("health_extract.json", "excel_extract_livestocks.json")
+PROFILE_VERSION = 1
+EXACT_DISTINCT = 1 << 16
+SKETCH = 1024  # k of the k-minimum-values sketch
+TOP = 3
+
+
+def profile_path(path):
+    return os.path.splitext(path)[0] + ".profile.json"
+
+
+def _num(v, digits=4):
+    """JSON-safe float (None for NaN)."""
+    v = float(v)
+    return None if v != v else round(v, digits)
+
+
+def _hash64(values):
+    """splitmix64 of the float bits → uniform uint64 per value."""
+    z = (values + 0.0).view(np.uint64) + np.uint64(0x9E3779B97F4A7C15)  # + 0.0: -0.0 → 0.0
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def distinct_count(values):
+    """(distinct non-NaN values, approximate?) of a float column."""
+    v = values[~np.isnan(values)]
+    if len(v) <= EXACT_DISTINCT:
+        return len(np.unique(v)), False
+    h = _hash64(v)
+    # The SKETCH smallest distinct hashes; their largest estimates the density
+    smallest = np.unique(np.partition(h, 4 * SKETCH)[:4 * SKETCH + 1])
+    if len(smallest) < SKETCH:
+        return len(np.unique(h)), False
+    return int(round((SKETCH - 1) / (float(smallest[SKETCH - 1]) / 2.0**64))), True
+
+
+def profile_sheet(idx):
+    """Profile dict of one SheetIndex."""
+    n = idx.n_rows
+    schema = idx.schema
+    ok = idx.year >= 0
+    years = np.unique(idx.year[ok]).tolist()
+    missing = sorted(set(range(years[0], years[-1] + 1)) - set(years)) if years else []
+
+    rows_per_district = {}
+    counts = np.bincount(idx.district[idx.district >= 0], minlength=len(idx.district_labels))
+    for label, c in zip(idx.district_labels, counts.tolist()):
+        key = district_key(label) or str(label)
+        rows_per_district[key] = rows_per_district.get(key, 0) + c
+    bad = {c: b[0] for c, b in idx.bad_cells.items()}
+
+    profile = {
+        "rows": n,
+        "kind": schema.kind,
+        "headers": len(schema.headers),
+        "pruned": schema.dead_columns,
+        "years": years,
+        "missing_years": missing,
+        "rows_per_district": dict(sorted(rows_per_district.items(), key=lambda kv: -kv[1])),
+        "no_district": int((idx.district < 0).sum()),
+        "talukas": int(len(np.unique(idx.taluka[idx.taluka >= 0]))),
+        "unparseable": sum(bad.values()),
+        "columns": {},
+    }
+    if "Year" in bad:
+        profile["columns"]["Year"] = {"dtype": "year", "unparseable": bad["Year"]}
+
+    cols = list(idx.columns)
+    if cols and n:
+        m = idx.matrix(cols)
+        nan = np.isnan(m)
+        filled = n - nan.sum(axis=0)
+        lo = np.where(nan, np.inf, m).min(axis=0)
+        hi = np.where(nan, -np.inf, m).max(axis=0)
+        mean = np.divide(np.where(nan, 0.0, m).sum(axis=0), filled,
+                         out=np.full(len(cols), np.nan), where=filled > 0)
+        for j, c in enumerate(cols):
+            distinct, approx = distinct_count(m[:, j])
+            p = {"dtype": "float", "null_rate": _num(1 - filled[j] / n),
+                 "min": _num(lo[j]) if filled[j] else None,
+                 "max": _num(hi[j]) if filled[j] else None,
+                 "mean": _num(mean[j]), "distinct": distinct}
+            if approx:
+                p["distinct_approx"] = True
+            if c in bad:
+                p["unparseable"] = bad[c]
+            profile["columns"][c] = p
+    for c, (codes, labels) in idx.categories.items():
+        used = np.bincount(codes[codes >= 0], minlength=len(labels))
+        top = np.argsort(-used, kind="stable")[:TOP]
+        profile["columns"][c] = {
+            "dtype": "text", "null_rate": _num((codes < 0).sum() / n) if n else None,
+            "distinct": int((used > 0).sum()),
+            "top": [[labels[i], int(used[i])] for i in top.tolist() if used[i]],
+        }
+    return profile
+
+
+# ── Profile cache ───────────────────────────────────────────────────────────
+def _source(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def load_profiles(path):
+    """({ sheet: {"digest", "profile"} } saved next to the extract, whether
+    the extract is untouched since)."""
+    try:
+        with open(profile_path(path), "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return {}, False
+    if saved.get("version") != PROFILE_VERSION:
+        return {}, False
+    return saved["sheets"], saved.get("source") == _source(path)
+
+
+def save_profiles(path, sheets):
+    out = profile_path(path)
+    tmp = f"{out}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": PROFILE_VERSION, "source": _source(path), "sheets": sheets},
+                  f, ensure_ascii=False)
+    os.replace(tmp, out)
+
+
+def profile_extract(path, sheets=None, cache=True, force=False):
+    """({ sheet: profile }, sheets profiled afresh) for `sheets` (default:
+    all) of an extract, reusing saved profiles whose digest still matches."""
+    index = ExtractIndex.open(path, cache=cache)
+    saved, untouched = load_profiles(path)
+    if not untouched:  # forget sheets the extract no longer has
+        saved = {n: e for n, e in saved.items() if n in index.sheet_names()}
+    names = sheets or index.sheet_names()
+    unknown = [n for n in names if n not in index.sheet_names()]
+    if unknown:
+        raise KeyError(f"no sheet(s) {', '.join(unknown)} in {path}")
+    fresh = []
+    for name in names:
+        entry = saved.get(name)
+        if not force and untouched and entry is not None:
+            continue
+        digest = index.reader.sheet_digest(name)
+        if force or entry is None or entry["digest"] != digest:
+            saved[name] = {"digest": digest, "profile": profile_sheet(index.sheet(name))}
+            fresh.append(name)
+    if fresh or not untouched:
+        save_profiles(path, saved)
+    return {name: saved[name]["profile"] for name in names}, fresh
+
+
+# ── Report ──────────────────────────────────────────────────────────────────
+def _fmt(v):
+    if v is None:
+        return "–"
+    return f"{v:,.0f}" if abs(v) >= 1000 or float(v).is_integer() else f"{v:.4g}"
+
+
+def print_profile(name, p):
+    years = f"{p['years'][0]}–{p['years'][-1]}" if p["years"] else "no years"
+    gaps = f" (missing {', '.join(map(str, p['missing_years']))})" if p["missing_years"] else ""
+    print(f"Sheet: {name} [{p['kind']}] {p['rows']:,} rows, {years}{gaps}, "
+          f"{len(p['rows_per_district'])} district(s), {p['talukas']} taluka(s)")
+    top = list(p["rows_per_district"].items())[:8]
+    if top:
+        print("  Rows/district: " + ", ".join(f"{d} {c:,}" for d, c in top)
+              + (" …" if len(p["rows_per_district"]) > len(top) else ""))
+    if p["pruned"]:
+        print(f"  Pruned: {len(p['pruned'])} empty column(s)")
+    if p["unparseable"]:
+        print(f"  Unparseable cells: {p['unparseable']}")
+    for c, s in p["columns"].items():
+        if s["dtype"] == "float":
+            approx = "~" if s.get("distinct_approx") else ""
+            bad = f"  bad {s['unparseable']}" if s.get("unparseable") else ""
+            print(f"  {c[:44]:<44} null {s['null_rate']:6.1%}  min {_fmt(s['min']):>10}  "
+                  f"max {_fmt(s['max']):>10}  mean {_fmt(s['mean']):>10}  distinct {approx}{s['distinct']:,}{bad}")
+        elif s["dtype"] == "text":
+            top = ", ".join(f"{l} ({c:,})" for l, c in s["top"])
+            print(f"  {c[:44]:<44} null {s['null_rate']:6.1%}  text, distinct {s['distinct']:,}: {top}")
     print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile every sheet of the extracts.")
+    parser.add_argument("extracts", nargs="*", metavar="EXTRACT",
+                        help=f"extract JSON or .xlsx workbook (default: {', '.join(EXTRACTS)})")
+    parser.add_argument("--sheet", action="append", metavar="NAME", help="profile only this sheet (repeatable)")
+    parser.add_argument("--json", metavar="FILE", help="write { extract: { sheet: profile } } as JSON")
+    parser.add_argument("--force", action="store_true", help="re-profile sheets whose digest is unchanged")
+    parser.add_argument("--no-cache", action="store_true", help="don't use the binary extract cache")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for path in args.extracts or EXTRACTS:
+        if not os.path.exists(path):
+            parser.error(f"{path} not found")
+        t0 = time.perf_counter()
+        try:
+            profiles, fresh = profile_extract(path, args.sheet, not args.no_cache, args.force)
+        except KeyError as e:
+            parser.error(e.args[0])
+        for name, p in profiles.items():
+            print_profile(name, p)
+        print(f"{path}: {len(profiles)} sheet(s), {len(fresh)} profiled, "
+              f"{len(profiles) - len(fresh)} unchanged, in {time.perf_counter() - t0:.2f}s\n")
+        results[path] = profiles
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+benchmark.py
+Times the aggregation pipeline on synthetic extracts (synth_extract.py).
+
+For every section of a pipeline the run is split into phases, each timed
+on its own:
+
+  load         columnar pass over the section's sheets from the JSON extract
+  load_cached  the same from the binary cache (extract_cache.py)
+  aggregate    store.aggregate() of the section's (sheet, reduction) groups
+  build        the section builder for every district
+  write        the section JSONs of every district
+
+Each phase is the median of --repeat runs, with its run-to-run spread
+(median absolute deviation); peak_mb is the tracemalloc peak of one further
+(untimed) pass through all phases.  Results are compared with the stored
+baseline for the same scale and pipeline (benchmark_baseline.json).  A phase
+is a regression only if it takes at least MIN_SECONDS, is over --threshold ×
+baseline, and is slower by more than NOISE × the two runs' combined spread,
+so phases of a few ms and ratios within the measured jitter never fail.
+
+Run: python benchmark.py [--scale small|medium|state] [--districts N]
+                         [--talukas N] [--years N] [--pipeline health|livestock]
+                         [--repeat N] [--threshold X] [--baseline FILE]
+                         [--save-baseline] [--output FILE] [--keep DIR]
+     (from project/data/ directory, needs numpy)
+"""
+import json, os, sys, time, argparse, platform, resource, shutil, tempfile, tracemalloc
+import numpy as np
+
+from aggregate_health import HEALTH
+from aggregate_livestock import LIVESTOCK_PIPELINE
+from synth_extract import LAST_YEAR, write_extract
+from talukas import load_districts
+
+PIPELINES = {"health": HEALTH, "livestock": LIVESTOCK_PIPELINE}
+SCALES = {  # districts, talukas, years
+    "small": (6, 14, 10),
+    "medium": (12, 120, 25),
+    "state": (36, 400, 50),
+}
+PHASES = ("load", "load_cached", "aggregate", "build", "write")
+BASELINE = "benchmark_baseline.json"
+MIN_SECONDS = 0.02  # phases shorter than this are too jittery to compare
+NOISE = 4  # a regression must exceed this many combined spreads
+
+
+def median(values):
+    v = sorted(values)
+    n = len(v)
+    return v[n // 2] if n % 2 else (v[n // 2 - 1] + v[n // 2]) / 2
+
+
+def spread(values):
+    """Median absolute deviation, scaled to estimate a standard deviation."""
+    m = median(values)
+    return 1.4826 * median([abs(x - m) for x in values])
+
+
+def run_phases(pipeline, section, extract, districts, years, out_dir):
+    """{ phase: seconds } of one pass through a section."""
+    sheets = pipeline.source_sheets([section])
+    groups = pipeline.groups([section])
+    t = {}
+
+    t0 = time.perf_counter()
+    store = pipeline.open_store(extract, districts, cache=False, years=years)
+    for sheet in sheets:
+        store.index.sheet(sheet)
+    t["load"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    store = pipeline.open_store(extract, districts, cache=True, years=years)
+    for sheet in sheets:
+        store.index.sheet(sheet)
+    t["load_cached"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for sheet, how in groups:
+        store.aggregate(sheet, how)
+    t["aggregate"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    built = [pipeline.build_district(store, slug, [section])[:2] for slug in store.slugs]
+    t["build"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with open(os.devnull, "w") as quiet:
+        stdout, sys.stdout = sys.stdout, quiet
+        try:
+            for slug, out in built:
+                pipeline.write_outputs(slug, out, out_dir)
+        finally:
+            sys.stdout = stdout
+    t["write"] = time.perf_counter() - t0
+    return t
+
+
+def peak_mb(pipeline, section, extract, districts, years, out_dir):
+    tracemalloc.start()
+    try:
+        run_phases(pipeline, section, extract, districts, years, out_dir)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(pipeline, n_districts, n_talukas, n_years, repeat=3, work_dir=None, seed=0):
+    """Result dict for one synthetic scale."""
+    work_dir = work_dir or tempfile.mkdtemp(prefix="benchmark-")
+    t0 = time.perf_counter()
+    extract, districts_file, rows = write_extract(work_dir, n_districts, n_talukas, n_years,
+                                                  pipeline.input, seed)
+    generate = time.perf_counter() - t0
+    districts = load_districts(districts_file)
+    # Synthetic years run back from LAST_YEAR; widen the DSA window to all of them
+    years = (LAST_YEAR - n_years + 1, LAST_YEAR)
+    out_dir = os.path.join(work_dir, "out")
+    os.makedirs(out_dir, exist_ok=True)
+    # Fill the binary cache (sheet by sheet, on first read) so load_cached never pays for it
+    warm = pipeline.open_store(extract, districts, cache=True, years=years)
+    for sheet in pipeline.source_sheets():
+        warm.index.sheet(sheet)
+
+    sections = {}
+    for section in pipeline.sections:
+        runs = [run_phases(pipeline, section, extract, districts, years, out_dir)
+                for _ in range(repeat)]
+        timings = {p: round(median([r[p] for r in runs]), 6) for p in PHASES}
+        timings["total"] = round(sum(timings[p] for p in PHASES), 6)
+        timings["spread"] = {p: round(spread([r[p] for r in runs]), 6) for p in PHASES}
+        timings["peak_mb"] = round(peak_mb(pipeline, section, extract, districts, years, out_dir), 2)
+        sections[section] = timings
+        print(f"  {section:<24}" + "".join(f" {p} {timings[p] * 1e3:8.1f} ms" for p in PHASES)
+              + f"  peak {timings['peak_mb']:.1f} MB")
+    return {
+        "pipeline": pipeline.name,
+        "scale": {"districts": n_districts, "talukas": n_talukas, "years": n_years},
+        "rows": rows,
+        "extract_mb": round(os.path.getsize(extract) / 1e6, 2),
+        "generate": round(generate, 3),
+        "sections": sections,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def compare(result, baseline, threshold):
+    """[(section, phase, baseline, now, ratio)] of phases over threshold ×
+    baseline and outside the noise (see module docstring)."""
+    slow = []
+    for section, now in result["sections"].items():
+        base = baseline.get("sections", {}).get(section)
+        if base is None:
+            continue
+        for phase in PHASES + ("peak_mb",):
+            b, n = base.get(phase), now.get(phase)
+            if not b or n is None or n / b <= threshold:
+                continue
+            if phase != "peak_mb":
+                noise = (base.get("spread", {}).get(phase, 0) ** 2
+                         + now.get("spread", {}).get(phase, 0) ** 2) ** 0.5
+                if n < MIN_SECONDS or n - b <= NOISE * noise:
+                    continue
+            slow.append((section, phase, b, n, n / b))
+    return slow
+
+
+def baseline_key(name, scale):
+    return f"{name}:{scale['districts']}x{scale['talukas']}x{scale['years']}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic extracts.")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--districts", type=int, help="override the scale's district count")
+    parser.add_argument("--talukas", type=int, help="override the scale's total taluka count")
+    parser.add_argument("--years", type=int, help="override the scale's year count")
+    parser.add_argument("--pipeline", choices=PIPELINES, default="health")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per phase, median is kept (default: 5)")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="flag phases slower than X × baseline and beyond the noise (default: 1.25)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--output", help="also write the result JSON here")
+    parser.add_argument("--keep", metavar="DIR", help="generate into DIR and keep it")
+    args = parser.parse_args(argv)
+
+    n_d, n_t, n_y = SCALES[args.scale]
+    n_d, n_t, n_y = args.districts or n_d, args.talukas or n_t, args.years or n_y
+    pipeline = PIPELINES[args.pipeline]
+    print(f"Benchmarking {pipeline.name}: {n_d} districts, {n_t} talukas, {n_y} years")
+    work_dir = args.keep or tempfile.mkdtemp(prefix="benchmark-")
+    try:
+        result = benchmark(pipeline, n_d, n_t, n_y, args.repeat, work_dir)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    print(f"  {result['rows']:,} rows ({result['extract_mb']} MB), max RSS {result['max_rss_mb']} MB")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    key = baseline_key(pipeline.name, result["scale"])
+    if args.save_baseline:
+        baselines[key] = result
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Saved baseline {key} to {args.baseline}")
+        return 0
+    if key not in baselines:
+        print(f"No baseline for {key} in {args.baseline}")
+        return 0
+    slow = compare(result, baselines[key], args.threshold)
+    for section, phase, b, n, ratio in slow:
+        unit = "MB" if phase == "peak_mb" else "s"
+        print(f"REGRESSION {section} {phase}: {n:.4g} {unit} vs {b:.4g} {unit} ({ratio:.2f}×)")
+    if not slow:
+        print(f"No regressions against {key} (threshold {args.threshold}×)")
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
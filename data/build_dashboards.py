@@ -0,0 +1,60 @@
+"""
+build_dashboards.py
+Refreshes the Livestock and Health dashboard JSON files in one run.
+
+Each extract is read once through its binary cache (extract_cache.py) and
+each pipeline rebuilds only the outputs whose source rows changed, once
+both extracts have passed the data-quality checks (validate.py).  The
+state-wide averages and rankings (state_stats.py) are then recomputed from
+the same stores.  Districts the extracts have no rows for are left to the
+scaled placeholders of scripts/generate-district-data.js (re-run it after
+adding a district to districts.json).
+
+Run: python build_dashboards.py [--livestock-section NAME ...] [--health-section NAME ...]
+                                [--livestock-input FILE] [--health-input FILE]
+                                [--district SLUG ...] [--out-dir DIR] [--no-cache]
+                                [--jobs N] [--force] [--cube] [--db FILE]
+                                [--compact] [--gzip]
+                                [--report FILE] [--trace-memory] [--profile DIR]
+                                [--validation FILE] [--strict] [--no-validate]
+                                [--min-districts N] [--no-state-stats]
+     (from project/data/ directory, needs numpy)
+"""
+import argparse
+import pipeline
+from state_stats import MIN_DISTRICTS, write_state_stats
+from aggregate_livestock import LIVESTOCK_PIPELINE
+from aggregate_health import HEALTH
+
+PIPELINES = {"livestock": LIVESTOCK_PIPELINE, "health": HEALTH}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Livestock and Health dashboard JSON files.")
+    for prefix, p in PIPELINES.items():
+        p.add_arguments(parser, prefix)
+    pipeline.add_common_arguments(parser)
+    parser.add_argument("--min-districts", type=int, default=MIN_DISTRICTS,
+                        help=f"state stats: years need this many districts with data (default: {MIN_DISTRICTS})")
+    parser.add_argument("--no-state-stats", action="store_true",
+                        help="don't recompute state-averages.json / state-rankings.json")
+    args = parser.parse_args(argv)
+
+    pipeline.start_report(args)
+    stores = []
+    for prefix, p in PIPELINES.items():
+        store = p.load_store(getattr(args, f"{prefix}_input"), cache=not args.no_cache)
+        pipeline.check_districts(parser, store, args.district)
+        stores.append((p, store))
+    pipeline.validate_stores(args, stores, {p.name: getattr(args, f"{prefix}_section")
+                                            for prefix, p in PIPELINES.items()})
+    for (p, store), prefix in zip(stores, PIPELINES):
+        p.run(store, getattr(args, f"{prefix}_section"), args.district, args.out_dir,
+              args.force, args.jobs, args.cube, args.db, args.compact, args.gzip)
+    if not args.no_state_stats:
+        write_state_stats(stores, args.out_dir, args.min_districts)
+    pipeline.finish_report(args, pipelines=list(PIPELINES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+build_state.py
+Incremental-build bookkeeping for the dashboard JSON generators.
+
+Every output file is recorded with the key it was built from: a hash of the
+content of each source sheet it reads (for its district), of the district's
+districts.json entry (taluka names, aliases and coordinates end up in the
+output) and of the generator code.  On the next run an output whose key is unchanged, and whose
+file still exists, is skipped.  State lives in a small JSON file in the
+output directory (.health-build.json / .livestock-build.json, see pipeline.py).
+"""
+import hashlib, json, os
+
+STATE_VERSION = 1
+
+
+def file_digest(*paths):
+    """SHA-1 over the contents of `paths` (the generator code)."""
+    h = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def value_digest(value):
+    """SHA-1 of a JSON-serialisable value (key order ignored)."""
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def build_key(recipe, inputs):
+    """Key for one output: recipe hash + { source name: content hash }."""
+    h = hashlib.sha1(recipe.encode("utf-8"))
+    for name in sorted(inputs):
+        h.update(f"\0{name}\0{inputs[name]}".encode("utf-8"))
+    return h.hexdigest()
+
+
+class BuildState:
+    """{ output path: build key } persisted between runs."""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        if state.get("version") != STATE_VERSION:
+            state = {"version": STATE_VERSION, "outputs": {}}
+        self.outputs = state["outputs"]
+
+    def fresh(self, paths, key):
+        """True if every path exists and was last built from `key`."""
+        return all(self.outputs.get(os.path.basename(p)) == key and os.path.exists(p)
+                   for p in paths)
+
+    def record(self, paths, key):
+        for p in paths:
+            self.outputs[os.path.basename(p)] = key
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": STATE_VERSION, "outputs": self.outputs}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
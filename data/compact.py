@@ -0,0 +1,300 @@
+"""
+compact.py
+Numeric-only section JSON: every value is stored once, as a number, with
+per-field format descriptors the app renders client-side
+(lib/compact-data.ts).
+
+A section file's chartData / tableData rows become column references into
+one shared "columns" table, and talukas become one array per field:
+
+  {"format": 1,
+   "columns": {"year": [2020, 2021], "workingAW": [11790, 11810], "normalPct": [92.1, 94.3]},
+   "chartData": {"year": {"col": "year", "str": true}, "workingAW": "workingAW", "normalPct": "normalPct"},
+   "tableData": {"year": {"col": "year", "str": true}, "workingAW": {"col": "workingAW", "group": "en"},
+                 "normalPct": {"col": "normalPct", "decimals": 1, "suffix": "%"}},
+   "talukas": {"name": ["Akole", …], "workingAW": [812, …]},
+   "kpis": […], "relatedMetrics": […]}                      (other keys as-is)
+
+References are a column name (the numbers as they are) or a descriptor:
+
+  col       column name
+  str       the number as a string (years)
+  div       divide first; a number reference is then rounded (Math.round),
+            e.g. "thousands" chart values next to the full count in the table
+  decimals  fixed decimals (JS toFixed), default 0
+  group     digit grouping: "en" 1,234,567 or "in" 12,34,567
+  prefix / suffix   around the number ("₹…L", "…%", "… ha")
+
+Table strings are parsed back into numbers and a descriptor per field; the
+encoder keeps a field's strings as they are unless re-rendering every one
+of them (with JS rounding) gives the same string, so decoding is lossless.
+Fields equal to one already stored are referenced, not stored again.
+
+The pipelines write it with --compact, under the usual <section>--<district>.json
+names, so the app's imports pick up whichever form was built last.
+
+Run: python compact.py [FILE ...]   (size and round-trip report; default:
+                                     every <section>--<district>.json here)
+     python compact.py --write FILE ...   (rewrite files in the compact form)
+     (from project/data/ directory)
+"""
+import argparse, glob, gzip, json, math, re, sys, time
+from decimal import Decimal, ROUND_HALF_UP
+
+COMPACT_VERSION = 1
+ROW_KEYS = ("chartData", "tableData")
+DIVISORS = (1000, 100000)
+_NUMBER_TEXT = re.compile(r"^([^\d-]*)(-?\d[\d,]*(?:\.(\d+))?)(\D*)$")
+
+
+def dumps(data):
+    """Minified JSON text."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def serialise(section, compact=False):
+    """UTF-8 file contents of a section: pretty-printed, or compact and minified."""
+    return (dumps(encode(section)) if compact else json.dumps(section, indent=2)).encode("utf-8")
+
+
+def gzip_bytes(data):
+    """Reproducible gzip (no timestamp), for pre-compressed outputs."""
+    return gzip.compress(data, 9, mtime=0)
+
+
+# ── Rendering (mirrors lib/compact-data.ts) ─────────────────────────────────
+def _js_round(v):
+    """Math.round."""
+    return math.floor(v + 0.5)
+
+
+def _to_fixed(v, decimals):
+    """Number.prototype.toFixed: exact value, ties away from zero ("-0.0"
+    for -0.04, "0" for -0)."""
+    if type(v) is int:
+        return str(v) + ("." + "0" * decimals if decimals else "")
+    v = v or 0.0
+    scaled = abs(v) * 10 ** decimals
+    if abs(scaled - math.floor(scaled) - 0.5) > 1e-6:
+        return f"{v:.{decimals}f}"  # not near a tie: both round to nearest
+    q = Decimal(v).quantize(Decimal(1).scaleb(-decimals), rounding=ROUND_HALF_UP)
+    return f"{q:f}"
+
+
+def _group(digits, style):
+    if style == "en":
+        return f"{int(digits):,}"
+    head, tail = digits[:-3], digits[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    return ",".join(([head] if head else []) + groups + [tail])
+
+
+def formatter(ref):
+    """Function rendering one column entry under a reference (see module
+    docstring); strings and nulls pass through."""
+    if isinstance(ref, str):
+        return lambda v: v
+    div, group, as_str = ref.get("div"), ref.get("group"), ref.get("str")
+    decimals, prefix, suffix = ref.get("decimals", 0), ref.get("prefix", ""), ref.get("suffix", "")
+    styled = any(k in ref for k in ("decimals", "group", "prefix", "suffix"))
+
+    def render(v):
+        if v is None or isinstance(v, str):
+            return v
+        if div:
+            v = v / div
+        if as_str:
+            return str(v)
+        if not styled:
+            return _js_round(v) if div else v
+        s = _to_fixed(v, decimals)
+        if group:
+            sign, s = ("-", s[1:]) if s[0] == "-" else ("", s)
+            whole, _, frac = s.partition(".")
+            s = sign + _group(whole, group) + ("." + frac if frac else "")
+        return prefix + s + suffix
+    return render
+
+
+# ── Encoding ────────────────────────────────────────────────────────────────
+def _is_number(v):
+    return type(v) is int or type(v) is float
+
+
+def _parse(strings):
+    """(numbers, descriptor) rendering back to exactly `strings`, or None."""
+    parts = [_NUMBER_TEXT.match(s) for s in strings]
+    if not all(parts) or len({(m[1], m[4], len(m[3] or "")) for m in parts}) != 1:
+        return None
+    prefix, _, frac, suffix = parts[0].groups()
+    decimals = len(frac or "")
+    numbers = [float(m[2].replace(",", "")) if decimals else int(m[2].replace(",", "")) for m in parts]
+    base = {k: v for k, v in (("decimals", decimals), ("prefix", prefix), ("suffix", suffix)) if v}
+    for group in ("en", "in") if any("," in s for s in strings) else (None,):
+        ref = dict(base, group=group) if group else dict(base)
+        if not ref:
+            ref["decimals"] = 0
+        render = formatter(ref)
+        if all(render(n) == s for n, s in zip(numbers, strings)):
+            return numbers, ref
+    return None
+
+
+class _Columns:
+    """The shared column table; equal columns are stored once."""
+
+    def __init__(self):
+        self.columns = {}
+        self.numeric = []  # names of all-number columns, in order
+
+    def add(self, name, values):
+        """Name of a column holding `values` (an existing one if equal)."""
+        for existing, stored in self.columns.items():
+            # Same types too: 1 and 1.0 serialise differently
+            if stored == values and all(type(a) is type(b) for a, b in zip(stored, values)):
+                return existing
+        while name in self.columns:
+            name += "'"
+        self.columns[name] = values
+        if all(_is_number(v) for v in values):
+            self.numeric.append(name)
+        return name
+
+    def scaled(self, name, values):
+        """(column, divisor) with Math.round(column / divisor) == values for a
+        numeric column other than `name`, or None."""
+        for other in self.numeric:
+            stored = self.columns[other]
+            if other == name or len(stored) != len(values):
+                continue
+            for div in DIVISORS:
+                if _js_round(stored[0] / div) == values[0] and all(
+                        _js_round(s / div) == v for s, v in zip(stored, values)):
+                    return other, div
+        return None
+
+
+def _encode_field(columns, name, values):
+    if all(_is_number(v) for v in values):
+        return columns.add(name, values)
+    if all(isinstance(v, str) for v in values):
+        parsed = _parse(values)
+        if parsed is not None:
+            numbers, ref = parsed
+            return dict(col=columns.add(name, numbers), **ref)
+    return columns.add(name, values)
+
+
+def _fields(rows):
+    """Field names of uniform rows (same keys, same order), or None."""
+    if not rows or not all(isinstance(r, dict) for r in rows):
+        return None
+    keys = list(rows[0])
+    return keys if all(list(r) == keys for r in rows) else None
+
+
+def encode(section):
+    """Compact form of a section dict (see module docstring)."""
+    columns = _Columns()
+    out = {"format": COMPACT_VERSION, "columns": columns.columns}
+    for key, value in section.items():
+        fields = _fields(value) if key in ROW_KEYS or key == "talukas" else None
+        if fields is None:
+            out[key] = value
+        elif key == "talukas":
+            out[key] = {f: [r[f] for r in value] for f in fields}
+        else:
+            refs = out[key] = {}
+            for f in fields:
+                values = [r[f] for r in value]
+                if f == "year" and all(isinstance(v, str) and v.isdigit() for v in values):
+                    refs[f] = {"col": columns.add("year", [int(v) for v in values]), "str": True}
+                    continue
+                refs[f] = _encode_field(columns, f, values)
+    _scale_chart(out, columns)
+    return out
+
+
+def _scale_chart(out, columns):
+    """Chart fields stored on their own that are another field / 1000 (or
+    / 100000), rounded: reference that field's column instead."""
+    chart = out.get("chartData")
+    if not isinstance(chart, dict):
+        return
+    for f, ref in chart.items():
+        if (not isinstance(ref, str) or ref not in columns.numeric
+                or sum(r == ref for r in _all_refs(out)) > 1):
+            continue
+        found = columns.scaled(ref, columns.columns[ref])
+        if found is not None:
+            del columns.columns[ref]
+            columns.numeric.remove(ref)
+            chart[f] = {"col": found[0], "div": found[1]}
+
+
+def _all_refs(out):
+    for key in ROW_KEYS:
+        for ref in (out.get(key) or {}).values():
+            yield ref if isinstance(ref, str) else ref["col"]
+
+
+# ── Decoding (the reference for lib/compact-data.ts) ───────────────────────
+def decode(data):
+    """Section dict of a compact one (anything else is returned as is)."""
+    if not isinstance(data, dict) or data.get("format") != COMPACT_VERSION:
+        return data
+    columns = data["columns"]
+    out = {}
+    for key, value in data.items():
+        if key in ("format", "columns"):
+            continue
+        if key in ROW_KEYS and isinstance(value, dict):
+            cols = {f: list(map(formatter(ref), columns[ref if isinstance(ref, str) else ref["col"]]))
+                    for f, ref in value.items()}
+            n = len(next(iter(cols.values()), []))
+            out[key] = [{f: cols[f][i] for f in cols} for i in range(n)]
+        elif key == "talukas" and isinstance(value, dict):
+            n = len(next(iter(value.values()), []))
+            out[key] = [{f: value[f][i] for f in value} for i in range(n)]
+        else:
+            out[key] = value
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report (or write) the compact form of section files.")
+    parser.add_argument("paths", nargs="*", metavar="FILE",
+                        help="section JSON files, either form (default: every <section>--<district>.json here)")
+    parser.add_argument("--write", action="store_true", help="rewrite the files in the compact form")
+    args = parser.parse_args(argv)
+    paths = args.paths or sorted(glob.glob("*--*.json"))
+    totals = [0, 0, 0, 0]
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = decode(json.load(f))
+        t0 = time.perf_counter()
+        pretty = serialise(data)
+        t1 = time.perf_counter()
+        small = serialise(data, compact=True)
+        t2 = time.perf_counter()
+        if decode(json.loads(small)) != data:
+            print(f"{path}: round trip FAILED")
+            return 1
+        if args.write:
+            with open(path, "wb") as f:
+                f.write(small)
+        sizes = (len(pretty), len(small), len(gzip_bytes(pretty)), len(gzip_bytes(small)))
+        totals = [a + b for a, b in zip(totals, sizes)]
+        print(f"{path}: {sizes[0]:,} → {sizes[1]:,} bytes ({sizes[1] / sizes[0]:.0%}), "
+              f"gzip {sizes[2]:,} → {sizes[3]:,}; serialise {(t1 - t0) * 1e3:.2f} → {(t2 - t1) * 1e3:.2f} ms")
+    if len(paths) > 1:
+        print(f"{len(paths)} files: {totals[0]:,} → {totals[1]:,} bytes ({totals[1] / totals[0]:.0%}), "
+              f"gzip {totals[2]:,} → {totals[3]:,} ({totals[3] / totals[2]:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
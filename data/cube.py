@@ -0,0 +1,188 @@
+"""
+cube.py
+Dense district × taluka × year × metric cube of a DistrictStore's aggregates.
+
+Every (sheet, reduction) a pipeline reads is materialised into one array:
+
+  values[entity, year, metric]   float64, NaN where nothing was aggregated
+  counts[entity, year, group]    rows behind each cell, per (sheet, reduction)
+
+Entities are the store's global taluka keys (district 0's talukas, then
+district 1's, …) followed by one district-total row per district.  Metrics
+are the columns of each group (derived ones included), laid out group by
+group so a group's block is a plain slice — Cube.aggregate() hands the
+section builders SheetAggregate views into the cube, so every dashboard
+file is a projection of it.
+
+On disk (<name>.cube/): values.npy and counts.npy, memory-mapped on open,
+plus index.json with the dictionary-encoded dimensions (district slugs,
+taluka names, years, groups and their columns), the extract it was built
+from and the code that built it.  Queries resolve labels through dicts and
+index the arrays:
+
+    cube = Cube.open("health.cube")
+    cube.slice("DSA_Vaccines", "BCG", 2021, "ahilyanagar")   # { taluka: value }
+    cube.series("DSA_Vaccines", "BCG", "ahilyanagar", "Akole")  # { year: value }
+"""
+import json, os
+import numpy as np
+
+from extract_cache import _save
+from district_store import SheetAggregate
+
+CUBE_VERSION = 1
+INDEX = "index.json"
+
+
+def source_of(store):
+    """Identity of the extract behind a store (None without the binary cache)."""
+    cache = store.index.cache
+    return cache.manifest["source"]["sha1"] if cache is not None else None
+
+
+class Cube:
+    """Dense aggregate cube with label → position lookups."""
+
+    def __init__(self, values, counts, index, path=None):
+        self.values = values
+        self.counts = counts
+        self.index = index
+        self.path = path
+        self.slugs = index["districts"]
+        self.years = np.array(index["years"], dtype=np.int64)
+        self.n_keys = sum(len(t) for t in index["talukas"])
+        self._district = {s: d for d, s in enumerate(self.slugs)}
+        self._year = {y: i for i, y in enumerate(index["years"])}
+        self._taluka = []  # per district: { name: entity }
+        n = 0
+        for names in index["talukas"]:
+            self._taluka.append({t: n + k for k, t in enumerate(names)})
+            n += len(names)
+        self._group = {}   # (sheet, how) → group position
+        self._metric = {}  # (sheet, how, col) → metric position
+        for g, grp in enumerate(index["groups"]):
+            self._group[(grp["sheet"], grp["how"])] = g
+            for j, c in enumerate(grp["columns"]):
+                self._metric[(grp["sheet"], grp["how"], c)] = grp["start"] + j
+
+    # ── Build / save / open ─────────────────────────────────────────────────
+    @classmethod
+    def build(cls, store, groups, recipe=None):
+        """Cube of store.aggregate(sheet, how) for each (sheet, how) in `groups`;
+        `recipe` identifies the code that produced the aggregates."""
+        aggs = [(sheet, how, store.aggregate(sheet, how)) for sheet, how in dict.fromkeys(groups)]
+        years = sorted({int(y) for _, _, a in aggs for y in a.years})
+        ypos = {y: i for i, y in enumerate(years)}
+        n_d = len(store.slugs)
+        n_metrics = sum(len(a.columns) for _, _, a in aggs)
+        values = np.full((store.n_keys + n_d, len(years), n_metrics), np.nan)
+        counts = np.zeros((store.n_keys + n_d, len(years), len(aggs)), dtype=np.int64)
+        index_groups, start = [], 0
+        for g, (sheet, how, a) in enumerate(aggs):
+            ys = [ypos[int(y)] for y in a.years]
+            block = slice(start, start + len(a.columns))
+            if a.taluka_values is not None:
+                values[:store.n_keys, ys, block] = a.taluka_values
+                counts[:store.n_keys, ys, g] = a.taluka_counts
+            values[store.n_keys:, ys, block] = a.district_values
+            counts[store.n_keys:, ys, g] = a.district_counts
+            index_groups.append({"sheet": sheet, "how": how, "columns": list(a.columns),
+                                 "start": start, "taluka_level": a.taluka_values is not None})
+            start += len(a.columns)
+        index = {"version": CUBE_VERSION, "source": source_of(store), "recipe": recipe,
+                 "districts": store.slugs,
+                 "talukas": [list(t) for t in store.talukas], "years": years,
+                 "groups": index_groups}
+        return cls(values, counts, index)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        _save(os.path.join(path, "values.npy"), self.values)
+        _save(os.path.join(path, "counts.npy"), self.counts)
+        # index.json goes last: a cube without it is incomplete
+        tmp = os.path.join(path, INDEX + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(path, INDEX))
+        self.path = path
+
+    @classmethod
+    def open(cls, path):
+        """Memory-mapped cube, or None if `path` holds no complete cube."""
+        try:
+            with open(os.path.join(path, INDEX), "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") != CUBE_VERSION:
+                return None
+            values = np.load(os.path.join(path, "values.npy"), mmap_mode="r")
+            counts = np.load(os.path.join(path, "counts.npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        return cls(values, counts, index, path)
+
+    def matches(self, store, recipe=None):
+        """True if the cube was built from the store's extract and districts
+        by the same code."""
+        return (self.index["source"] is not None and self.index["source"] == source_of(store)
+                and self.index["recipe"] == recipe and self.slugs == store.slugs
+                and self.index["talukas"] == [list(t) for t in store.talukas])
+
+    # ── Lookups ─────────────────────────────────────────────────────────────
+    def metrics(self, sheet=None):
+        """[(sheet, how, column)] in cube order, optionally of one sheet."""
+        return [m for m in self._metric if sheet is None or m[0] == sheet]
+
+    def metric(self, sheet, col, how="sum"):
+        return self._metric[(sheet, how, col)]
+
+    def _cell(self, sheet, col, how):
+        m = self._metric[(sheet, how, col)]
+        return m, self._group[(sheet, how)]
+
+    def _entity(self, district, taluka=None):
+        d = self._district[district]
+        return self.n_keys + d if taluka is None else self._taluka[d][taluka]
+
+    # ── Queries ─────────────────────────────────────────────────────────────
+    def value(self, sheet, col, year, district, taluka=None, how="sum"):
+        """One cell (district total when `taluka` is None), or None if empty."""
+        m, g = self._cell(sheet, col, how)
+        e, y = self._entity(district, taluka), self._year.get(year)
+        if y is None or not self.counts[e, y, g]:
+            return None
+        return float(self.values[e, y, m])
+
+    def slice(self, sheet, col, year, district, how="sum"):
+        """{ taluka: value } of one metric for a district's talukas in `year`."""
+        m, g = self._cell(sheet, col, how)
+        y = self._year.get(year)
+        if y is None:
+            return {}
+        talukas = self._taluka[self._district[district]]
+        first = next(iter(talukas.values()), 0)
+        vals = self.values[first:first + len(talukas), y, m].tolist()
+        hit = self.counts[first:first + len(talukas), y, g].tolist()
+        return {t: v for t, v, n in zip(talukas, vals, hit) if n}
+
+    def series(self, sheet, col, district, taluka=None, how="sum"):
+        """{ year: value } of one metric for a taluka (or the district total)."""
+        m, g = self._cell(sheet, col, how)
+        e = self._entity(district, taluka)
+        vals = self.values[e, :, m].tolist()
+        hit = self.counts[e, :, g].tolist()
+        return {yr: v for yr, v, n in zip(self.index["years"], vals, hit) if n}
+
+    def aggregate(self, sheet, how="sum"):
+        """SheetAggregate view of one group, or None if the cube lacks it."""
+        g = self._group.get((sheet, how))
+        if g is None:
+            return None
+        grp = self.index["groups"][g]
+        block = slice(grp["start"], grp["start"] + len(grp["columns"]))
+        k = self.n_keys
+        taluka_values = taluka_counts = None
+        if grp["taluka_level"]:
+            taluka_values = self.values[:k, :, block]
+            taluka_counts = self.counts[:k, :, g]
+        return SheetAggregate(list(grp["columns"]), self.years, taluka_values, taluka_counts,
+                              self.values[k:, :, block], self.counts[k:, :, g])
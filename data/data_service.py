@@ -0,0 +1,327 @@
+"""
+data_service.py
+Local HTTP service for the dashboard data, built on demand from the
+aggregation pipelines instead of shipping every <sector>--<district>.json.
+
+  GET /                                          pipelines, sections, districts
+  GET /<pipeline>/<section>/<district>           section JSON (same as the file)
+  GET /<pipeline>/<section>/<district>/<year>    … with chartData/tableData cut to one year
+      (?format=compact for the numeric-only form the app formats, compact.py)
+  GET /<pipeline>/cube/<sheet>/<column>/<district>          { year: value }
+  GET /<pipeline>/cube/<sheet>/<column>/<district>/<year>   { taluka: value }
+      (?taluka=NAME for one taluka's series, ?how=mean|last for other reductions)
+  GET /<pipeline>/trends/<sheet>/<district>       YoY / CAGR / rolling mean and
+      slope per year for the district and its talukas (trends.py)
+      (?col=NAME, repeatable, to pick columns; ?how= as above)
+
+Each pipeline's store reads its aggregates from the cube (cube.py), so a
+response is a projection, not a re-aggregation.  Bodies are cached in an LRU
+bounded by entry count and bytes, each with a strong ETag (SHA-1 of the
+body) and a gzip copy made once; If-None-Match gets a 304 and clients that
+accept gzip (Accept-Encoding with q > 0) get the compressed copy.  Districts
+without source rows and years the section doesn't cover are 404s; a request
+that fails inside the pipelines gets a 500 with a JSON error body.  Plain
+asyncio streams, no dependencies beyond numpy.
+
+Run: python data_service.py [--host HOST] [--port PORT] [--cube-dir DIR]
+                            [--cache-entries N] [--cache-mb MB] [--no-cache]
+     (from project/data/ directory)
+"""
+import asyncio, argparse, gzip, hashlib, json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import compact
+from aggregate_health import HEALTH
+from aggregate_livestock import LIVESTOCK_PIPELINE
+
+PIPELINES = {"health": HEALTH, "livestock": LIVESTOCK_PIPELINE}
+REASONS = {200: "OK", 304: "Not Modified", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+MAX_HEADER_LINES = 100
+
+
+class NotFound(Exception):
+    pass
+
+
+class Body:
+    """One cached response body with its ETag and gzip copy."""
+
+    __slots__ = ("data", "gzipped", "etag")
+
+    def __init__(self, data):
+        self.data = data
+        self.gzipped = gzip.compress(data, 6, mtime=0)
+        self.etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+
+    @property
+    def size(self):
+        return len(self.data) + len(self.gzipped)
+
+
+class LRUCache:
+    """{ key: Body } holding at most `entries` bodies and `max_bytes` bytes."""
+
+    def __init__(self, entries=256, max_bytes=64 << 20):
+        self.entries = entries
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        body = self.items.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.items.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key, body):
+        old = self.items.pop(key, None)
+        if old is not None:
+            self.bytes -= old.size
+        self.items[key] = body
+        self.bytes += body.size
+        while self.items and (len(self.items) > self.entries or self.bytes > self.max_bytes):
+            _, dropped = self.items.popitem(last=False)
+            self.bytes -= dropped.size
+
+
+def encode(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def accepts_gzip(header):
+    """True if an Accept-Encoding value allows gzip: a gzip / x-gzip coding,
+    or failing that "*", with a q-value above 0."""
+    q = {}
+    for token in header.split(","):
+        coding, *params = [p.strip() for p in token.split(";")]
+        weight = 1.0
+        for p in params:
+            k, _, v = p.partition("=")
+            if k.strip().lower() == "q":
+                try:
+                    weight = float(v)
+                except ValueError:
+                    weight = 0.0
+        q[coding.lower()] = weight
+    weight = q.get("gzip", q.get("x-gzip", q.get("*", 0.0)))
+    return weight > 0
+
+
+YEAR_KEYS = ("chartData", "tableData", "byProducts")
+
+
+def section_years(data):
+    """The years (ints) the section JSON has per-year rows for."""
+    return {int(row["year"]) for key in YEAR_KEYS for row in data.get(key, ()) if "year" in row}
+
+
+def year_slice(data, year):
+    """Section JSON with its per-year rows restricted to `year` (an int)."""
+    out = dict(data)
+    for key in YEAR_KEYS:
+        if key in out:
+            out[key] = [row for row in out[key] if int(row.get("year", -1)) == year]
+    return out
+
+
+class DataService:
+    """Resolves request paths against the pipelines' stores."""
+
+    def __init__(self, stores, cache):
+        self.stores = stores  # pipeline name → DistrictStore
+        self.cache = cache
+        # Stores aggregate lazily and aren't thread-safe: one builder thread
+        self.executor = ThreadPoolExecutor(1)
+
+    def index(self):
+        return {name: {"sections": list(PIPELINES[name].sections),
+                       "districts": store.slugs,
+                       "cube": [list(m) for m in store.cube.metrics()]}
+                for name, store in self.stores.items()}
+
+    def section(self, name, section, slug, year=None, fmt=None):
+        pipeline, store = PIPELINES[name], self.stores[name]
+        if section not in pipeline.sections or slug not in store.slugs:
+            raise NotFound(section)
+        if not store.row_count(slug, pipeline.source_sheets([section])):
+            raise NotFound(slug)  # no rows: the app shows the placeholder file
+        _, out, _ = pipeline.build_district(store, slug, [section])
+        data = out[section]
+        if year is not None:
+            try:
+                year = int(year)
+            except ValueError:
+                raise NotFound(year)
+            if year not in section_years(data):
+                raise NotFound(year)
+            data = year_slice(data, year)
+        return compact.encode(data) if fmt == "compact" else data
+
+    def cube_query(self, name, sheet, col, slug, year, query):
+        cube = self.stores[name].cube
+        how = query.get("how", ["sum"])[0]
+        taluka = query.get("taluka", [None])[0]
+        try:
+            if year is None:
+                return {str(y): v for y, v in cube.series(sheet, col, slug, taluka, how).items()}
+            if taluka is not None:
+                return cube.value(sheet, col, int(year), slug, taluka, how)
+            return cube.slice(sheet, col, int(year), slug, how)
+        except (KeyError, ValueError):
+            raise NotFound(sheet)
+
+    def trends(self, name, sheet, slug, query):
+        store = self.stores[name]
+        how = query.get("how", ["sum"])[0]
+        if slug not in store.slugs or (sheet not in store.index.sheet_names()
+                                       and sheet not in store.index.pivots):
+            raise NotFound(sheet)
+        try:
+            cols = query.get("col") or list(store.aggregate(sheet, how).columns)
+            talukas, district = store.district(slug).get_trends(sheet, cols, how)
+        except (KeyError, ValueError):
+            raise NotFound(sheet)
+        return {"district": district, "talukas": talukas}
+
+    def resolve(self, path, query):
+        """JSON-able data for a request path (raises NotFound)."""
+        parts = [unquote(p) for p in path.strip("/").split("/") if p]
+        if not parts:
+            return self.index()
+        if parts[0] not in self.stores:
+            raise NotFound(path)
+        name, rest = parts[0], parts[1:]
+        if rest[:1] == ["trends"] and len(rest) == 3:
+            return self.trends(name, rest[1], rest[2], query)
+        if rest[:1] == ["cube"] and len(rest) in (4, 5):
+            return self.cube_query(name, rest[1], rest[2], rest[3],
+                                   rest[4] if len(rest) == 5 else None, query)
+        if len(rest) in (2, 3):
+            return self.section(name, rest[0], rest[1], rest[2] if len(rest) == 3 else None,
+                                query.get("format", [None])[0])
+        raise NotFound(path)
+
+    async def body(self, target):
+        """Cached Body for a request target (path + query)."""
+        body = self.cache.get(target)
+        if body is None:
+            url = urlsplit(target)
+            data = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.resolve, url.path, parse_qs(url.query))
+            body = Body(encode(data))
+            self.cache.put(target, body)
+        return body
+
+    # ── HTTP ────────────────────────────────────────────────────────────────
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers = request
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version == "HTTP/1.1")
+                status, extra, payload = await self.respond(method, target, headers)
+                head = [f"HTTP/1.1 {status} {REASONS[status]}",
+                        f"Content-Length: {len(payload)}",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+                if method != "HEAD":
+                    writer.write(payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, method, target, headers):
+        """(status, headers, payload) for one request."""
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+        try:
+            body = await self.body(target)
+        except NotFound:
+            return 404, {"Content-Type": "application/json"}, encode({"error": "not found"})
+        except Exception as e:  # a bug or bad data in the pipelines: answer, keep serving
+            print(f"ERROR {target}: {type(e).__name__}: {e}")
+            return 500, {"Content-Type": "application/json"}, encode({"error": "internal error"})
+        gz = accepts_gzip(headers.get("accept-encoding", ""))
+        etag = body.etag[:-1] + '-gz"' if gz else body.etag
+        extra = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        match = [t.strip() for t in headers.get("if-none-match", "").split(",")]
+        if etag in match or "*" in match:
+            return 304, extra, b""
+        payload = body.gzipped if gz else body.data
+        extra["Content-Type"] = "application/json; charset=utf-8"
+        if gz:
+            extra["Content-Encoding"] = "gzip"
+        return 200, extra, payload
+
+
+async def read_request(reader):
+    """(method, target, version, {header: value}) or None at EOF."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        return None
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        k, _, v = h.decode("latin-1").partition(":")
+        headers[k.strip().lower()] = v.strip()
+    return method, target, version, headers
+
+
+def open_stores(cube_dir=".", cache=True):
+    """Every pipeline's store, reading aggregates from its (saved) cube."""
+    stores = {}
+    for name, pipeline in PIPELINES.items():
+        store = pipeline.load_store(cache=cache)
+        pipeline.open_cube(store, cube_dir)
+        stores[name] = store
+    return stores
+
+
+async def serve(service, host, port):
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Serving dashboard data on http://{host}:{port}/")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve dashboard data slices over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cube-dir", default=".", help="where the pipeline cubes live (default: .)")
+    parser.add_argument("--cache-entries", type=int, default=256, help="LRU bound on cached responses")
+    parser.add_argument("--cache-mb", type=int, default=64, help="LRU bound on cached bytes (MB)")
+    parser.add_argument("--no-cache", action="store_true", help="don't use the binary extract cache")
+    args = parser.parse_args(argv)
+
+    service = DataService(open_stores(args.cube_dir, not args.no_cache),
+                          LRUCache(args.cache_entries, args.cache_mb << 20))
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+derived.py
+Derived metrics: small expressions over a sheet's aggregated columns,
+evaluated on the dense (…, year, column) arrays after aggregation.
+
+    DerivedMetric("DPT/Penta", "max(DPT, Pentavalent-3)")
+    DerivedMetric("Penta share", "100 * Pentavalent-3 / (DPT + Pentavalent-3)")
+
+Grammar: column names, numbers, + - * /, parentheses and the functions
+max(a, b, …), min(a, b, …) and abs(a).  Column names are matched longest
+first against the sheet's own columns, so names with spaces, dots or
+dashes ("Pentavalent-3", "Tetanus Pregnant Women") need no quoting.
+A column in the sheet's header that was pruned (blank in every row, see
+schema.py) counts as 0; a name the header doesn't have is an error.
+Division by zero yields 0, like the section builders' ratios.
+
+Because expressions run on aggregates, max(DPT, Pentavalent-3) over a
+taluka-year is the max of the two taluka-year totals — what the dashboard
+shows — not a per-row max.
+"""
+import re
+import numpy as np
+
+FUNCTIONS = {
+    "max": lambda *a: np.maximum.reduce(np.broadcast_arrays(*a)),
+    "min": lambda *a: np.minimum.reduce(np.broadcast_arrays(*a)),
+    "abs": np.abs,
+}
+
+_NUMBER = re.compile(r"\d+(?:\.\d*)?|\.\d+")
+_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def _safe_div(a, b):
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+    return np.divide(a, b, out=np.zeros(a.shape), where=b != 0)
+
+
+_BINARY = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": _safe_div}
+
+
+def _tokenize(expr, columns):
+    """[(kind, value)] with kind in col / num / fn / op."""
+    by_length = sorted(columns, key=len, reverse=True)
+    tokens, i = [], 0
+    while i < len(expr):
+        if expr[i].isspace():
+            i += 1
+            continue
+        col = next((c for c in by_length if expr.startswith(c, i)), None)
+        if col is not None:
+            tokens.append(("col", col))
+            i += len(col)
+            continue
+        m = _NUMBER.match(expr, i)
+        if m:
+            tokens.append(("num", float(m.group())))
+            i = m.end()
+            continue
+        m = _NAME.match(expr, i)
+        if m and m.group() in FUNCTIONS:
+            tokens.append(("fn", m.group()))
+            i = m.end()
+            continue
+        if expr[i] in "+-*/(),":
+            tokens.append(("op", expr[i]))
+            i += 1
+            continue
+        raise ValueError(f"unknown column or symbol at {expr[i:]!r} in {expr!r}")
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser → nested tuples (op, args…) / ("col", name) / ("num", x)."""
+
+    def __init__(self, tokens, expr):
+        self.tokens = tokens
+        self.expr = expr
+        self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        tok = self.peek()
+        if tok[0] is None or (value is not None and tok != ("op", value)):
+            raise ValueError(f"expected {value or 'a value'} in {self.expr!r}")
+        self.i += 1
+        return tok
+
+    def parse(self):
+        node = self.sum()
+        if self.i != len(self.tokens):
+            raise ValueError(f"unexpected {self.peek()[1]!r} in {self.expr!r}")
+        return node
+
+    def sum(self):
+        node = self.product()
+        while self.peek() in (("op", "+"), ("op", "-")):
+            node = (self.take()[1], node, self.product())
+        return node
+
+    def product(self):
+        node = self.unary()
+        while self.peek() in (("op", "*"), ("op", "/")):
+            node = (self.take()[1], node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek() == ("op", "-"):
+            self.take()
+            return ("neg", self.unary())
+        kind, value = self.take()
+        if kind in ("col", "num"):
+            return (kind, value)
+        if kind == "fn":
+            self.take("(")
+            args = [self.sum()]
+            while self.peek() == ("op", ","):
+                self.take()
+                args.append(self.sum())
+            self.take(")")
+            return ("fn", value, args)
+        if (kind, value) == ("op", "("):
+            node = self.sum()
+            self.take(")")
+            return node
+        raise ValueError(f"unexpected {value!r} in {self.expr!r}")
+
+
+class DerivedMetric:
+    """A named expression over a sheet's aggregated value columns."""
+
+    __slots__ = ("name", "expr")
+
+    def __init__(self, name, expr):
+        self.name = name
+        self.expr = expr
+
+    def evaluate(self, values, columns, headers=()):
+        """Evaluate over values[..., col] (last axis ordered as `columns`);
+        other `headers` of the sheet are zero."""
+        pos = {c: j for j, c in enumerate(columns)}
+        names = list(columns) + [h for h in headers if h not in pos]
+        tree = _Parser(_tokenize(self.expr, names), self.expr).parse()
+
+        def ev(node):
+            kind = node[0]
+            if kind == "col":
+                return values[..., pos[node[1]]] if node[1] in pos else np.float64(0)
+            if kind == "num":
+                return np.float64(node[1])
+            if kind == "neg":
+                return -ev(node[1])
+            if kind == "fn":
+                return FUNCTIONS[node[1]](*[ev(a) for a in node[2]])
+            return _BINARY[kind](ev(node[1]), ev(node[2]))
+
+        return np.broadcast_to(ev(tree), values.shape[:-1]).astype(np.float64)
+
+
+def extend(values, columns, metrics, headers=()):
+    """values with one extra column per metric appended on the last axis
+    (`headers`: the sheet's full header, see DerivedMetric.evaluate)."""
+    if values is None or not metrics:
+        return values
+    extra = [m.evaluate(values, columns, headers)[..., None] for m in metrics]
+    return np.concatenate([values] + extra, axis=-1)
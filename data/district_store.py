@@ -0,0 +1,329 @@
+"""
+district_store.py
+All-district aggregation over an ExtractIndex.
+
+Each (sheet, reduction) is aggregated once over the rows of every district
+in districts.json — talukas of all districts share one key axis — and the
+result is sliced per district.  Work therefore grows with total rows, not
+with districts × rows.  Derived metrics (derived.py) registered for a sheet
+are evaluated on its aggregates and appear as extra columns.  With a cube
+(cube.py) attached, aggregates are read from it instead of recomputed.
+Trend statistics (trends.py) are likewise computed once per aggregate, for
+every taluka and district together.
+"""
+import hashlib
+import numpy as np
+
+import instrument
+from derived import extend
+from groupby import Grouped, aggregate, collapse_keys, key_year_dict, year_axis, year_dict
+from talukas import TalukaResolver, district_talukas, norm_district
+from trends import WINDOWS, SheetTrends, to_dict
+
+YEAR_MIN, YEAR_MAX = 2011, 2025  # DSA years outside this window are dropped
+
+
+class SheetAggregate:
+    """One sheet aggregated over all value columns for every district.
+
+    taluka_values[key, year, col] / taluka_counts[key, year] use the store's
+    global taluka keys (None for district-level reductions);
+    district_values[district, year, col] / district_counts[district, year].
+    """
+
+    __slots__ = ("columns", "years", "taluka_values", "taluka_counts",
+                 "district_values", "district_counts")
+
+    def __init__(self, columns, years, taluka_values, taluka_counts,
+                 district_values, district_counts):
+        self.columns = columns
+        self.years = years
+        self.taluka_values = taluka_values
+        self.taluka_counts = taluka_counts
+        self.district_values = district_values
+        self.district_counts = district_counts
+
+    def positions(self, cols):
+        pos = {c: j for j, c in enumerate(self.columns)}
+        return [pos.get(c, -1) for c in cols]
+
+
+def _take(values, positions):
+    """Select columns on the last axis; unknown columns (-1) read as 0."""
+    out = np.zeros(values.shape[:-1] + (len(positions),))
+    for j, p in enumerate(positions):
+        if p >= 0:
+            out[..., j] = values[..., p]
+    return out
+
+
+class DistrictStore:
+    """Aggregates an ExtractIndex once for all districts, sliced on demand."""
+
+    def __init__(self, index, districts, resolver=None, derived=None, cube=None, years=None):
+        self.index = index
+        self.districts = districts
+        self.derived = derived or {}  # sheet → [DerivedMetric]
+        self.slugs = [d["slug"] for d in districts]
+        self.talukas = [district_talukas(d) for d in districts]
+        self.resolver = resolver or TalukaResolver(districts)
+        # Global taluka key space: district 0's talukas, then district 1's, ...
+        self.offsets = []
+        self.key_of = []
+        n = 0
+        for meta in self.talukas:
+            self.offsets.append(n)
+            self.key_of.append({t: n + k for k, t in enumerate(meta)})
+            n += len(meta)
+        self.n_keys = n
+        self.cube = cube
+        self.years = years or (YEAR_MIN, YEAR_MAX)  # DSA year window (first, last)
+        self._row_keys = {}
+        self._aggs = {}
+        self._trends = {}
+        self._hashes = {}
+
+    def use_cube(self, cube):
+        """Serve aggregates from `cube` (a cube.py Cube or a sqlite_store.py
+        SqliteSource) from now on."""
+        self.cube = cube
+        self._aggs.clear()
+        self._trends.clear()
+
+    def forget(self, sheets):
+        """Drop the row keys, aggregates, trends and content hashes of `sheets`
+        after their rows changed (see ExtractIndex.forget).  The store stops
+        reading from its cube, which no longer matches the extract."""
+        sheets = set(sheets)
+        self.cube = None
+        for cache in (self._row_keys, self._aggs, self._trends, self._hashes):
+            for key in [k for k in cache if (k[0] if isinstance(k, tuple) else k) in sheets]:
+                del cache[key]
+
+    def row_keys(self, sheet):
+        """Per-row (district position, global taluka key); -1 where unresolved.
+
+        Each distinct (District, Taluka) label pair is resolved exactly once.
+        """
+        keys = self._row_keys.get(sheet)
+        if keys is not None:
+            return keys
+        idx = self.index.sheet(sheet)
+        with instrument.stage("resolve", sheet=sheet) as s:
+            keys = self._row_keys[sheet] = self._resolve_rows(idx)
+            if s is not None:
+                dpos, tkey = keys
+                s.update(rows_in=idx.n_rows, rows_out=int((dpos >= 0).sum()), dropped={
+                    "unresolved_district": int((dpos < 0).sum()),
+                    "unresolved_taluka": int(((dpos >= 0) & (idx.taluka >= 0) & (tkey < 0)).sum())})
+        return keys
+
+    def _resolve_rows(self, idx):
+        slug_pos = {s: i for i, s in enumerate(self.slugs)}
+        lookup = [slug_pos.get(norm_district(l, slug_pos), -1) for l in idx.district_labels]
+        lookup.append(-1)  # rows with no District
+        dpos = np.array(lookup, dtype=np.int64)[idx.district]
+
+        width = len(idx.taluka_labels) + 1  # taluka code + 1, 0 = no Taluka
+        pair = np.where(dpos >= 0, dpos * width + idx.taluka + 1, -1)
+        uniq, inv = np.unique(pair, return_inverse=True)
+        tlookup = np.full(len(uniq), -1, dtype=np.int64)
+        for j, p in enumerate(uniq.tolist()):
+            d, t = divmod(p, width)
+            if p < 0 or t == 0:
+                continue
+            name = self.resolver.resolve(idx.taluka_labels[t - 1], self.slugs[d])
+            tlookup[j] = self.key_of[d].get(name, -1)
+        return dpos, tlookup[inv.ravel()]
+
+    def aggregate(self, sheet, how="sum"):
+        """SheetAggregate for `sheet` ("sum" / "mean" taluka-level, "last" district-level)."""
+        agg = self._aggs.get((sheet, how))
+        if agg is not None:
+            return agg
+        if self.cube is not None:
+            agg = self.cube.aggregate(sheet, how)
+            if agg is not None:
+                self._aggs[(sheet, how)] = agg
+                return agg
+        idx = self.index.sheet(sheet)
+        dpos, tkey = self.row_keys(sheet)
+        with instrument.stage("aggregate", sheet=sheet, how=how) as s:
+            agg = self._aggs[(sheet, how)] = self._aggregate(idx, dpos, tkey, sheet, how)
+            if s is not None:
+                s.update(rows_in=idx.n_rows, dropped=self._dropped(idx, dpos, tkey, how))
+                s["rows_out"] = idx.n_rows - sum(s["dropped"].values())
+        return agg
+
+    def _dropped(self, idx, dpos, tkey, how):
+        """{ reason: rows } left out of a (sheet, how) aggregate, each row
+        counted under the first reason that applies."""
+        bad = idx.year < 0
+        out = {"bad_year": int(bad.sum())}
+        ok = ~bad
+        if how != "last":
+            lo, hi = self.years
+            window = (idx.year >= lo) & (idx.year <= hi)
+            out["out_of_range_year"] = int((ok & ~window).sum())
+            ok &= window
+        out["unresolved_district"] = int((ok & (dpos < 0)).sum())
+        if how != "last":
+            out["unresolved_taluka"] = int((ok & (dpos >= 0) & (tkey < 0)).sum())
+        return out
+
+    def _aggregate(self, idx, dpos, tkey, sheet, how):
+        cols = list(idx.columns)
+        vals = idx.matrix(cols)
+        n_d = len(self.slugs)
+
+        if how == "last":
+            years, ypos = year_axis(idx.year)
+            dv, dc = aggregate(vals, ypos, len(years), dpos, n_d, "last")
+            agg = SheetAggregate(cols, years, None, None, dv, dc)
+        else:
+            years, ypos = year_axis(idx.year, *self.years)
+            tv, tc = aggregate(vals, ypos, len(years), tkey, self.n_keys, how)
+            if how == "sum":
+                dv, dc = aggregate(vals, np.where(tkey >= 0, ypos, -1), len(years), dpos, n_d, "sum")
+            else:
+                # District value = mean of the positive taluka values
+                dv = np.zeros((n_d,) + tv.shape[1:])
+                dc = np.zeros((n_d, len(years)), dtype=np.int64)
+                for d in range(n_d):
+                    sl = self._slice(d)
+                    dv[d] = collapse_keys(Grouped(tv[sl], tc[sl], None, years, cols),
+                                          "mean", positive_only=True)
+                    dc[d] = tc[sl].sum(axis=0)
+            agg = SheetAggregate(cols, years, tv, tc, dv, dc)
+        metrics = self.derived.get(sheet)
+        if metrics:
+            headers = idx.schema.headers
+            agg.taluka_values = extend(agg.taluka_values, cols, metrics, headers)
+            agg.district_values = extend(agg.district_values, cols, metrics, headers)
+            agg.columns = cols + [m.name for m in metrics]
+        return agg
+
+    def trends(self, sheet, how="sum", windows=WINDOWS):
+        """SheetTrends (trends.py) of a (sheet, how) aggregate, for every
+        taluka, district and column at once."""
+        key = (sheet, how, tuple(windows))
+        t = self._trends.get(key)
+        if t is None:
+            t = self._trends[key] = SheetTrends(self.aggregate(sheet, how), windows)
+        return t
+
+    def _slice(self, d):
+        return slice(self.offsets[d], self.offsets[d] + len(self.talukas[d]))
+
+    def row_count(self, slug, sheets):
+        """Rows attributed to district `slug` across `sheets`."""
+        d = self.slugs.index(slug)
+        return sum(int((self.row_keys(s)[0] == d).sum()) for s in sheets)
+
+    def content_hash(self, sheet, slug):
+        """SHA-1 of the rows of `sheet` attributed to district `slug`.
+
+        Covers each row's year, resolved taluka and values in sheet order, so
+        it changes exactly when that district's aggregates could.
+        """
+        key = (sheet, slug)
+        digest = self._hashes.get(key)
+        if digest is None:
+            idx = self.index.sheet(sheet)
+            dpos, tkey = self.row_keys(sheet)
+            d = self.slugs.index(slug)
+            rows = dpos == d
+            cols = list(idx.columns)
+            h = hashlib.sha1("\0".join([sheet] + cols).encode("utf-8"))
+            h.update(idx.year[rows].tobytes())
+            h.update(np.where(tkey[rows] >= 0, tkey[rows] - self.offsets[d], -1).tobytes())
+            h.update(idx.matrix(cols)[rows].tobytes())
+            digest = self._hashes[key] = h.hexdigest()
+        return digest
+
+    def district(self, slug):
+        return DistrictView(self, self.slugs.index(slug))
+
+
+class DistrictView:
+    """The get_*_data dict helpers, scoped to one district of a DistrictStore."""
+
+    def __init__(self, store, d):
+        self.store = store
+        self.d = d
+        district = store.districts[d]
+        self.slug = district["slug"]
+        self.name = district["name"]
+        self.talukas = store.talukas[d]
+
+    def _taluka_view(self, sheet, value_cols, how):
+        with instrument.stage("get", sheet=sheet, how=how, district=self.slug) as s:
+            agg = self.store.aggregate(sheet, how)
+            pos = agg.positions(value_cols)
+            sl = self.store._slice(self.d)
+            taluka = Grouped(_take(agg.taluka_values[sl], pos), agg.taluka_counts[sl],
+                             list(self.talukas), agg.years, list(value_cols))
+            district = year_dict(_take(agg.district_values[self.d], pos), agg.years,
+                                 list(value_cols), agg.district_counts[self.d] > 0)
+            out = key_year_dict(taluka)
+            if s is not None:
+                s.update(rows_in=int(agg.taluka_counts[sl].sum()),
+                         rows_out=sum(len(years) for years in out.values()))
+        return out, district
+
+    def get_dsa_data(self, sheet_name, value_cols):
+        """
+        Returns dict: { taluka: { year: { col: value, ... } } }
+        and district yearly totals: { year: { col: value, ... } }
+        """
+        return self._taluka_view(sheet_name, value_cols, "sum")
+
+    def get_dsa_data_avg(self, sheet_name, value_cols):
+        """For percentage data: average Rural+Urban instead of summing."""
+        return self._taluka_view(sheet_name, value_cols, "mean")
+
+    def get_trends(self, sheet_name, value_cols, how="sum"):
+        """Trend stats (trends.py) for `value_cols`:
+        { taluka: { year: { col: { stat: value } } } } and the district's
+        { year: { col: { stat: value } } }; undefined stats are left out."""
+        t = self.store.trends(sheet_name, how)
+        pos = [t.columns.index(c) for c in value_cols if c in t.columns]
+        cols = [t.columns[p] for p in pos]
+        district = to_dict({s: a[self.d][:, pos] for s, a in t.district.items()}, t.years, cols)
+        talukas = {}
+        if t.taluka is not None:
+            first = self.store.offsets[self.d]
+            for k, name in enumerate(self.talukas):
+                by_year = to_dict({s: a[first + k][:, pos] for s, a in t.taluka.items()},
+                                  t.years, cols)
+                if by_year:
+                    talukas[name] = by_year
+        return talukas, district
+
+    def get_arrays(self, sheet_name, value_cols, how="sum"):
+        """(years, values[year, col], present[year], taluka_values[taluka, year, col],
+        taluka_present[taluka, year]) for `value_cols`, 0 where there is no data;
+        the taluka arrays are None for district-level reductions."""
+        with instrument.stage("get", sheet=sheet_name, how=how, district=self.slug) as s:
+            agg = self.store.aggregate(sheet_name, how)
+            pos = agg.positions(value_cols)
+            present = agg.district_counts[self.d] > 0
+            values = np.where(present[:, None], _take(agg.district_values[self.d], pos), 0.0)
+            tv = tp = None
+            if agg.taluka_values is not None:
+                sl = self.store._slice(self.d)
+                tp = agg.taluka_counts[sl] > 0
+                tv = np.where(tp[..., None], _take(agg.taluka_values[sl], pos), 0.0)
+            if s is not None:
+                s.update(rows_in=int(agg.district_counts[self.d].sum()), rows_out=int(present.sum()))
+        return agg.years, values, present, tv, tp
+
+    def get_hmis_data(self, sheet_name, value_cols):
+        """Returns dict: { year: { col: value } } for district-level HMIS data."""
+        with instrument.stage("get", sheet=sheet_name, how="last", district=self.slug) as s:
+            agg = self.store.aggregate(sheet_name, "last")
+            out = year_dict(_take(agg.district_values[self.d], agg.positions(value_cols)),
+                            agg.years, list(value_cols), agg.district_counts[self.d] > 0)
+            if s is not None:
+                s.update(rows_in=int(agg.district_counts[self.d].sum()), rows_out=len(out))
+        return out
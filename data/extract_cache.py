@@ -0,0 +1,182 @@
+"""
+extract_cache.py
+On-disk binary cache of a parsed extract, kept next to it
+(health_extract.json → health_extract.cache/), or next to the source
+workbook when the sheets come from Excel (health.xlsx → health.cache/, see
+ingest_xlsx.py).
+
+Each sheet's SheetIndex columns are saved as two .npy files that warm runs
+memory-map instead of re-parsing JSON:
+  <n>.keys.npy     int64 (3 + text columns, rows)  Year, District code,
+                   Taluka code, then each text column's codes
+  <n>.values.npy   float64 (cols, rows), one contiguous row per value column
+manifest.json holds the sheet list, the dictionary labels, schema and
+unparseable-cell counts of each cached sheet, each sheet's metadata
+(headers, counts, …) and the first row of every row list, plus the source
+file's size, mtime and SHA-1.  A changed size invalidates the cache;
+a changed mtime alone costs one hash of the file and only invalidates it
+if the contents changed too.
+"""
+import hashlib, json, os, shutil
+import numpy as np
+
+from schema import SheetSchema
+
+CACHE_VERSION = 4
+MANIFEST = "manifest.json"
+
+
+def cache_dir_for(path):
+    return os.path.splitext(path)[0] + ".cache"
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _save(path, array):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(array))
+    os.replace(tmp, path)
+
+
+class ExtractCache:
+    """Binary cache in front of an ExtractReader.
+
+    Anything not cached yet is read through the reader and written back, so
+    the first run fills the cache and later runs never touch the JSON.
+    """
+
+    def __init__(self, reader, cache_dir=None):
+        self.reader = reader
+        self.dir = cache_dir or cache_dir_for(reader.path)
+        self.manifest = self._open()
+
+    # ── Manifest ────────────────────────────────────────────────────────────
+    def _source(self):
+        st = os.stat(self.reader.path)
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def _open(self):
+        source = self._source()
+        try:
+            with open(os.path.join(self.dir, MANIFEST), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+        if manifest and manifest.get("version") == CACHE_VERSION:
+            cached = manifest["source"]
+            if cached["size"] == source["size"]:
+                if cached["mtime_ns"] == source["mtime_ns"]:
+                    return manifest
+                # Touched but maybe not edited: the hash decides
+                if cached["sha1"] == file_sha1(self.reader.path):
+                    cached["mtime_ns"] = source["mtime_ns"]
+                    self._write(manifest)
+                    return manifest
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir, exist_ok=True)
+        source["sha1"] = file_sha1(self.reader.path)
+        return {"version": CACHE_VERSION, "source": source, "sheet_names": None,
+                "meta": {}, "sheets": {}}
+
+    def _write(self, manifest=None):
+        """Atomically replace manifest.json."""
+        path = os.path.join(self.dir, MANIFEST)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest or self.manifest, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    # ── Sheet metadata ──────────────────────────────────────────────────────
+    def sheet_names(self):
+        names = self.manifest["sheet_names"]
+        if names is None:
+            names = self.manifest["sheet_names"] = self.reader.sheet_names()
+            self._write()
+        return list(names)
+
+    def _meta(self, name):
+        entry = self.manifest["meta"].get(name)
+        if entry is None:
+            meta = self.reader.sheet_meta(name)
+            first = {k: next(self.reader.iter_rows(name, k), None)
+                     for k, v in meta.items() if v is None}
+            entry = self.manifest["meta"][name] = {"meta": meta, "first_rows": first}
+            self._write()
+        return entry
+
+    def sheet_meta(self, name):
+        """Same as ExtractReader.sheet_meta() with the default skip."""
+        return self._meta(name)["meta"]
+
+    def first_row(self, name, rows_key="ahilyanagar_data"):
+        """First row of one of the sheet's row lists, or None."""
+        return self._meta(name)["first_rows"].get(rows_key)
+
+    # ── Columnar sheets ─────────────────────────────────────────────────────
+    def load_sheet(self, name):
+        """Cached SheetIndex fields for `name` (memory-mapped), or None."""
+        entry = self.manifest["sheets"].get(name)
+        if entry is None:
+            return None
+        base = os.path.join(self.dir, entry["file"])
+        try:
+            keys = np.load(base + ".keys.npy", mmap_mode="r")
+            values = np.load(base + ".values.npy", mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        return {
+            "year": keys[0], "district": keys[1], "taluka": keys[2],
+            "district_labels": entry["district_labels"],
+            "taluka_labels": entry["taluka_labels"],
+            "columns": {c: values[j] for j, c in enumerate(entry["columns"])},
+            "categories": {c: (keys[3 + j], labels)
+                           for j, (c, labels) in enumerate(entry["categories"])},
+            "schema": SheetSchema.from_json(name, entry["schema"]),
+            "bad_cells": entry["bad_cells"],
+        }
+
+    def sheet_file(self, name):
+        """Base name of a sheet's arrays in the cache directory."""
+        return f"s{self.sheet_names().index(name):03d}"
+
+    def store_sheet(self, idx):
+        """Write a SheetIndex's columns to the cache (sheets of this extract only)."""
+        if idx.name not in self.sheet_names():
+            return
+        self.manifest["sheets"][idx.name] = write_sheet(self.dir, self.sheet_file(idx.name), idx)
+        self._write()
+
+    def record(self, sheets, meta=None):
+        """Add manifest entries for sheets written by write_sheet() elsewhere
+        (e.g. ingest workers) and their metadata, in one manifest write."""
+        self.manifest["sheets"].update(sheets)
+        self.manifest["meta"].update(meta or {})
+        self._write()
+
+
+def write_sheet(cache_dir, file, idx):
+    """Save a SheetIndex's arrays as <cache_dir>/<file>.{keys,values}.npy and
+    return its manifest entry."""
+    base = os.path.join(cache_dir, file)
+    cols = list(idx.columns)
+    cats = list(idx.categories.items())
+    _save(base + ".keys.npy", np.stack([idx.year, idx.district, idx.taluka]
+                                       + [codes for _, (codes, _) in cats]))
+    _save(base + ".values.npy", np.array([idx.columns[c] for c in cols], dtype=np.float64)
+          .reshape(len(cols), idx.n_rows))
+    return {
+        "file": file,
+        "columns": cols,
+        "district_labels": idx.district_labels,
+        "taluka_labels": idx.taluka_labels,
+        "categories": [[c, labels] for c, (_, labels) in cats],
+        "schema": idx.schema.to_json(),
+        "bad_cells": idx.bad_cells,
+    }
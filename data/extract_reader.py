@@ -0,0 +1,266 @@
+"""
+extract_reader.py
+Streaming reader for the extract JSON files (health_extract.json,
+excel_extract_livestocks.json).
+
+The file is scanned in fixed-size chunks: values we don't need are skipped
+without being decoded, and a sheet's rows are decoded one dict at a time.
+Pulling one sheet (or just its rows) therefore never builds the rest of the
+document, and peak memory stays at roughly one chunk plus one row however
+large the extract grows.
+
+    reader = ExtractReader("health_extract.json")
+    meta = reader.sheet_meta("DSA_Vaccines")          # headers, row_count, ...
+    for row in reader.iter_rows("DSA_Vaccines"):      # ahilyanagar_data rows
+        ...
+"""
+import hashlib, json, re
+
+CHUNK = 1 << 16
+# Per-sheet keys holding row lists; sheet_meta() skips them
+BULK_KEYS = ("rows", "ahilyanagar_data", "sample_all")
+
+_WS = re.compile(rb"[ \t\r\n]*")
+# Everything but brackets (strings included), and whole containers with no
+# containers inside (rows, lists of names): value() only counts deeper
+# brackets in Python.  Containers are matched as unrolled loops (a run of
+# plain bytes, then string + plain run, …), so one that is cut off at the end
+# of the buffer or holds a nested container fails in linear time.
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_FLAT = rb'[^"{}\[\]]*(?:' + _STRING + rb'[^"{}\[\]]*)*'
+_NON_BRACKET = re.compile(rb'(?:[^"{}\[\]]+|' + _STRING + rb'|\{' + _FLAT + rb'\}|\[' + _FLAT + rb'\])*', re.S)
+_STRING_END = re.compile(rb'(?:[^"\\]|\\.)*"', re.S)
+_SCALAR_END = re.compile(rb"[,}\] \t\r\n]")
+# Bytes one _NON_BRACKET match may cover: re keeps backtracking state per
+# repetition, so longer matches cost memory (not speed) proportional to length
+SCAN_WINDOW = 1 << 12
+
+
+class _Stream:
+    """Chunked byte buffer with just enough JSON lexing to walk objects.
+
+    Positions are absolute file offsets; buf holds file[base:base+len(buf)].
+    """
+
+    def __init__(self, f, offset=0):
+        f.seek(offset)
+        self.f = f
+        self.base = offset
+        self.buf = b""
+        self.pos = offset
+
+    def _fill(self, keep_from):
+        """Read one more chunk, dropping buffered bytes before `keep_from`."""
+        data = self.f.read(CHUNK)
+        if not data:
+            return False
+        drop = keep_from - self.base
+        if drop > 0:
+            self.buf = self.buf[drop:]
+            self.base = keep_from
+        self.buf += data
+        return True
+
+    def peek(self):
+        """Next non-whitespace byte (b"" at EOF), not consumed."""
+        while True:
+            k = _WS.match(self.buf, self.pos - self.base).end()
+            self.pos = self.base + k
+            if k < len(self.buf):
+                return self.buf[k:k + 1]
+            if not self._fill(self.pos):
+                return b""
+
+    def expect(self, ch):
+        if self.peek() != ch:
+            raise ValueError(f"expected {ch!r} at offset {self.pos}")
+        self.pos += 1
+
+    def _string_end(self, start, keep_from):
+        """Offset just past the string whose opening quote is at `start`."""
+        while True:
+            m = _STRING_END.match(self.buf, start - self.base + 1)
+            if m:
+                return self.base + m.end()
+            if not self._fill(keep_from):
+                raise ValueError(f"unterminated string at offset {start}")
+
+    def read_string(self):
+        if self.peek() != b'"':
+            raise ValueError(f"expected string at offset {self.pos}")
+        start = self.pos
+        self.pos = self._string_end(start, start)
+        return json.loads(self.buf[start - self.base:self.pos - self.base])
+
+    def value(self, keep=True):
+        """Consume the next value; return it decoded (keep) or None (skip).
+
+        Skipped containers are scanned structurally and dropped as the scan
+        goes, so skipping a huge list costs about one chunk of memory.
+        """
+        c = self.peek()
+        start = self.pos
+        if c == b'"':
+            end = self._string_end(start, start)
+        elif c in (b"{", b"["):
+            depth, j = 1, start + 1  # inside the opening bracket
+            while True:
+                # Jump over everything but nested brackets in C
+                k = j - self.base
+                limit = min(k + SCAN_WINDOW, len(self.buf))
+                k = _NON_BRACKET.match(self.buf, k, limit).end()
+                j = self.base + k
+                if k == limit:  # end of window / buffer
+                    if k >= len(self.buf) and not self._fill(start if keep else j):
+                        raise ValueError(f"unterminated container at offset {start}")
+                    continue
+                if self.buf[k] == 0x22:  # string cut by the window or buffer
+                    j = self._string_end(j, start if keep else j)
+                    continue
+                j += 1
+                depth += 1 if self.buf[k] in b"{[" else -1
+                if depth == 0:
+                    end = j
+                    break
+        else:
+            while True:
+                m = _SCALAR_END.search(self.buf, start - self.base)
+                if m:
+                    end = self.base + m.start()
+                    break
+                if not self._fill(start):
+                    end = self.base + len(self.buf)
+                    break
+        self.pos = end
+        if keep:
+            return json.loads(self.buf[start - self.base:end - self.base])
+        return None
+
+    def members(self):
+        """Iterate an object's keys; the caller consumes each value."""
+        self.expect(b"{")
+        if self.peek() == b"}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self.expect(b":")
+            yield key
+            c = self.peek()
+            self.pos += 1
+            if c == b"}":
+                return
+            if c != b",":
+                raise ValueError(f"expected ',' or '}}' at offset {self.pos - 1}")
+
+    def items(self):
+        """Iterate a list's items, one decoded value at a time."""
+        self.expect(b"[")
+        if self.peek() == b"]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            c = self.peek()
+            self.pos += 1
+            if c == b"]":
+                return
+            if c != b",":
+                raise ValueError(f"expected ',' or ']' at offset {self.pos - 1}")
+
+
+class ExtractReader:
+    """Random access to the sheets of an extract file without loading it.
+
+    The first access records each sheet's byte offset in one skipping pass;
+    later accesses seek straight to the sheet.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._offsets = None
+        self._ends = None
+
+    def offsets(self):
+        """{ sheet name: byte offset of its value } (one skipping pass, cached)."""
+        if self._offsets is None:
+            offsets, ends = {}, {}
+            with open(self.path, "rb") as f:
+                st = _Stream(f)
+                for name in st.members():
+                    st.peek()
+                    offsets[name] = st.pos
+                    st.value(keep=False)
+                    ends[name] = st.pos
+            self._offsets, self._ends = offsets, ends
+        return self._offsets
+
+    def sheet_digest(self, name):
+        """SHA-1 of the sheet's JSON text; changes exactly when the sheet does."""
+        start = self.offsets()[name]
+        end = self._ends[name]
+        h = hashlib.sha1()
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            while start < end:
+                block = f.read(min(CHUNK, end - start))
+                if not block:
+                    break
+                h.update(block)
+                start += len(block)
+        return h.hexdigest()
+
+    def sheet_names(self):
+        return list(self.offsets())
+
+    def _open_sheet(self, f, name):
+        offset = self.offsets().get(name)
+        if offset is None:
+            raise KeyError(name)
+        return _Stream(f, offset)
+
+    def sheet_meta(self, name, skip=BULK_KEYS):
+        """The sheet's keys except `skip` (row lists by default), decoded.
+
+        Skipped keys that are present map to None, so callers can tell which
+        row lists the sheet carries.
+        """
+        meta = {}
+        with open(self.path, "rb") as f:
+            st = self._open_sheet(f, name)
+            for key in st.members():
+                skipped = key in skip
+                value = st.value(keep=not skipped)
+                meta[key] = None if skipped else value
+        return meta
+
+    def iter_rows(self, name, rows_key="ahilyanagar_data"):
+        """Yield the row dicts of one sheet's `rows_key` list, one at a time."""
+        with open(self.path, "rb") as f:
+            st = self._open_sheet(f, name)
+            for key in st.members():
+                if key != rows_key:
+                    st.value(keep=False)
+                    continue
+                if st.peek() == b"n":  # null
+                    st.value(keep=False)
+                    return
+                yield from st.items()
+                return
+
+    def read_sheet(self, name):
+        """One whole sheet dict."""
+        with open(self.path, "rb") as f:
+            return self._open_sheet(f, name).value()
+
+    def iter_sheets(self, skip=()):
+        """Yield (name, sheet dict) one sheet at a time, minus `skip` keys."""
+        with open(self.path, "rb") as f:
+            st = _Stream(f)
+            for name in st.members():
+                sheet = {}
+                for key in st.members():
+                    value = st.value(keep=key not in skip)
+                    if key not in skip:
+                        sheet[key] = value
+                yield name, sheet
@@ -0,0 +1,93 @@
+"""
+ingest_xlsx.py
+Builds the columnar store the aggregators read straight from the source
+Excel workbooks, without the intermediate extract JSON.
+
+Each worksheet is one task on a process pool: the worker opens the workbook
+read-only, streams the sheet's rows (xlsx_reader.py) through SheetIndex —
+one row at a time, so even DSA_DeathCause's ~15k rows never exist as a list
+— and writes the typed columns for every district into the workbook's
+binary cache (extract_cache.py, health.xlsx → health.cache/).  The parent
+records all sheets in the cache manifest in one write.  Sheets already
+cached for the same workbook contents are skipped unless --force.
+
+The aggregators then read the workbook like an extract:
+
+    python ingest_xlsx.py health.xlsx
+    python aggregate_health.py --input health.xlsx
+
+Run: python ingest_xlsx.py WORKBOOK [WORKBOOK ...] [--jobs N] [--force]
+     (from project/data/ directory, needs numpy and openpyxl)
+"""
+import os, sys, time, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from extract_cache import ExtractCache, cache_dir_for, write_sheet
+from sheet_index import SheetIndex
+from xlsx_reader import ROWS_KEY, XlsxReader, is_workbook
+
+
+_readers = {}  # path → XlsxReader, one open workbook per worker process
+
+
+def ingest_sheet(task):
+    """Stream one worksheet into the cache → (name, manifest entry, meta entry)."""
+    path, name, cache_dir, file = task
+    reader = _readers.get(path)
+    if reader is None:
+        reader = _readers[path] = XlsxReader(path)
+    meta = reader.sheet_meta(name)
+    first = next(reader.iter_rows(name), None)
+    idx = SheetIndex(name, reader.iter_rows(name), meta["headers"])
+    meta["row_count"] = idx.n_rows
+    return name, write_sheet(cache_dir, file, idx), {"meta": meta, "first_rows": {ROWS_KEY: first}}
+
+
+def ingest(path, jobs=None, force=False):
+    """Fill `path`'s cache with every worksheet; returns the sheets ingested."""
+    reader = XlsxReader(path)
+    cache = ExtractCache(reader)
+    names = cache.sheet_names()
+    todo = [n for n in names if force or n not in cache.manifest["sheets"]]
+    # Largest sheets first so one big sheet doesn't finish the pool alone
+    wb = reader.workbook()
+    todo.sort(key=lambda n: -(wb[n].max_row or 0))
+    reader.close()  # workers open their own handle
+    tasks = [(path, n, cache.dir, cache.sheet_file(n)) for n in todo]
+
+    workers = min(len(tasks), jobs or os.cpu_count() or 1)
+    if workers < 2:
+        results = [ingest_sheet(t) for t in tasks]
+        if path in _readers:
+            _readers.pop(path).close()
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(ingest_sheet, tasks))
+
+    sheets, meta = {}, {}
+    for name, entry, m in results:
+        sheets[name], meta[name] = entry, m
+        print(f"  {name}: {m['meta']['row_count']:,} rows, {len(entry['columns'])} value columns")
+    cache.record(sheets, meta)
+    return [name for name, _, _ in results]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest Excel workbooks into the columnar store.")
+    parser.add_argument("workbooks", nargs="+", metavar="WORKBOOK")
+    parser.add_argument("--jobs", type=int, metavar="N", help="ingest processes (default: every core)")
+    parser.add_argument("--force", action="store_true", help="re-ingest sheets that are already cached")
+    args = parser.parse_args(argv)
+
+    for path in args.workbooks:
+        if not is_workbook(path):
+            parser.error(f"{path} is not an .xlsx workbook")
+        t0 = time.perf_counter()
+        print(f"Ingesting {path}")
+        done = ingest(path, args.jobs, args.force)
+        print(f"{len(done)} sheet(s) ingested into {cache_dir_for(path)} "
+              f"in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+instrument.py
+Per-stage instrumentation of a pipeline run and its JSON run report.
+
+Code wraps each unit of work in a stage:
+
+    with instrument.stage("load", sheet=name) as s:
+        ...
+        if s is not None:
+            s["rows_out"] = idx.n_rows
+
+Nothing is recorded (and `s` is None) until instrument.start() is called, so
+the hooks cost one global lookup on normal runs.  A recorded stage holds its
+labels, wall and CPU time, rows in / out, rows dropped by reason and — with
+trace_memory — the tracemalloc peak while it ran.  Stages recorded in pool
+workers are shipped back with their results (drain / merge).  With a
+profile directory, the outermost load / aggregate / build stages also dump
+a cProfile file each.
+
+Stage kinds: load (sheet → columns), resolve (District / Taluka labels →
+keys), validate (a sheet's data-quality checks), aggregate (sheet ×
+reduction), get (a get_*_data call), build (a section for a district),
+write (a section's files).
+"""
+import cProfile, json, os, re, sys, time, tracemalloc
+from contextlib import contextmanager
+
+PROFILED = ("load", "aggregate", "build")
+
+_recorder = None
+
+
+class Recorder:
+    """Stage records of one process."""
+
+    def __init__(self, trace_memory=False, profile_dir=None, t0=None):
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.records = []
+        self._peaks = []      # running tracemalloc peak of each open stage
+        self._profiling = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def config(self):
+        return {"trace_memory": self.trace_memory, "profile_dir": self.profile_dir, "t0": self.t0}
+
+    @contextmanager
+    def stage(self, kind, **labels):
+        rec = {"stage": kind, **labels, "rows_in": None, "rows_out": None, "dropped": {}}
+        profile = None
+        if self.profile_dir and kind in PROFILED and not self._profiling:
+            profile, self._profiling = cProfile.Profile(), True
+        if self.trace_memory:
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield rec
+        finally:
+            if profile is not None:
+                profile.disable()
+                self._profiling = False
+            rec["at"] = round(wall - self.t0, 6)
+            rec["wall"] = round(time.perf_counter() - wall, 6)
+            rec["cpu"] = round(time.process_time() - cpu, 6)
+            rec["pid"] = os.getpid()
+            if self.trace_memory:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                rec["peak_mb"] = round(peak / 2**20, 3)
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+            if profile is not None:
+                profile.dump_stats(os.path.join(self.profile_dir, profile_name(rec)))
+            self.records.append(rec)
+
+
+def profile_name(rec):
+    labels = [str(v) for k, v in rec.items() if k in ("sheet", "how", "section", "district") and v]
+    return re.sub(r"[^\w.-]+", "_", "-".join([rec["stage"]] + labels)) + ".prof"
+
+
+# ── Module API ──────────────────────────────────────────────────────────────
+@contextmanager
+def _off():
+    yield None
+
+
+def stage(kind, **labels):
+    """Context manager recording one stage; yields its record (None when off)."""
+    return _off() if _recorder is None else _recorder.stage(kind, **labels)
+
+
+def active():
+    return _recorder is not None
+
+
+def start(trace_memory=False, profile_dir=None, t0=None):
+    """Start recording in this process (replacing any earlier recorder)."""
+    global _recorder
+    _recorder = Recorder(trace_memory, profile_dir, t0)
+    return _recorder
+
+
+def config():
+    """Arguments that start() an equivalent recorder elsewhere (None when off)."""
+    return _recorder.config() if _recorder is not None else None
+
+
+def restart():
+    """Forget inherited records (forked workers), keeping the configuration."""
+    if _recorder is not None:
+        start(**_recorder.config())
+
+
+def drain():
+    """Records so far, removed from this process (for shipping to the parent)."""
+    if _recorder is None:
+        return []
+    records, _recorder.records = _recorder.records, []
+    return records
+
+
+def merge(records):
+    """Add records drained from another process."""
+    if _recorder is not None:
+        _recorder.records.extend(records)
+
+
+def summary(records):
+    """{ kind: totals } over stage records."""
+    out = {}
+    for r in records:
+        s = out.setdefault(r["stage"], {"count": 0, "wall": 0.0, "cpu": 0.0,
+                                        "rows_in": 0, "rows_out": 0, "dropped": {}})
+        s["count"] += 1
+        s["wall"] += r["wall"]
+        s["cpu"] += r["cpu"]
+        s["rows_in"] += r["rows_in"] or 0
+        s["rows_out"] += r["rows_out"] or 0
+        for reason, n in r["dropped"].items():
+            s["dropped"][reason] = s["dropped"].get(reason, 0) + n
+        if "peak_mb" in r:
+            s["peak_mb"] = max(s.get("peak_mb", 0.0), r["peak_mb"])
+    for s in out.values():
+        s["wall"], s["cpu"] = round(s["wall"], 6), round(s["cpu"], 6)
+    return out
+
+
+def report(**extra):
+    """The run report: run totals, per-kind summary and every stage record."""
+    rec = _recorder
+    records = sorted(rec.records, key=lambda r: r["at"])
+    return {
+        "argv": sys.argv,
+        "wall": round(time.perf_counter() - rec.t0, 6),
+        "cpu": round(time.process_time(), 6),
+        "trace_memory": rec.trace_memory,
+        "profile_dir": rec.profile_dir,
+        **extra,
+        "summary": summary(records),
+        "stages": records,
+    }
+
+
+def save(path, **extra):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(**extra), f, indent=2)
+    print(f"Wrote run report {path} ({len(_recorder.records)} stages)")
@@ -0,0 +1,360 @@
+"""
+pipeline.py
+Shared driver for the dashboard generators (aggregate_health.py,
+aggregate_livestock.py).
+
+A Pipeline bundles one extract file with its sections — builder function,
+output file stem and the (sheet, reduction) pairs the builder reads — plus
+any derived metrics and pivoted sheets.  It provides the section × district
+process-pool build, the aggregate cube the builders project from (cube.py),
+the incremental-rebuild bookkeeping (build_state.py), output writing and
+the command line shared by every generator, including the run report
+(instrument.py) and the data-quality checks run before each build
+(validate.py).  Outputs are pretty-printed JSON, or with --compact the
+minified numeric-only form the app formats itself (compact.py), optionally
+pre-gzipped.
+"""
+import os, io, contextlib, argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import instrument, validate
+from sheet_index import ExtractIndex
+from district_store import DistrictStore
+from build_state import BuildState, build_key, file_digest, value_digest
+from compact import COMPACT_VERSION, serialise, gzip_bytes
+from cube import Cube
+from sqlite_store import SqliteSource, SqliteStore
+from talukas import DEFAULT_DISTRICT, DISTRICTS_FILE, load_districts
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Engine code every output depends on besides its own generator module
+ENGINE_FILES = [os.path.join(HERE, f) for f in
+                ("pipeline.py", "district_store.py", "groupby.py", "talukas.py", "derived.py",
+                 "sections.py")]
+
+_worker = None  # (pipeline, store) used by build_all pool workers
+
+
+class Pipeline:
+    """One extract → per-district section JSON files."""
+
+    def __init__(self, name, input, sections, module_file, derived=None, pivots=None,
+                 state_metrics=None, checks=None):
+        self.name = name
+        self.input = input
+        self.sections = sections    # name → (builder, output stem, [(sheet, how)])
+        self.derived = derived or {}
+        self.pivots = pivots or {}  # alias → (sheet, category column, value column)
+        self.state_metrics = state_metrics or {}  # output stem → StateMetric (state_stats.py)
+        self.checks = checks or {}  # sheet → [extra validate.py checks, e.g. ShareSum]
+        self.recipe_files = [os.path.abspath(module_file)] + ENGINE_FILES
+        self.state_file = f".{name}-build.json"
+
+    def load_store(self, path=None, districts_file=DISTRICTS_FILE, cache=True):
+        """DistrictStore over the extract; sheets are read lazily, one columnar pass each."""
+        return self.open_store(path or self.input, load_districts(districts_file), cache)
+
+    def open_store(self, path, districts, cache=True, years=None):
+        index = ExtractIndex.open(path, cache=cache)
+        for alias, pivot in self.pivots.items():
+            index.add_pivot(alias, *pivot)
+        return DistrictStore(index, districts, derived=self.derived, years=years)
+
+    def source_sheets(self, sections=None):
+        """Sheets read by `sections` (default: all of them)."""
+        return sorted({sheet for name in (sections or self.sections)
+                       for sheet, _ in self.sections[name][2]})
+
+    def groups(self, sections=None):
+        """(sheet, reduction) pairs read by `sections` (default: all of them)."""
+        return list(dict.fromkeys(g for name in (sections or self.sections)
+                                  for g in self.sections[name][2]))
+
+    def cube_dir(self, out_dir="."):
+        return os.path.join(out_dir, f"{self.name}.cube")
+
+    def recipe(self):
+        return file_digest(*self.recipe_files)
+
+    def open_cube(self, store, out_dir=".", recipe=None):
+        """The pipeline's cube in `out_dir`, rebuilt and saved unless it matches
+        the store's extract and the current code; the store then reads its
+        aggregates from it."""
+        recipe = recipe or self.recipe()
+        path = self.cube_dir(out_dir)
+        cube = Cube.open(path)
+        if (cube is None or not cube.matches(store, recipe)
+                or any(cube.aggregate(*g) is None for g in self.groups())):
+            cube = Cube.build(store, self.groups(), recipe)
+            cube.save(path)
+            print(f"Wrote {os.path.normpath(path)} ({cube.values.shape[0]} entities × "
+                  f"{cube.values.shape[1]} years × {cube.values.shape[2]} metrics)")
+        store.use_cube(cube)
+        return cube
+
+    def open_db(self, store, path):
+        """Load the pipeline's sheets into the SQLite database at `path`
+        unless it already holds them for this extract and code (see
+        sqlite_store.py); the store then reads its aggregates from it."""
+        db = SqliteStore(path)
+        try:
+            if not db.matches(self, store):
+                print(f"Loaded {db.load(self, store):,} {self.name} rows into {os.path.normpath(path)}")
+        finally:
+            db.close()
+        source = SqliteSource(path, store)
+        store.use_cube(source)
+        return source
+
+    # ── Building ────────────────────────────────────────────────────────────
+    def build_district(self, store, slug, sections=None):
+        """Build `sections` (default: all) for one district → (slug, {section: json}, log text)."""
+        dist = store.district(slug)
+        log = io.StringIO()
+        out = {}
+        with contextlib.redirect_stdout(log):
+            for name in sections or self.sections:
+                with instrument.stage("build", pipeline=self.name, section=name, district=slug):
+                    out[name] = self.sections[name][0](dist)
+        return slug, out, log.getvalue()
+
+    def build_all(self, store, jobs, workers=None):
+        """Build (slug, sections) jobs on a process pool, one task per section ×
+        district, using up to `workers` processes (default: every core).
+
+        Aggregates are materialised once in the parent as a cube (unless the
+        store already reads from one) that every section projects from.  Forked
+        workers inherit it copy-on-write; where fork isn't available, spawned
+        workers re-open the store over the memory-mapped extract cache the
+        parent just filled (and the saved cube, if any).  Sheet data is never
+        pickled; only the finished section dicts come back.
+        """
+        global _worker
+        needed = self.groups({name for _, sections in jobs for name in sections})
+        if needed and (store.cube is None or any(store.cube.aggregate(*g) is None for g in needed)):
+            store.use_cube(Cube.build(store, needed))
+        tasks = [(slug, [name]) for slug, sections in jobs for name in sections]
+        workers = min(len(tasks), workers or os.cpu_count() or 1)
+        if workers < 2:
+            return [self.build_district(store, *task) for task in tasks]
+        if "fork" in multiprocessing.get_all_start_methods():
+            _worker = (self, store)
+            pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"),
+                                       initializer=instrument.restart)
+        else:
+            index = store.index
+            pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_init_worker,
+                                       initargs=(self, index.reader.path, store.districts,
+                                                 index.cache is not None, getattr(store.cube, "path", None),
+                                                 instrument.config(), getattr(store.cube, "db_path", None)))
+        try:
+            with pool:
+                results = []
+                for result, records in pool.map(_build_worker, tasks):
+                    instrument.merge(records)
+                    results.append(result)
+                return results
+        finally:
+            _worker = None
+
+    # ── Outputs ─────────────────────────────────────────────────────────────
+    def output_paths(self, section, slug, out_dir=".", compact=False, gz=False):
+        """Files one (section, district) build writes: <stem>--<slug>.json
+        (and <stem>.json for the default district), each followed by its .gz
+        copy when `gz`.  The compact form keeps these names, the ones the
+        app imports (lib/district-data.ts expands either form)."""
+        stem = self.sections[section][1]
+        names = [f"{stem}--{slug}.json"] + ([f"{stem}.json"] if slug == DEFAULT_DISTRICT else [])
+        if gz:
+            names = [n for name in names for n in (name, name + ".gz")]
+        return [os.path.normpath(os.path.join(out_dir, n)) for n in names]
+
+    def output_key(self, store, section, slug, recipe, compact=False):
+        """Build key of one (section, district): its source sheets' content for
+        that district, its districts.json entry and the output form."""
+        inputs = {sheet: store.content_hash(sheet, slug) for sheet in self.source_sheets([section])}
+        inputs["districts.json"] = value_digest(store.districts[store.slugs.index(slug)])
+        if compact:
+            inputs["format"] = f"compact-{COMPACT_VERSION}"
+        return build_key(recipe, inputs)
+
+    def write_outputs(self, slug, outputs, out_dir=".", compact=False, gz=False):
+        """Write one district's section JSONs (see output_paths); returns the
+        paths written."""
+        written = []
+        for section, data in outputs.items():
+            paths = self.output_paths(section, slug, out_dir, compact, gz)
+            with instrument.stage("write", pipeline=self.name, section=section, district=slug) as s:
+                text = serialise(data, compact)
+                size = 0
+                for path in paths:
+                    with open(path, "wb") as f:
+                        f.write(gzip_bytes(text) if path.endswith(".gz") else text)
+                        size += f.tell()
+                    written.append(path)
+                if s is not None:
+                    s.update(rows_out=len(data["chartData"]), files=len(paths), bytes=size)
+            print(f"Wrote {os.path.basename(paths[0])} ({len(data['chartData'])} years, {len(data['talukas'])} talukas)")
+        return written
+
+    def run(self, store, sections=None, districts=None, out_dir=".", force=False, workers=None,
+            cube=False, db=None, compact=False, gz=False):
+        """Build and write `sections` for `districts` (default: every district with
+        source rows for those sections).  Outputs whose source rows and generator
+        code are unchanged since the last run are skipped unless `force`.
+        `workers` caps the build processes (default: every core).  With `cube`
+        the full aggregate cube is kept in out_dir/<name>.cube/ (see open_cube);
+        with `db` the aggregates are read from that SQLite database instead
+        (see open_db).  `compact` / `gz` pick the output form (see output_paths).
+        Returns the paths written."""
+        sections = list(sections or self.sections)
+        sheets = self.source_sheets(sections)
+        candidates = districts or store.slugs
+        active = [s for s in candidates if store.row_count(s, sheets)]
+        for s in candidates:
+            if s not in active:
+                kept = ", ".join(f"{self.sections[n][1]}--{s}.json" for n in sections)
+                print(f"No source rows for {s} – leaving {kept} untouched "
+                      f"(placeholders from scripts/generate-district-data.js)")
+
+        os.makedirs(out_dir, exist_ok=True)
+        state = BuildState(os.path.join(out_dir, self.state_file))
+        recipe = self.recipe()
+        if db:
+            self.open_db(store, db)
+        elif cube:
+            self.open_cube(store, out_dir, recipe)
+        jobs, keys, skipped = [], {}, []
+        for slug in active:
+            todo = []
+            for name in sections:
+                key = keys[(slug, name)] = self.output_key(store, name, slug, recipe, compact)
+                if not force and state.fresh(self.output_paths(name, slug, out_dir, compact, gz), key):
+                    skipped.append(f"{self.sections[name][1]}--{slug}")
+                else:
+                    todo.append(name)
+            if todo:
+                jobs.append((slug, todo))
+
+        written = []
+        for slug, outputs, log in self.build_all(store, jobs, workers):
+            print(log, end="")
+            written += self.write_outputs(slug, outputs, out_dir, compact, gz)
+            for name in outputs:
+                state.record(self.output_paths(name, slug, out_dir, compact, gz), keys[(slug, name)])
+        state.save()
+
+        # ═══════════════════════════════════════════════════════════════
+        # SUMMARY
+        # ═══════════════════════════════════════════════════════════════
+        print("\n" + "="*60)
+        print(f"{len(written)} {self.name} data files generated for {len(active)} district(s):")
+        for fname in written:
+            print(f"  {fname}")
+        if skipped:
+            print(f"{len(skipped)} output(s) unchanged since the last build: {', '.join(skipped)}")
+        for slug, name, n in store.resolver.report():
+            print(f"WARNING: unresolved taluka {name!r} in {slug} ({n} sheet(s)) – rows dropped")
+        print("="*60)
+        return written
+
+    # ── Command line ────────────────────────────────────────────────────────
+    def add_arguments(self, parser, prefix=""):
+        """Section / input options (prefixed when several pipelines share a parser)."""
+        p = f"--{prefix}-" if prefix else "--"
+        parser.add_argument(f"{p}section", dest=f"{prefix}_section" if prefix else "section",
+                            action="append", choices=list(self.sections),
+                            help=f"{self.name} section to build (repeatable; default: all)")
+        parser.add_argument(f"{p}input", dest=f"{prefix}_input" if prefix else "input",
+                            default=self.input, help=f"{self.name} extract (default: {self.input})")
+
+
+def add_common_arguments(parser):
+    parser.add_argument("--district", action="append", metavar="SLUG",
+                        help="district slug to build (repeatable; default: all with rows)")
+    parser.add_argument("--out-dir", default=".", help="output directory (default: .)")
+    parser.add_argument("--no-cache", action="store_true", help="don't use the binary extract cache")
+    parser.add_argument("--jobs", type=int, metavar="N", help="build processes (default: every core, 1 = serial)")
+    parser.add_argument("--force", action="store_true", help="rebuild outputs even if their inputs are unchanged")
+    parser.add_argument("--cube", action="store_true",
+                        help="keep the aggregate cube (<name>.cube/) in the output directory")
+    parser.add_argument("--db", metavar="FILE",
+                        help="load the extracts into this SQLite database and aggregate there (sqlite_store.py)")
+    parser.add_argument("--compact", action="store_true",
+                        help="write the minified numeric-only form the app formats (see compact.py)")
+    parser.add_argument("--gzip", action="store_true", help="also write a pre-compressed .gz of every output")
+    parser.add_argument("--report", metavar="FILE", help="write a JSON run report of every stage")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record each stage's tracemalloc peak in the run report (slower)")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="dump a cProfile file per sheet load, aggregate and section build")
+    parser.add_argument("--validation", metavar="FILE", help="write the data-quality issues as JSON")
+    parser.add_argument("--strict", action="store_true",
+                        help="stop before building if validation finds errors")
+    parser.add_argument("--no-validate", action="store_true", help="skip the data-quality checks")
+
+
+def start_report(args):
+    """Start recording stages if the command line asked for a report or profiles."""
+    if args.report or args.profile or args.trace_memory:
+        instrument.start(args.trace_memory, args.profile)
+
+
+def finish_report(args, **extra):
+    if args.report:
+        instrument.save(args.report, **extra)
+
+
+def validate_stores(args, stores, sections=None):
+    """Data-quality checks over [(pipeline, store)] (the sheets of the
+    selected `sections`, see validate.check_stores) unless --no-validate;
+    with --strict errors stop the run."""
+    if args.no_validate:
+        return
+    errors = validate.check_stores(stores, args.validation, sections)
+    if args.strict and errors:
+        raise SystemExit(f"Validation found {errors} error(s) – not building (see above)")
+
+
+def check_districts(parser, store, districts):
+    unknown = [s for s in districts or [] if s not in store.slugs]
+    if unknown:
+        parser.error(f"unknown district(s): {', '.join(unknown)}")
+
+
+def main(pipeline, argv=None):
+    """Command line for a single pipeline."""
+    parser = argparse.ArgumentParser(description=f"Build the {pipeline.name} dashboard JSON files.")
+    pipeline.add_arguments(parser)
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    start_report(args)
+    store = pipeline.load_store(args.input, cache=not args.no_cache)
+    check_districts(parser, store, args.district)
+    validate_stores(args, [(pipeline, store)], {pipeline.name: args.section})
+    pipeline.run(store, args.section, args.district, args.out_dir, args.force, args.jobs, args.cube, args.db,
+                 args.compact, args.gzip)
+    finish_report(args, pipelines=[pipeline.name])
+
+
+def _init_worker(pipeline, path, districts, cache, cube_path, report=None, db_path=None):
+    """Spawned workers open the extract (and saved cube or SQLite database)
+    themselves; the extract and cube are memory-mapped, so every worker
+    shares the parent's page cache."""
+    global _worker
+    if report is not None:
+        instrument.start(**report)
+    store = pipeline.open_store(path, districts, cache)
+    if db_path:
+        store.use_cube(SqliteSource(db_path, store))
+    elif cube_path:
+        store.use_cube(Cube.open(cube_path))
+    _worker = (pipeline, store)
+
+
+def _build_worker(task):
+    """One build, plus the stages it recorded for the parent's report."""
+    pipeline, store = _worker
+    return pipeline.build_district(store, *task), instrument.drain()
@@ -0,0 +1,115 @@
+"""
+schema.py
+Per-sheet schemas for the extract files.
+
+The Excel export pads every sheet's header row with placeholder columns
+(col_10 … col_27) that are null in every row — DSA_FamilyWelfarePrograms
+has 28 headers but only 10 real ones.  A SheetSchema records, for one
+sheet, its source kind (DSA / HMIS / NFHS), its key columns and the dtype of
+every other header, inferred in the same pass that builds the columns:
+
+  float   numeric values (text cells in it read as blank, like safe() did)
+  text    only non-numeric values (e.g. DSA_DeathCause's Sex / Cause),
+          kept as dictionary codes
+  empty   null in every row — pruned, never materialised
+
+The registry keeps the schema of each sheet seen so far; the extract cache
+stores it so warm runs know the live columns without looking at any rows.
+"""
+import re
+
+KINDS = ("DSA", "HMIS", "NFHS")
+KEY_COLUMNS = ("District", "Year", "Taluka", "Rural/Urban")
+DTYPES = ("float", "text", "empty")
+
+_KIND = re.compile(r"^(DSA|HMIS|NFHS)_|\((DSA|HMIS|NFHS)\)\s*$")
+
+
+def sheet_kind(name, headers=()):
+    """Source of a sheet: "DSA_…" / "… (DSA)" names; taluka-level sheets default to DSA."""
+    m = _KIND.search(name)
+    if m:
+        return m.group(1) or m.group(2)
+    return "DSA" if "Taluka" in headers else None
+
+
+class SheetSchema:
+    """Column layout of one sheet: keys plus value columns by dtype."""
+
+    __slots__ = ("name", "kind", "headers", "keys", "dtypes")
+
+    def __init__(self, name, headers, dtypes, kind=None):
+        self.name = name
+        self.kind = kind or sheet_kind(name, headers)
+        self.headers = list(headers)
+        self.keys = [h for h in headers if h in KEY_COLUMNS]
+        self.dtypes = dict(dtypes)  # value column → dtype
+
+    @property
+    def value_columns(self):
+        """Live numeric columns, in header order."""
+        return [h for h in self.headers if self.dtypes.get(h) == "float"]
+
+    @property
+    def text_columns(self):
+        """Text columns (dictionary-encoded, see SheetIndex.categories)."""
+        return [h for h in self.headers if self.dtypes.get(h) == "text"]
+
+    @property
+    def dead_columns(self):
+        return [h for h in self.headers if self.dtypes.get(h) == "empty"]
+
+    def to_json(self):
+        return {"kind": self.kind, "headers": self.headers, "dtypes": self.dtypes}
+
+    @classmethod
+    def from_json(cls, name, d):
+        return cls(name, d["headers"], d["dtypes"], d["kind"])
+
+
+class ColumnStats:
+    """Per-header counters collected while a sheet's rows are walked once."""
+
+    __slots__ = ("present", "numeric")
+
+    def __init__(self):
+        self.present = 0
+        self.numeric = 0
+
+    def dtype(self):
+        if not self.present:
+            return "empty"
+        return "float" if self.numeric else "text"
+
+
+def infer_schema(name, headers, stats):
+    """SheetSchema from {header: ColumnStats} gathered over every row."""
+    return SheetSchema(name, headers, {h: stats[h].dtype() for h in headers
+                                       if h not in KEY_COLUMNS and h in stats})
+
+
+class SchemaRegistry:
+    """{ sheet name: SheetSchema } for one extract."""
+
+    def __init__(self, schemas=None):
+        self.schemas = dict(schemas or {})
+
+    def get(self, name):
+        return self.schemas.get(name)
+
+    def register(self, schema):
+        self.schemas[schema.name] = schema
+        return schema
+
+    def kind(self, name):
+        schema = self.schemas.get(name)
+        return schema.kind if schema else sheet_kind(name)
+
+    def sheets(self, kind=None):
+        """Registered sheet names, optionally of one kind."""
+        return [n for n, s in self.schemas.items() if kind is None or s.kind == kind]
+
+    def report(self):
+        """[(sheet, kind, live columns, pruned columns)]"""
+        return [(n, s.kind, len(s.value_columns), len(s.dead_columns))
+                for n, s in self.schemas.items()]
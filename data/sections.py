@@ -0,0 +1,530 @@
+"""
+sections.py
+Declarative dashboard sections.  A Section spec names its metrics once, as
+expressions over (sheet, reduction, column) sources, and lays out the
+widgets that show them:
+
+  kpis            KPI cards: a metric at the latest year (or another point)
+                  with its change since the previous year, or a note
+  chartData       metrics over the section's years, as numbers
+  tableData       the same years and metrics, as display strings
+  talukas         metrics per taluka in the latest year
+  relatedMetrics  Series (one metric over some years) and Split (several
+                  metrics in one year) charts
+
+A Plan compiles a pipeline's specs together.  It collects every (sheet,
+reduction, column) they read.  Per district build, each (sheet, reduction)
+is fetched once as dense year and taluka arrays (DistrictView.get_arrays)
+and cut once to the years the section reads.  Every metric is then
+evaluated once, as one vectorized expression over the union of the years
+and points its KPIs, chart, table and related charts need (and once over
+the talukas), and the widgets index the result.  A new
+dashboard page costs a spec, not another set of loops:
+
+    PUB = Source("DSA_PublicHospitals")
+    Section("health-infrastructure", "Health Infrastructure",
+            metrics={"pubHospitals": PUB["Hospitals"], "phcs": PUB["Primary Health Centres"]},
+            years=Years(PUB, window=(2012, 2021)),
+            kpis=[KPI("Public Hospitals", "pubHospitals", "Building2", "bg-blue-50")],
+            chart=["pubHospitals", "phcs"], table=["pubHospitals", "phcs"],
+            talukas=["pubHospitals", "phcs"])
+
+Values a district has no data for read as 0, and ratios with a zero
+denominator are 0, the same as the hand-written builders.
+"""
+from functools import partial
+import numpy as np
+
+from trends import pct_change, trend_entry
+
+DEFAULT_LATEST = 2021  # latest year of a section with no years
+
+
+def fmt_int(v):
+    """Format integer with commas."""
+    return f"{int(v):,}"
+
+
+def fmt_pct(v, decimals=1):
+    return f"{v:.{decimals}f}%"
+
+
+def _round1(v):
+    return round(v, 1)
+
+
+def _round_pct(v):
+    return round(round(v, 1))
+
+
+def _rounded_text(v):
+    return str(int(round(v, 0)))
+
+
+class Format:
+    """How a metric is shown: chartData, talukas and Split / Series values
+    are cast(v); tableData is text(v) and KPI values text(cast(v))."""
+
+    def __init__(self, cast, text):
+        self.cast = cast
+        self.text = text
+
+
+INT = Format(int, fmt_int)                  # 1234.5 → 1234 / "1,234"
+NUMBER = Format(int, str)                   # 1234.5 → 1234 / "1234"
+ROUNDED = Format(round, _rounded_text)      # 1234.5 → 1234 / "1234"
+PCT = Format(float, fmt_pct)                # 12.34 → 12.34 / "12.3%"
+PCT1 = Format(_round1, fmt_pct)             # 12.34 → 12.3 / "12.3%"
+WHOLE_PCT = Format(_round_pct, fmt_pct)     # 12.46 → 12 (of the one-decimal value)
+
+
+# ── Expressions ─────────────────────────────────────────────────────────────
+def _ratio(a, b):
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+    return np.divide(a, b, out=np.zeros(a.shape), where=b > 0)
+
+
+_OPS = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": _ratio}
+
+
+def _expr(v):
+    return v if isinstance(v, Expr) else Const(v)
+
+
+class Expr:
+    """Arithmetic over source columns (+ - * /; x / 0 is 0)."""
+
+    def __add__(self, other):
+        return Op("+", self, _expr(other))
+
+    def __radd__(self, other):
+        return Op("+", _expr(other), self)
+
+    def __sub__(self, other):
+        return Op("-", self, _expr(other))
+
+    def __rsub__(self, other):
+        return Op("-", _expr(other), self)
+
+    def __mul__(self, other):
+        return Op("*", self, _expr(other))
+
+    def __rmul__(self, other):
+        return Op("*", _expr(other), self)
+
+    def __truediv__(self, other):
+        return Op("/", self, _expr(other))
+
+    def __rtruediv__(self, other):
+        return Op("/", _expr(other), self)
+
+
+class Col(Expr):
+    def __init__(self, sheet, how, column):
+        self.sheet = sheet
+        self.how = how
+        self.column = column
+
+    def cols(self):
+        return [self]
+
+    def groups(self):
+        return [(self.sheet, self.how)]
+
+    def eval(self, lookup):
+        return lookup(self)
+
+
+class Const(Expr):
+    def __init__(self, value):
+        self.value = float(value)
+
+    def cols(self):
+        return []
+
+    def groups(self):
+        return []
+
+    def eval(self, lookup):
+        return self.value
+
+
+class Op(Expr):
+    def __init__(self, op, a, b):
+        self.op = op
+        self.a = a
+        self.b = b
+        self._groups = list(dict.fromkeys(a.groups() + b.groups()))
+
+    def cols(self):
+        return self.a.cols() + self.b.cols()
+
+    def groups(self):
+        return self._groups
+
+    def eval(self, lookup):
+        return _OPS[self.op](self.a.eval(lookup), self.b.eval(lookup))
+
+
+class Source:
+    """One (sheet, reduction) a spec reads; SOURCE[column] is an expression."""
+
+    def __init__(self, sheet, how="sum"):
+        self.sheet = sheet
+        self.how = how
+
+    def __getitem__(self, column):
+        return Col(self.sheet, self.how, column)
+
+
+# ── Years ───────────────────────────────────────────────────────────────────
+class Years:
+    """Years the district has data for in every one of `sources`, inside
+    `window` (first, last), the `last` n of them; `otherwise` (another
+    Years) is used if none are left."""
+
+    def __init__(self, *sources, window=None, last=None, otherwise=None):
+        self.sources = sources
+        self.window = window
+        self.last = last
+        self.otherwise = otherwise
+
+    def resolve(self, frame):
+        years = None
+        for src in self.sources:
+            have = set(frame.present_years(src.sheet, src.how))
+            years = have if years is None else years & have
+        years = sorted(years or ())
+        if self.window is not None:
+            lo, hi = self.window
+            years = [y for y in years if lo <= y <= hi]
+        if self.last is not None:
+            years = years[-self.last:]
+        if not years and self.otherwise is not None:
+            return self.otherwise.resolve(frame)
+        return years
+
+
+class Latest:
+    """The last of some Years, or `default` if there are none."""
+
+    def __init__(self, years, default=None):
+        self.years = years
+        self.default = default
+
+    def resolve(self, frame):
+        years = self.years.resolve(frame)
+        return years[-1] if years else self.default
+
+
+# ── Widgets ─────────────────────────────────────────────────────────────────
+class Change:
+    """% change from the previous year (trend_calc)."""
+
+    def entry(self, raw, value, prev, points):
+        return trend_entry(pct_change(prev, value))
+
+
+class Growth:
+    """% change from a positive previous value, 0 otherwise; never neutral."""
+
+    def entry(self, raw, value, prev, points):
+        pct = (raw - prev) / prev * 100 if prev > 0 else 0
+        return {"direction": "up" if pct > 0 else "down", "value": f"{pct:+.1f}%", "context": ""}
+
+
+class Above:
+    """Direction `up` when the value is above `threshold`, else `otherwise`."""
+
+    def __init__(self, threshold, up="up", otherwise="neutral"):
+        self.threshold = threshold
+        self.up = up
+        self.otherwise = otherwise
+
+    def __call__(self, value):
+        return self.up if value > self.threshold else self.otherwise
+
+
+class Note:
+    """Fixed trend text; `value` / `context` may use {value} and the
+    section's points ({latest}, {hmis}, …)."""
+
+    def __init__(self, value, context="", direction="neutral"):
+        self.value = value
+        self.context = context
+        self.direction = direction
+
+    def entry(self, raw, value, prev, points):
+        direction = self.direction(value) if callable(self.direction) else self.direction
+        return {"direction": direction, "value": self.value.format(value=value, **points),
+                "context": self.context.format(value=value, **points)}
+
+
+class KPI:
+    """KPI card of `metric` at point `at` (formatted with its Format)."""
+
+    def __init__(self, label, metric, icon, bg, trend=None, at="latest"):
+        self.label = label
+        self.metric = metric
+        self.icon = icon
+        self.bg = bg
+        self.trend = trend or Change()
+        self.at = at
+
+
+class Series:
+    """Related chart of one metric over `years` (default: the section's),
+    keeping the `last` n points; `fmt` overrides the metric's Format."""
+
+    def __init__(self, title, subtitle, icon, chart_type, metric, years=None, last=6, fmt=None):
+        self.title = title
+        self.subtitle = subtitle
+        self.icon = icon
+        self.chart_type = chart_type
+        self.metric = metric
+        self.years = years
+        self.last = last
+        self.fmt = fmt
+
+
+class Split:
+    """Related chart of several (label, metric) at point `at`; a single
+    "N/A" item if that point has no year.  `fmt` overrides the metrics'
+    Format."""
+
+    def __init__(self, title, subtitle, icon, chart_type, items, at="latest", fmt=None):
+        self.title = title
+        self.subtitle = subtitle
+        self.icon = icon
+        self.chart_type = chart_type
+        self.items = items
+        self.at = at
+        self.fmt = fmt
+
+
+# ── Sections ────────────────────────────────────────────────────────────────
+class Section:
+    """One dashboard page.
+
+    `metrics` maps names to expressions, or (expression, Format) pairs
+    (default Format: INT).  Widgets name metrics, or give an expression
+    directly; chart / table / talukas fields are names or (output key,
+    metric name) pairs.  The section's years come from `years`; "latest"
+    is the last of them (`latest` if there are none) and "prev" the one
+    before (with a single year: the latest one if `hold_prev`, else none,
+    so previous values read 0).  `points` adds named years (Latest).
+    """
+
+    def __init__(self, stem, title, metrics, years, kpis=(), chart=(), table=(), talukas=(),
+                 related=(), points=None, latest=DEFAULT_LATEST, hold_prev=True):
+        self.stem = stem
+        self.title = title
+        self.metrics = {n: m if isinstance(m, tuple) else (m, INT) for n, m in metrics.items()}
+        self.years = years
+        self.kpis = list(kpis)
+        self.chart = [f if isinstance(f, tuple) else (f, f) for f in chart]
+        self.table = [f if isinstance(f, tuple) else (f, f) for f in table]
+        self.talukas = [f if isinstance(f, tuple) else (f, f) for f in talukas]
+        self.related = list(related)
+        self.points = points or {}
+        self.latest = latest
+        self.hold_prev = hold_prev
+        # The distinct expressions the widgets read, each evaluated once per build
+        self.exprs = list({id(e): e for e in self._exprs()}.values())
+        self._groups = self._find_groups()
+
+    def _metric(self, ref, fmt=None):
+        """(expression, Format) of a metric name or an inline expression;
+        `fmt` overrides the Format."""
+        expr, own = self.metrics[ref] if isinstance(ref, str) else (ref, INT)
+        return expr, fmt or own
+
+    def _years(self):
+        out = [self.years] + [p.years for p in self.points.values()]
+        out += [w.years for w in self.related if isinstance(w, Series) and w.years is not None]
+        return out
+
+    def _exprs(self):
+        refs = [k.metric for k in self.kpis] + [m for _, m in self.chart + self.table + self.talukas]
+        for w in self.related:
+            refs += [w.metric] if isinstance(w, Series) else [m for _, m in w.items]
+        return [self._metric(r)[0] for r in refs]
+
+    def groups(self):
+        """(sheet, reduction) pairs the section reads, in first-use order."""
+        return list(self._groups)
+
+    def _find_groups(self):
+        cols = [g for e in self.exprs for g in e.groups()]
+        for years in self._years():
+            while years is not None:
+                cols += [(s.sheet, s.how) for s in years.sources]
+                years = years.otherwise
+        return list(dict.fromkeys(cols))
+
+    def columns(self):
+        """(sheet, reduction, column) triples the section reads."""
+        return list(dict.fromkeys((c.sheet, c.how, c.column) for e in self.exprs for c in e.cols()))
+
+    def build(self, dist, columns):
+        """Section JSON of one DistrictView; `columns` is the plan's
+        { (sheet, reduction): [column] }."""
+        print(f"\n=== {self.title} ({dist.name}) ===")
+        frame = Frame(dist, {g: columns[g] for g in self._groups})
+        years = self.years.resolve(frame)
+        latest = years[-1] if years else self.latest
+        prev = years[-2] if len(years) > 1 else (latest if self.hold_prev else None)
+        points = {"latest": latest, "prev": prev}
+        points.update((name, p.resolve(frame)) for name, p in self.points.items())
+        labels = {k: "N/A" if v is None else v for k, v in points.items()}
+        print(f"Years: {years}, latest {latest}"
+              + "".join(f", {k} {v}" for k, v in labels.items() if k not in ("latest", "prev")))
+
+        # Every metric once, over all the years and points the widgets read
+        spans = {id(w): years if w.years is None else w.years.resolve(frame)
+                 for w in self.related if isinstance(w, Series)}
+        wanted = years + list(points.values()) + [y for ys in spans.values() for y in ys]
+        at = frame.at_years(self.exprs, wanted)
+
+        out = {"kpis": [], "chartData": [], "tableData": [], "talukas": [], "relatedMetrics": []}
+        for k in self.kpis:
+            expr, fmt = self._metric(k.metric)
+            raw, before = at[id(expr)][points[k.at]], at[id(expr)][prev]
+            value = fmt.cast(raw)
+            out["kpis"].append({"label": k.label, "value": fmt.text(value), "icon": k.icon,
+                                "iconBg": k.bg, "trend": k.trend.entry(raw, value, before, labels)})
+
+        series = {m: [at[id(self.metrics[m][0])][y] for y in years]
+                  for m in dict.fromkeys(m for _, m in self.chart + self.table)}
+        for i, yr in enumerate(years):
+            out["chartData"].append({"year": str(yr), **{
+                key: self.metrics[m][1].cast(series[m][i]) for key, m in self.chart}})
+            out["tableData"].append({"year": str(yr), **{
+                key: self.metrics[m][1].text(series[m][i]) for key, m in self.table}})
+
+        if self.talukas:
+            per = frame.talukas_at([self.metrics[m][0] for _, m in self.talukas], latest)
+            for i, (name, meta) in enumerate(dist.talukas.items()):
+                row = {"name": name, "lng": meta["lng"], "lat": meta["lat"], "color": meta["color"]}
+                row.update((key, self.metrics[m][1].cast(per[id(self.metrics[m][0])][i]))
+                           for key, m in self.talukas)
+                out["talukas"].append(row)
+
+        for w in self.related:
+            entry = {"title": w.title.format(**labels), "subtitle": w.subtitle.format(**labels),
+                     "icon": w.icon, "chartType": w.chart_type}
+            if isinstance(w, Series):
+                expr, fmt = self._metric(w.metric, w.fmt)
+                data = [{"label": str(y), "value": fmt.cast(at[id(expr)][y])} for y in spans[id(w)]]
+                entry["data"] = data[-w.last:]
+            elif points[w.at] is None:
+                entry["data"] = [{"label": "N/A", "value": 0}]
+            else:
+                entry["data"] = []
+                for label, m in w.items:
+                    expr, fmt = self._metric(m, w.fmt)
+                    entry["data"].append({"label": label, "value": fmt.cast(at[id(expr)][points[w.at]])})
+            out["relatedMetrics"].append(entry)
+        return out
+
+
+class Frame:
+    """One district's arrays for the (sheet, reduction) groups a section reads."""
+
+    def __init__(self, dist, columns):
+        self.columns = {g: {c: j for j, c in enumerate(cols)} for g, cols in columns.items()}
+        self.groups = {g: dist.get_arrays(g[0], cols, g[1]) for g, cols in columns.items()}
+        self.n_talukas = len(dist.talukas)
+
+    def present_years(self, sheet, how):
+        years, _, present, _, _ = self.groups[(sheet, how)]
+        return years[present].tolist()
+
+    def at_years(self, exprs, years):
+        """{ id(expr): { year: value } } of each expression for the district
+        in `years` (None: no year), each evaluated once over all of them;
+        int 0 where none of its columns has data."""
+        years = list(dict.fromkeys(years))
+        ys = np.array([-1 if y is None else y for y in years], dtype=np.int64)
+
+        def fetch(g):
+            axis, values, present, _, _ = self.groups[g]
+            if not len(axis):
+                return np.zeros((len(ys), len(self.columns[g]))), np.zeros(len(ys), dtype=bool)
+            pos = np.minimum(np.searchsorted(axis, ys), len(axis) - 1)
+            hit = (axis[pos] == ys) & present[pos]
+            return np.where(hit[:, None], values[pos], 0.0), hit
+
+        return {k: dict(zip(years, v)) for k, v in _evaluate(exprs, fetch, self.columns, len(ys)).items()}
+
+    def talukas_at(self, exprs, year):
+        """{ id(expr): [value] } of each expression for each of the
+        district's talukas in `year`; int 0 where none of its columns has
+        data."""
+        n = self.n_talukas
+
+        def fetch(g):
+            axis, _, _, tv, tp = self.groups[g]
+            if tv is None:
+                raise ValueError(f"{g[0]} ({g[1]}) has no taluka values")
+            pos = np.flatnonzero(axis == year)
+            if not len(pos):
+                return np.zeros((n, len(self.columns[g]))), np.zeros(n, dtype=bool)
+            return tv[:, pos[0]], tp[:, pos[0]]
+
+        return _evaluate(exprs, fetch, self.columns, n)
+
+
+def _evaluate(exprs, fetch, columns, n):
+    """{ id(expr): [value] } of each distinct expression over n cells.
+    fetch(group) → (values[cell, col], has data[cell]) is called once per
+    (sheet, reduction); `columns` maps a group's columns to their index."""
+    fetched = {}
+
+    def group(g):
+        if g not in fetched:
+            fetched[g] = fetch(g)
+        return fetched[g]
+
+    def column(col):
+        g = (col.sheet, col.how)
+        return group(g)[0][:, columns[g][col.column]]
+
+    out = {}
+    for expr in exprs:
+        if id(expr) in out:
+            continue
+        values = expr.eval(column)
+        values = values.tolist() if np.ndim(values) else [float(values)] * n
+        has = None
+        for g in expr.groups():
+            has = group(g)[1] if has is None else has | group(g)[1]
+        if has is None:
+            out[id(expr)] = [0] * n
+        else:
+            out[id(expr)] = [v if h else 0 for v, h in zip(values, has.tolist())]
+    return out
+
+
+class Plan:
+    """A pipeline's section specs compiled together: every (sheet,
+    reduction) they read with the union of its columns, fetched once per
+    district build."""
+
+    def __init__(self, specs):
+        self.specs = specs  # section name → Section
+        self.columns = {}   # (sheet, reduction) → [column]
+        for spec in specs.values():
+            for g in spec.groups():
+                self.columns.setdefault(g, [])
+            for sheet, how, col in spec.columns():
+                if col not in self.columns[(sheet, how)]:
+                    self.columns[(sheet, how)].append(col)
+
+    def build(self, name, dist):
+        return self.specs[name].build(dist, self.columns)
+
+    def sections(self):
+        """Pipeline sections: name → (builder, output stem, [(sheet, reduction)])."""
+        return {name: (partial(self.build, name), spec.stem, spec.groups())
+                for name, spec in self.specs.items()}
@@ -0,0 +1,377 @@
+"""
+sheet_index.py
+Columnar index over the sheets of an extract (health_extract.json,
+excel_extract_livestocks.json).
+
+Each sheet's rows are walked exactly once: Year is parsed into an int column,
+District and Taluka are dictionary-encoded into int codes and every other
+numeric column becomes a float column (NaN for blanks / unparseable cells).
+Text columns are dictionary-encoded too; columns the sheet's schema
+(schema.py) marks dead are dropped.  Cells that are filled in but don't
+parse (a "NA" Year, "12,5" in a float column) are counted per column, with
+a few examples, in `bad_cells` for the validation pass (validate.py).
+Aggregations then group over these NumPy columns (see groupby.py) instead of
+re-scanning row dicts.
+
+Sheets are read from their full `rows` list when the extract carries one
+(every district), falling back to the `ahilyanagar_data` slice.  A source
+workbook (.xlsx) can stand in for the extract: its worksheets are streamed
+through xlsx_reader.py instead.  Built
+columns are kept in an on-disk binary cache (extract_cache.py) that later
+runs memory-map instead of parsing the JSON again.
+"""
+import json, itertools
+import numpy as np
+
+import instrument
+from extract_cache import ExtractCache
+from extract_reader import ExtractReader
+from xlsx_reader import XlsxReader, is_workbook
+from schema import KEY_COLUMNS, ColumnStats, SchemaRegistry, SheetSchema, infer_schema
+
+NA_YEAR = -1   # Year missing or unparseable
+NA_CODE = -1   # District / Taluka missing
+NAN = float("nan")
+BAD_EXAMPLES = 5  # unparseable cells kept per column (all are counted)
+
+ROWS_KEYS = ("rows", "ahilyanagar_data")
+
+
+def load_extract(path):
+    """Read an extract JSON file into the raw {sheet: {...}} dict."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_year(v):
+    """Year cell -> int, NA_YEAR when missing or unparseable."""
+    if v is None:
+        return NA_YEAR
+    try:
+        return int(float(v))
+    except (TypeError, ValueError, OverflowError):
+        return NA_YEAR
+
+
+def to_float(v):
+    """Value cell -> float, NaN when missing or unparseable."""
+    if v is None:
+        return NAN
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def _encoder():
+    """(codes, labels, encode) for dictionary-encoding one text column."""
+    codes, labels, code_of = [], [], {}
+
+    def encode(v):
+        if v is None or v == "":
+            codes.append(NA_CODE)
+            return
+        code = code_of.get(v)
+        if code is None:
+            code = code_of[v] = len(labels)
+            labels.append(v)
+        codes.append(code)
+    return codes, labels, encode
+
+
+def _bad_cells():
+    """({ column: [count, [[row, cell], …]] }, add) for unparseable cells."""
+    cells = {}
+
+    def add(col, row, v):
+        entry = cells.get(col)
+        if entry is None:
+            entry = cells[col] = [0, []]
+        entry[0] += 1
+        if len(entry[1]) < BAD_EXAMPLES:
+            entry[1].append([row, str(v)])
+    return cells, add
+
+
+class SheetIndex:
+    """Typed columns for one sheet, built in a single pass over its rows."""
+
+    __slots__ = ("name", "n_rows", "year", "district", "district_labels",
+                 "taluka", "taluka_labels", "columns", "categories", "schema", "bad_cells",
+                 "_resolved")
+
+    def __init__(self, name, rows, headers=None, schema=None):
+        """`rows` may be a list or any iterable of row dicts (e.g. streamed).
+
+        With a known `schema` only its live columns are read; otherwise the
+        schema is inferred in the same pass and dead columns dropped.  Text
+        columns are dictionary-encoded into `categories` like District/Taluka.
+        """
+        self.name = name
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is not None:
+            rows = itertools.chain((first,), rows)
+        if schema is not None:
+            headers = schema.headers
+        elif not headers:
+            headers = list(first) if first is not None else []
+        if schema is not None:
+            value_cols = schema.value_columns
+            text_cols = schema.text_columns
+            present = None
+        else:
+            value_cols = [h for h in headers if h not in KEY_COLUMNS]
+            text_cols = []
+            present = {c: 0 for c in value_cols}
+            texts = {c: [] for c in value_cols}  # (row, cell) of non-numeric cells
+
+        year = []
+        district, district_labels, encode_district = _encoder()
+        taluka, taluka_labels, encode_taluka = _encoder()
+        columns = {c: [] for c in value_cols}
+        appenders = [(c, columns[c].append) for c in value_cols]
+        encoders = [(c, _encoder()) for c in text_cols]
+        bad_cells, bad = _bad_cells()
+
+        for r in rows:
+            v = r.get("Year")
+            y = parse_year(v)
+            if y == NA_YEAR and v is not None and v != "":
+                bad("Year", len(year), v)
+            year.append(y)
+            encode_district(r.get("District"))
+            encode_taluka(r.get("Taluka"))
+            if present is None:
+                for c, add in appenders:
+                    v = r.get(c)
+                    f = to_float(v)
+                    add(f)
+                    if f != f and v is not None and v != "":
+                        bad(c, len(year) - 1, v)
+                for c, (_, _, encode) in encoders:
+                    encode(r.get(c))
+                continue
+            for c, add in appenders:
+                v = r.get(c)
+                if v is None or v == "":
+                    add(NAN)
+                    continue
+                present[c] += 1
+                f = to_float(v)
+                add(f)
+                if f != f:
+                    texts[c].append((len(year) - 1, v))
+
+        self.n_rows = len(year)
+        self.year = np.array(year, dtype=np.int64)
+        self.district = np.array(district, dtype=np.int64)
+        self.district_labels = district_labels
+        self.taluka = np.array(taluka, dtype=np.int64)
+        self.taluka_labels = taluka_labels
+        self.columns = {c: np.array(v, dtype=np.float64) for c, v in columns.items()}
+        self.categories = {c: (np.array(codes, dtype=np.int64), labels)
+                           for c, (codes, labels, _) in encoders}
+        if schema is None:
+            stats = {}
+            for c in value_cols:
+                st = stats[c] = ColumnStats()
+                st.present = present[c]
+                st.numeric = int(np.count_nonzero(~np.isnan(self.columns[c])))
+            schema = infer_schema(name, headers, stats)
+            for c in schema.text_columns:
+                codes, labels, encode = _encoder()
+                cells = iter(texts[c])
+                cell = next(cells, None)
+                for i in range(self.n_rows):
+                    if cell is not None and cell[0] == i:
+                        encode(cell[1])
+                        cell = next(cells, None)
+                    else:
+                        encode(None)
+                self.categories[c] = (np.array(codes, dtype=np.int64), labels)
+            live = set(schema.value_columns)
+            self.columns = {c: v for c, v in self.columns.items() if c in live}
+            # Text cells of columns that turned out numeric didn't parse
+            for c in schema.value_columns:
+                for i, v in texts[c]:
+                    bad(c, i, v)
+        self.schema = schema
+        self.bad_cells = bad_cells
+        self._resolved = {}
+
+    @classmethod
+    def from_arrays(cls, name, year, district, district_labels, taluka, taluka_labels,
+                    columns, schema, categories=None, bad_cells=None):
+        """SheetIndex over already-built columns (e.g. memory-mapped from the cache)."""
+        self = cls.__new__(cls)
+        self.name = name
+        self.n_rows = len(year)
+        self.year = year
+        self.district = district
+        self.district_labels = district_labels
+        self.taluka = taluka
+        self.taluka_labels = taluka_labels
+        self.columns = columns
+        self.categories = categories or {}
+        self.schema = schema
+        self.bad_cells = bad_cells or {}
+        self._resolved = {}
+        return self
+
+    def pivot(self, category, value, name=None):
+        """Long → wide: one row per (Year, District, Taluka) and one float
+        column per label of text column `category`, holding that label's
+        `value` (NaN where the key has no such row; the last row wins).
+
+        ("Items", "Units") over Ghee / Lassi / … rows gives Ghee, Lassi, …
+        columns that aggregate like any other sheet's.
+        """
+        codes, labels = self.categories.get(category, (np.full(self.n_rows, NA_CODE), []))
+        col = self.columns.get(value)
+        if col is None:
+            col = np.full(self.n_rows, NAN)
+        keys = np.stack([self.year, self.district, self.taluka], axis=1)
+        uniq, first, inv = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        order = np.argsort(first)  # keep the sheet's row order
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        row = rank[inv.ravel()]
+        columns = {}
+        for i, label in enumerate(labels):
+            hit = (codes == i) & ~np.isnan(col)
+            out = columns[label] = np.full(len(order), NAN)
+            out[row[hit]] = col[hit]
+        uniq = uniq[order]
+        name = name or f"{self.name}[{category}]"
+        keys = [h for h in self.schema.headers if h in KEY_COLUMNS]
+        schema = SheetSchema(name, keys + list(labels), {l: "float" for l in labels},
+                             self.schema.kind)
+        return SheetIndex.from_arrays(name, uniq[:, 0].copy(), uniq[:, 1].copy(),
+                                      self.district_labels, uniq[:, 2].copy(),
+                                      self.taluka_labels, columns, schema)
+
+    def values(self, col):
+        """Float column by header name, or None if the sheet lacks it."""
+        return self.columns.get(col)
+
+    def matrix(self, cols):
+        """(rows, len(cols)) float matrix; columns the sheet lacks are all-NaN."""
+        out = np.full((self.n_rows, len(cols)), np.nan)
+        for j, c in enumerate(cols):
+            v = self.columns.get(c)
+            if v is not None:
+                out[:, j] = v
+        return out
+
+    def resolve_talukas(self, resolve):
+        """Map every distinct Taluka label through `resolve` (once per label).
+
+        Returns a list indexed by taluka code; unresolved labels map to None.
+        """
+        names = self._resolved.get(resolve)
+        if names is None:
+            names = self._resolved[resolve] = [resolve(t) for t in self.taluka_labels]
+        return names
+
+    def taluka_codes(self, resolve, names):
+        """Per-row position of the resolved taluka in `names` (-1 = unresolved)."""
+        pos = {n: i for i, n in enumerate(names)}
+        lookup = [pos.get(t, NA_CODE) for t in self.resolve_talukas(resolve)]
+        lookup.append(NA_CODE)  # rows with no Taluka carry NA_CODE == -1
+        return np.array(lookup, dtype=np.int64)[self.taluka]
+
+
+class ExtractIndex:
+    """Lazily built SheetIndex per sheet of an extract.
+
+    Built either from a raw extract dict or, via ExtractIndex.open(path), from
+    the file itself: sheets are then streamed one row at a time and only the
+    sheets actually requested are ever decoded.  With a cache, sheets already
+    in it are memory-mapped and the JSON is not read at all.
+    """
+
+    def __init__(self, raw=None, reader=None, cache=None):
+        self.raw = raw
+        self.reader = reader
+        self.cache = cache
+        self.schemas = SchemaRegistry()
+        self.pivots = {}  # alias → (sheet, category column, value column)
+        self._sheets = {}
+
+    @classmethod
+    def open(cls, path, cache=True):
+        """Index over an extract JSON or, for .xlsx paths, the source workbook."""
+        reader = XlsxReader(path) if is_workbook(path) else ExtractReader(path)
+        return cls(reader=reader, cache=ExtractCache(reader) if cache else None)
+
+    def sheet_names(self):
+        if self.raw is not None:
+            return list(self.raw)
+        if self.cache is not None:
+            return self.cache.sheet_names()
+        return self.reader.sheet_names()
+
+    def add_pivot(self, alias, sheet, category, value):
+        """Expose long-format `sheet` as wide sheet `alias` (see SheetIndex.pivot)."""
+        self.pivots[alias] = (sheet, category, value)
+
+    def forget(self, names, reader=None):
+        """Drop the built sheets `names` and the pivots of them, schemas
+        included, so the next access reads them again.  With `reader` (a new
+        version of the extract) every later read goes through it: the binary
+        cache no longer matches the file.  Returns the names dropped."""
+        names = set(names)
+        names |= {alias for alias, (sheet, _, _) in self.pivots.items() if sheet in names}
+        for name in names:
+            self._sheets.pop(name, None)
+            self.schemas.schemas.pop(name, None)
+        if reader is not None:
+            self.reader, self.cache = reader, None
+        return names
+
+    def sheet(self, name):
+        idx = self._sheets.get(name)
+        if idx is None:
+            with instrument.stage("load", sheet=name) as s:
+                pivot = self.pivots.get(name)
+                if pivot is not None:
+                    sheet, category, value = pivot
+                    idx = self._sheets[name] = self.sheet(sheet).pivot(category, value, name)
+                    source = "pivot"
+                else:
+                    idx, source = self._build(name)
+                    self._sheets[name] = idx
+                    self.schemas.register(idx.schema)
+                if s is not None:
+                    s.update(source=source, rows_out=idx.n_rows, columns=len(idx.columns))
+        return idx
+
+    def _build(self, name):
+        """(SheetIndex, where it came from: "raw", "cache" or "json")."""
+        if self.raw is not None:
+            sheet = self.raw.get(name, {})
+            rows = next((sheet[k] for k in ROWS_KEYS if sheet.get(k)), [])
+            return SheetIndex(name, rows, sheet.get("headers"), self.schemas.get(name)), "raw"
+        if self.cache is None:
+            return self._read(name), "json"
+        cached = self.cache.load_sheet(name)
+        if cached is not None:
+            return SheetIndex.from_arrays(name, **cached), "cache"
+        idx = self._read(name)
+        self.cache.store_sheet(idx)
+        return idx, "json"
+
+    def _read(self, name):
+        """Stream one sheet from the extract file."""
+        if name not in self.reader.offsets():
+            return SheetIndex(name, [])
+        meta = self.reader.sheet_meta(name)
+        present = [k for k in ROWS_KEYS if k in meta]
+        # A full `rows` list wins; an empty one falls back to ahilyanagar_data
+        for key in present:
+            idx = SheetIndex(name, self.reader.iter_rows(name, key), meta.get("headers"),
+                             self.schemas.get(name))
+            if idx.n_rows or key == present[-1]:
+                return idx
+        return SheetIndex(name, [], meta.get("headers"))
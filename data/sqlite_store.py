@@ -0,0 +1,387 @@
+"""
+sqlite_store.py
+Optional SQLite backend: the extracts' sheets in one local database, which
+the pipelines read their aggregates from (--db FILE) and analysts can query
+directly.
+
+Schema (one database for both extracts):
+
+  districts(id, key, slug, name)     every District spelling, aliases folded
+                                     (talukas.district_key); slug / name set
+                                     for districts.json districts
+  talukas(id, district_id, name)     dashboard names for districts.json
+                                     districts, the sheet's label otherwise
+  spellings(kind, label, district_id, taluka_id)
+                                     raw District / Taluka cells → ids (NULL
+                                     taluka_id: the label didn't resolve)
+  sheets(name, pipeline, kind, columns, text_columns, rows)
+                                     catalogue of the sheet tables
+  "<sheet>"(row, district_id, taluka_id, year, <value columns> REAL,
+            <text columns> TEXT)     one table per sheet, typed columns,
+                                     NULL for blanks; row = position in the sheet
+  meta(key, value)                   what each pipeline's tables were built from
+
+Each sheet table has two covering indexes, (district_id, taluka_id, year,
+row, values…) and (district_id, year, row, taluka_id, values…), so taluka-
+and district-level GROUP BYs read only an index, in sheet row order (sums
+come out exactly as groupby.py's).  SqliteSource plugs into
+DistrictStore.use_cube(): each (sheet, reduction) the builders ask for is
+one GROUP BY over every district, and DistrictView's get_dsa_data /
+get_dsa_data_avg / get_hmis_data slice it as usual.
+
+    SELECT d.name, t.name, s.year, SUM(s."BCG")
+    FROM "DSA_Vaccines" s JOIN districts d ON d.id = s.district_id
+                          JOIN talukas t ON t.id = s.taluka_id
+    GROUP BY 1, 2, 3
+
+Run: python sqlite_store.py [--db FILE] [--health-input FILE] [--livestock-input FILE]
+                            [--sql QUERY] [--no-cache]
+     (from project/data/ directory, needs numpy; sqlite3 is in the standard library)
+"""
+import json, os, sqlite3, sys, argparse
+import numpy as np
+
+from build_state import file_digest
+from cube import source_of
+from district_store import SheetAggregate
+from derived import extend
+from groupby import Grouped, collapse_keys
+from talukas import district_key
+
+DB_FILE = "dashboards.sqlite"
+DB_VERSION = 1
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Code the table contents depend on
+RECIPE_FILES = [os.path.join(HERE, f) for f in
+                ("sqlite_store.py", "sheet_index.py", "schema.py", "talukas.py")]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS districts (id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL,
+                                      slug TEXT, name TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS talukas (id INTEGER PRIMARY KEY,
+                                    district_id INTEGER NOT NULL REFERENCES districts(id),
+                                    name TEXT NOT NULL, UNIQUE (district_id, name));
+CREATE TABLE IF NOT EXISTS spellings (kind TEXT NOT NULL, label TEXT NOT NULL,
+                                      district_id INTEGER REFERENCES districts(id),
+                                      taluka_id INTEGER REFERENCES talukas(id),
+                                      UNIQUE (kind, district_id, label));
+CREATE TABLE IF NOT EXISTS sheets (name TEXT PRIMARY KEY, pipeline TEXT NOT NULL, kind TEXT,
+                                   columns TEXT NOT NULL, text_columns TEXT NOT NULL,
+                                   rows INTEGER NOT NULL);
+"""
+
+
+def q(name):
+    """Quoted SQL identifier."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _column(values):
+    """Float array → list with None for NaN."""
+    out = values.astype(object)
+    out[np.isnan(values)] = None
+    return out.tolist()
+
+
+def _ids(ids):
+    """Int id array → list with None for -1."""
+    out = ids.astype(object)
+    out[ids < 0] = None
+    return out.tolist()
+
+
+class Dimensions:
+    """District / taluka ids of a database, assigned on first sight."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.district = {k: i for i, k in conn.execute("SELECT id, key FROM districts")}
+        self.taluka = {(d, n): i for i, d, n in conn.execute("SELECT id, district_id, name FROM talukas")}
+
+    def district_id(self, key, name, slug=None):
+        i = self.district.get(key)
+        if i is None:
+            i = self.district[key] = self.conn.execute(
+                "INSERT INTO districts (key, slug, name) VALUES (?, ?, ?)", (key, slug, name)).lastrowid
+        elif slug is not None:
+            self.conn.execute("UPDATE districts SET slug = ?, name = ? WHERE id = ? AND slug IS NULL",
+                              (slug, name, i))
+        return i
+
+    def taluka_id(self, district_id, name):
+        i = self.taluka.get((district_id, name))
+        if i is None:
+            i = self.taluka[(district_id, name)] = self.conn.execute(
+                "INSERT INTO talukas (district_id, name) VALUES (?, ?)", (district_id, name)).lastrowid
+        return i
+
+    def store_ids(self, store):
+        """(district id per store district, taluka id per store taluka key)."""
+        dids, tids = [], []
+        for district, names in zip(store.districts, store.talukas):
+            d = self.district_id(district["slug"], district["name"], district["slug"])
+            dids.append(d)
+            tids += [self.taluka_id(d, n) for n in names]
+        return dids, tids
+
+    def row_ids(self, store, sheet, idx, store_tids):
+        """Per-row (district id, taluka id), -1 where missing / unresolved.
+
+        Rows of districts.json districts take the store's own resolution
+        (DistrictStore.row_keys); other districts key talukas by label."""
+        labels = idx.district_labels
+        keys = [district_key(l) for l in labels]
+        dmap = [-1 if k is None else self.district_id(k, str(l).strip()) for k, l in zip(keys, labels)]
+        did = np.array(dmap + [-1], dtype=np.int64)[idx.district]
+        dpos, tkey = store.row_keys(sheet)
+        tid = np.where(tkey >= 0, np.append(np.array(store_tids, dtype=np.int64), -1)[tkey], -1)
+
+        width = len(idx.taluka_labels) + 1
+        pair = np.where((did >= 0) & (idx.taluka >= 0), did * width + idx.taluka, -1)
+        uniq, first, inv = np.unique(pair, return_index=True, return_inverse=True)
+        other = np.full(len(uniq), -1, dtype=np.int64)
+        for j, p in enumerate(uniq.tolist()):
+            if p < 0:
+                continue
+            d, t = divmod(p, width)
+            label = idx.taluka_labels[t]
+            row = first[j]
+            if dpos[row] >= 0:
+                known = int(tid[row])
+                self.spelling("taluka", label, d, None if known < 0 else known)
+            else:
+                other[j] = self.taluka_id(d, str(label).strip())
+                self.spelling("taluka", label, d, int(other[j]))
+        for l, d in zip(labels, dmap):
+            if d >= 0:
+                self.spelling("district", l, d, None)
+        tid = np.where(dpos >= 0, tid, other[inv.ravel()])
+        return did, tid
+
+    def spelling(self, kind, label, district_id, taluka_id):
+        self.conn.execute("INSERT OR IGNORE INTO spellings VALUES (?, ?, ?, ?)",
+                          (kind, str(label), district_id, taluka_id))
+
+
+class SqliteStore:
+    """The database file: loading a pipeline's sheets and checking freshness."""
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def identity(self, store):
+        """What a pipeline's tables are built from: extract, districts, code."""
+        return {"version": DB_VERSION, "source": source_of(store),
+                "districts": [[d["slug"], list(t)] for d, t in zip(store.districts, store.talukas)],
+                "recipe": file_digest(*RECIPE_FILES)}
+
+    def matches(self, pipeline, store):
+        ident = self.identity(store)
+        return ident["source"] is not None and self._meta(f"{pipeline.name}.built") == ident
+
+    def load(self, pipeline, store):
+        """(Re)load every sheet of the pipeline's extract; returns rows written."""
+        conn = self.conn
+        with conn:
+            for (name,) in conn.execute("SELECT name FROM sheets WHERE pipeline = ?",
+                                        (pipeline.name,)).fetchall():
+                conn.execute(f"DROP TABLE IF EXISTS {q(name)}")
+            conn.execute("DELETE FROM sheets WHERE pipeline = ?", (pipeline.name,))
+            dims = Dimensions(conn)
+            _, store_tids = dims.store_ids(store)
+            total = 0
+            for name in store.index.sheet_names() + list(pipeline.pivots):
+                total += self._load_sheet(dims, pipeline, store, name, store_tids)
+            conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                         (f"{pipeline.name}.built", json.dumps(self.identity(store))))
+        return total
+
+    def _load_sheet(self, dims, pipeline, store, name, store_tids):
+        conn = self.conn
+        if conn.execute("SELECT pipeline FROM sheets WHERE name = ?", (name,)).fetchone():
+            raise SystemExit(f"Sheet {name!r} of {pipeline.name} is already in {self.path} "
+                             f"for another pipeline")
+        idx = store.index.sheet(name)
+        cols = list(idx.columns)
+        texts = list(idx.categories)
+        did, tid = dims.row_ids(store, name, idx, store_tids)
+        table = q(name)
+        defs = [f"{q(c)} REAL" for c in cols] + [f"{q(c)} TEXT" for c in texts]
+        conn.execute(f"CREATE TABLE {table} (row INTEGER PRIMARY KEY, "
+                     f"district_id INTEGER REFERENCES districts(id), "
+                     f"taluka_id INTEGER REFERENCES talukas(id), year INTEGER"
+                     + "".join(", " + d for d in defs) + ")")
+        data = [list(range(idx.n_rows)), _ids(did), _ids(tid), _ids(idx.year)]
+        data += [_column(np.asarray(idx.columns[c])) for c in cols]
+        for c in texts:
+            codes, labels = idx.categories[c]
+            data.append([labels[k] if k >= 0 else None for k in codes.tolist()])
+        marks = ", ".join("?" * len(data))
+        conn.executemany(f"INSERT INTO {table} VALUES ({marks})", zip(*data))
+        values = "".join(", " + q(c) for c in cols)
+        conn.execute(f"CREATE INDEX {q(name + '__dty')} ON {table} "
+                     f"(district_id, taluka_id, year, row{values})")
+        conn.execute(f"CREATE INDEX {q(name + '__dy')} ON {table} "
+                     f"(district_id, year, row, taluka_id{values})")
+        conn.execute("INSERT INTO sheets VALUES (?, ?, ?, ?, ?, ?)",
+                     (name, pipeline.name, idx.schema.kind, json.dumps(cols), json.dumps(texts),
+                      idx.n_rows))
+        return idx.n_rows
+
+    def query(self, sql, params=()):
+        """(column names, rows) of an ad-hoc query."""
+        cur = self.conn.execute(sql, params)
+        return [d[0] for d in cur.description or ()], cur.fetchall()
+
+
+class SqliteSource:
+    """DistrictStore aggregates answered by GROUP BY queries on the database
+    (the store.use_cube() slot).  Results are kept, so forked build workers
+    never touch the connection."""
+
+    def __init__(self, db_path, store):
+        self.db_path = db_path
+        self.store = store
+        self._conn = None
+        self._pid = None
+        self._aggs = {}
+        # database ids → store district positions / global taluka keys
+        pos = {s: d for d, s in enumerate(store.slugs)}
+        self.district_pos, self.taluka_key = {}, {}
+        for i, slug in self.conn().execute("SELECT id, slug FROM districts WHERE slug IS NOT NULL"):
+            if slug in pos:
+                self.district_pos[i] = pos[slug]
+        for i, d, name in self.conn().execute("SELECT id, district_id, name FROM talukas"):
+            d = self.district_pos.get(d)
+            k = None if d is None else store.key_of[d].get(name)
+            if k is not None:
+                self.taluka_key[i] = k
+
+    def conn(self):
+        """Connection of this process (reopened after a fork)."""
+        if self._pid != os.getpid():
+            self._conn, self._pid = sqlite3.connect(self.db_path), os.getpid()
+        return self._conn
+
+    def aggregate(self, sheet, how="sum"):
+        """SheetAggregate of (sheet, how), or None if the sheet isn't loaded."""
+        key = (sheet, how)
+        if key not in self._aggs:
+            self._aggs[key] = self._aggregate(sheet, how)
+        return self._aggs[key]
+
+    def _aggregate(self, sheet, how):
+        if how not in ("sum", "mean", "last"):
+            return None
+        conn = self.conn()
+        row = conn.execute("SELECT columns FROM sheets WHERE name = ?", (sheet,)).fetchone()
+        if row is None:
+            return None
+        cols = json.loads(row[0])
+        store, table = self.store, q(sheet)
+        n_d, n_c = len(store.slugs), len(cols)
+        known = ", ".join(str(i) for i in self.district_pos) or "NULL"
+
+        if how == "last":
+            years = np.array([y for (y,) in conn.execute(
+                f"SELECT DISTINCT year FROM {table} WHERE year IS NOT NULL ORDER BY year")], dtype=np.int64)
+            ypos = {int(y): i for i, y in enumerate(years)}
+            dv = np.zeros((n_d, len(years), n_c))
+            dc = np.zeros((n_d, len(years)), dtype=np.int64)
+            # SQLite takes bare columns from the row holding MAX(row): the last one
+            values = "".join(f", {q(c)}" for c in cols)
+            for r in conn.execute(f"SELECT district_id, year, COUNT(*), MAX(row){values} "
+                                  f"FROM {table} INDEXED BY {q(sheet + '__dy')} "
+                                  f"WHERE district_id IN ({known}) AND year IS NOT NULL "
+                                  f"GROUP BY district_id, year"):
+                d, y = self.district_pos[r[0]], ypos[r[1]]
+                dc[d, y] = r[2]
+                dv[d, y] = [0.0 if v is None else v for v in r[4:]]
+            agg = SheetAggregate(cols, years, None, None, dv, dc)
+        else:
+            lo, hi = store.years
+            years = np.array([y for (y,) in conn.execute(
+                f"SELECT DISTINCT year FROM {table} WHERE year BETWEEN ? AND ? ORDER BY year",
+                (lo, hi))], dtype=np.int64)
+            ypos = {int(y): i for i, y in enumerate(years)}
+            fn = "TOTAL" if how == "sum" else "AVG"
+            values = "".join(f", {fn}({q(c)})" for c in cols)
+            where = (f"WHERE district_id IN ({known}) AND taluka_id IS NOT NULL "
+                     f"AND year BETWEEN {int(lo)} AND {int(hi)}")
+            tv = np.zeros((store.n_keys, len(years), n_c))
+            tc = np.zeros((store.n_keys, len(years)), dtype=np.int64)
+            for r in conn.execute(f"SELECT taluka_id, year, COUNT(*){values} "
+                                  f"FROM {table} INDEXED BY {q(sheet + '__dty')} {where} "
+                                  f"GROUP BY district_id, taluka_id, year"):
+                k = self.taluka_key.get(r[0])
+                if k is None:
+                    continue
+                tc[k, ypos[r[1]]] = r[2]
+                tv[k, ypos[r[1]]] = [0.0 if v is None else v for v in r[3:]]
+            dv = np.zeros((n_d, len(years), n_c))
+            dc = np.zeros((n_d, len(years)), dtype=np.int64)
+            if how == "sum":
+                for r in conn.execute(f"SELECT district_id, year, COUNT(*){values} "
+                                      f"FROM {table} INDEXED BY {q(sheet + '__dy')} {where} "
+                                      f"GROUP BY district_id, year"):
+                    d, y = self.district_pos[r[0]], ypos[r[1]]
+                    dc[d, y] = r[2]
+                    dv[d, y] = r[3:]
+            else:
+                # District value = mean of the positive taluka values
+                for d in range(n_d):
+                    sl = store._slice(d)
+                    dv[d] = collapse_keys(Grouped(tv[sl], tc[sl], None, years, cols),
+                                          "mean", positive_only=True)
+                    dc[d] = tc[sl].sum(axis=0)
+            agg = SheetAggregate(cols, years, tv, tc, dv, dc)
+        metrics = store.derived.get(sheet)
+        if metrics:
+            agg.taluka_values = extend(agg.taluka_values, cols, metrics)
+            agg.district_values = extend(agg.district_values, cols, metrics)
+            agg.columns = cols + [m.name for m in metrics]
+        return agg
+
+
+def main(argv=None):
+    from aggregate_health import HEALTH
+    from aggregate_livestock import LIVESTOCK_PIPELINE
+    pipelines = {"health": HEALTH, "livestock": LIVESTOCK_PIPELINE}
+    parser = argparse.ArgumentParser(description="Load the extracts into the SQLite store and query it.")
+    parser.add_argument("--db", default=DB_FILE, help=f"database file (default: {DB_FILE})")
+    for prefix, p in pipelines.items():
+        parser.add_argument(f"--{prefix}-input", default=p.input, help=f"{p.name} extract (default: {p.input})")
+    parser.add_argument("--sql", metavar="QUERY", help="run an ad-hoc query and print the rows")
+    parser.add_argument("--no-cache", action="store_true", help="don't use the binary extract cache")
+    args = parser.parse_args(argv)
+
+    db = SqliteStore(args.db)
+    for prefix, p in pipelines.items():
+        store = p.load_store(getattr(args, f"{prefix}_input"), cache=not args.no_cache)
+        if db.matches(p, store):
+            print(f"{args.db}: {p.name} tables are up to date")
+        else:
+            print(f"{args.db}: loaded {db.load(p, store):,} {p.name} rows")
+    if args.sql:
+        try:
+            names, rows = db.query(args.sql)
+        except sqlite3.Error as e:
+            parser.error(f"query failed: {e}")
+        print("\t".join(names))
+        for r in rows:
+            print("\t".join("" if v is None else str(v) for v in r))
+    db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""
+state_stats.py
+State-wide averages, medians, percentiles and ranks of each dashboard's
+headline metric, computed from the full (every-district) sheets.
+
+Each pipeline lists its metrics as StateMetric entries keyed by output stem
+(aggregate_health.STATE_METRICS, aggregate_livestock.STATE_METRICS).  A
+metric is an expression (derived.py grammar) over a sheet's aggregated
+columns, evaluated per taluka-year and rolled up per district-year:
+
+  sum    district value = sum of its talukas (summed over parts / sheets)
+  mean   taluka = mean of its rows, district = mean of its positive talukas
+  ratio  100 × Σ parts / Σ denominator, per taluka and per district
+
+Unlike DistrictStore, which keys only the districts in districts.json, every
+District label in the sheet becomes a district here (aliases folded, see
+talukas.district_key) and every Taluka label a taluka; districts.json
+talukas still resolve to their dashboard names.  All talukas of all
+districts are aggregated in one group-by per sheet.  Per year, the state
+mean, percentiles (np.nanpercentile, partition-based) and each district's
+and taluka's rank / percentile rank are vectorized over the
+(entity, year) matrix.
+
+Outputs:
+  state-averages.json   same shape as before — { stem: {label, yAxisId,
+                        data: [{year, stateAvg}]} } — each point also
+                        carrying median, p25, p75 and the district count
+  state-rankings.json   { stem: {label, years, percentiles, districts,
+                        talukas} }, one row per district / taluka with its
+                        value, rank and percentile per year
+
+Years with data for fewer than `min_districts` districts are left out; if
+none remain (e.g. an extract carrying only ahilyanagar_data) the existing
+state-averages.json entry is kept as it is.
+
+Run: python state_stats.py [--health-input FILE] [--livestock-input FILE]
+                           [--out-dir DIR] [--min-districts N] [--no-cache]
+     (from project/data/ directory, needs numpy; build_dashboards.py runs it too)
+"""
+import json, os, argparse
+import numpy as np
+
+from derived import DerivedMetric, extend
+from groupby import aggregate
+from talukas import district_key
+
+AVERAGES_FILE = "state-averages.json"
+RANKINGS_FILE = "state-rankings.json"
+PERCENTILES = (10, 25, 50, 75, 90)
+MIN_DISTRICTS = 3
+
+
+class StateMetric:
+    """One state-averages.json entry: `parts` [(sheet, expression)] rolled up
+    per district by `kind` (sum / mean / ratio over `denominator` parts)."""
+
+    def __init__(self, label, parts, y_axis=None, kind="sum", denominator=(), digits=0):
+        self.label = label
+        self.parts = list(parts)
+        self.y_axis = y_axis
+        self.kind = kind
+        self.denominator = list(denominator)
+        self.digits = digits
+
+
+class StateKeys:
+    """District and taluka ids over every District / Taluka label of a
+    store's sheets, shared across sheets so metric parts line up."""
+
+    def __init__(self, store):
+        self.store = store
+        self.slugs = []       # district key (slug for districts.json districts)
+        self.names = []       # district display name
+        self.talukas = []     # taluka name
+        self.taluka_district = []
+        self._district = {}
+        self._taluka = {}
+        self._known = {d["slug"]: d["name"] for d in store.districts}
+
+    def _district_id(self, label):
+        key = district_key(label)
+        if key is None:
+            return -1
+        d = self._district.get(key)
+        if d is None:
+            d = self._district[key] = len(self.slugs)
+            self.slugs.append(key.replace(" ", "-"))
+            self.names.append(self._known.get(key, str(label).strip()))
+        return d
+
+    def _taluka_id(self, d, label):
+        slug = self.slugs[d]
+        if slug in self._known:
+            name = self.store.resolver.resolve(label, slug)
+            if name is None:
+                return -1
+        else:
+            name = str(label).strip()
+        t = self._taluka.get((d, name))
+        if t is None:
+            t = self._taluka[(d, name)] = len(self.talukas)
+            self.talukas.append(name)
+            self.taluka_district.append(d)
+        return t
+
+    def row_taluka(self, idx):
+        """Per-row taluka id (-1 where the district or taluka is unknown);
+        each distinct (District, Taluka) label pair is looked up once."""
+        dmap = np.array([self._district_id(l) for l in idx.district_labels] + [-1], dtype=np.int64)
+        dpos = dmap[idx.district]
+        width = len(idx.taluka_labels) + 1
+        pair = np.where((dpos >= 0) & (idx.taluka >= 0), dpos * width + idx.taluka, -1)
+        uniq, inv = np.unique(pair, return_inverse=True)
+        tids = np.array([-1 if p < 0 else self._taluka_id(p // width, idx.taluka_labels[p % width])
+                         for p in uniq.tolist()], dtype=np.int64)
+        return tids[inv.ravel()]
+
+
+def _taluka_metric(store, sheet, expr, how, years, n_talukas, rows):
+    """(values, present) [taluka, year] of one expression over a sheet."""
+    idx = store.index.sheet(sheet)
+    cols = list(idx.columns)
+    ok = (idx.year >= years[0]) & (idx.year <= years[-1])
+    ypos = np.where(ok, idx.year - years[0], -1)
+    tv, tc = aggregate(idx.matrix(cols), ypos, len(years), rows[sheet], n_talukas, how)
+    metrics = store.derived.get(sheet, [])
+    tv = extend(tv, cols, metrics, idx.schema.headers)
+    return DerivedMetric("value", expr).evaluate(tv, cols + [m.name for m in metrics],
+                                                 idx.schema.headers), tc > 0
+
+
+def metric_values(store, keys, metric, years):
+    """(district[d, year], taluka[t, year]) values, NaN where missing."""
+    how = "mean" if metric.kind == "mean" else "sum"
+    sheets = {s for s, _ in metric.parts + metric.denominator}
+    rows = {s: keys.row_taluka(store.index.sheet(s)) for s in sorted(sheets)}
+    n_t, n_d = len(keys.talukas), len(keys.slugs)
+    t2d = np.array(keys.taluka_district, dtype=np.int64)
+
+    def total(parts):
+        value, present = np.zeros((n_t, len(years))), np.zeros((n_t, len(years)), dtype=bool)
+        for sheet, expr in parts:
+            v, p = _taluka_metric(store, sheet, expr, how, years, n_t, rows)
+            value += np.where(p, v, 0.0)
+            present |= p
+        return value, present
+
+    def by_district(v):
+        out = np.zeros((n_d, len(years)))
+        np.add.at(out, t2d, v)
+        return out
+
+    num, present = total(metric.parts)
+    if metric.kind == "ratio":
+        den, _ = total(metric.denominator)
+        taluka = np.divide(100 * num, den, out=np.full(num.shape, np.nan), where=present & (den > 0))
+        dnum, dden = by_district(np.where(present, num, 0)), by_district(np.where(present, den, 0))
+        district = np.divide(100 * dnum, dden, out=np.full(dnum.shape, np.nan), where=dden > 0)
+        return district, taluka
+    taluka = np.where(present, num, np.nan)
+    if metric.kind == "mean":
+        pos = present & (num > 0)
+        s, n = by_district(np.where(pos, num, 0)), by_district(pos.astype(np.float64))
+        return np.divide(s, n, out=np.full(s.shape, np.nan), where=n > 0), taluka
+    n = by_district(present.astype(np.float64))
+    return np.where(n > 0, by_district(np.where(present, num, 0)), np.nan), taluka
+
+
+def ranks(values):
+    """(rank, percentile) of each entity per year: rank 1 = largest (ties
+    share the best rank), percentile = % of entities at or below; 0 / NaN
+    where the entity has no value."""
+    valid = ~np.isnan(values)
+    n = valid.sum(axis=0)
+    # NaN → -inf sorts first; one column sort per year, no per-entity work
+    filled = np.where(valid, values, -np.inf)
+    ordered = np.sort(filled, axis=0)
+    le = np.empty(values.shape, dtype=np.int64)
+    for y in range(values.shape[1]):
+        le[:, y] = np.searchsorted(ordered[:, y], filled[:, y], side="right")
+    missing = values.shape[0] - n
+    rank = np.where(valid, values.shape[0] - le + 1, 0)
+    pct = np.divide(100.0 * (le - missing), n, out=np.full(values.shape, np.nan),
+                    where=valid & (n > 0))
+    return rank, pct
+
+
+def state_stats(store, metric, min_districts=MIN_DISTRICTS):
+    """Stats of one metric over every district in the store's sheets, or None
+    if no year has `min_districts` districts with data."""
+    keys = StateKeys(store)
+    lo, hi = store.years
+    years = np.arange(lo, hi + 1)
+    district, taluka = metric_values(store, keys, metric, years)
+    counts = (~np.isnan(district)).sum(axis=0)
+    keep = counts >= min_districts
+    if not keep.any():
+        return None
+    district, taluka, years, counts = district[:, keep], taluka[:, keep], years[keep], counts[keep]
+    with np.errstate(all="ignore"):
+        pcts = np.nanpercentile(district, PERCENTILES, axis=0)
+        mean = np.nanmean(district, axis=0)
+    d_rank, d_pct = ranks(district)
+    t_rank, t_pct = ranks(taluka)
+    return {"keys": keys, "years": years, "counts": counts, "mean": mean,
+            "percentiles": dict(zip(PERCENTILES, pcts)),
+            "district": (district, d_rank, d_pct), "taluka": (taluka, t_rank, t_pct)}
+
+
+def _round(a, digits):
+    """Nested lists rounded to `digits` (ints when 0), NaN → None."""
+    r = np.round(np.asarray(a, dtype=np.float64), digits)
+    missing = np.isnan(r)
+    out = np.where(missing, 0, r)
+    out = (out if digits else out.astype(np.int64)).astype(object)
+    out[missing] = None
+    return out.tolist()
+
+
+def averages_entry(metric, stats):
+    d = metric.digits
+    years = [str(y) for y in stats["years"].tolist()]
+    mean = _round(stats["mean"], d)
+    p = {q: _round(v, d) for q, v in stats["percentiles"].items()}
+    return {
+        "label": metric.label,
+        "yAxisId": metric.y_axis,
+        "data": [{"year": yr, "stateAvg": mean[i], "median": p[50][i], "p25": p[25][i],
+                  "p75": p[75][i], "districts": int(stats["counts"][i])}
+                 for i, yr in enumerate(years)],
+    }
+
+
+def rankings_entry(metric, stats):
+    d, keys = metric.digits, stats["keys"]
+    dv, dr, dp = stats["district"]
+    tv, tr, tp = stats["taluka"]
+    # Only talukas / districts with a value in some kept year
+    dk = np.flatnonzero((dr > 0).any(axis=1))
+    tk = np.flatnonzero((tr > 0).any(axis=1))
+    return {
+        "label": metric.label,
+        "years": [str(y) for y in stats["years"].tolist()],
+        "percentiles": {f"p{q}": _round(v, d) for q, v in stats["percentiles"].items()},
+        "districts": {
+            "slug": [keys.slugs[i] for i in dk.tolist()],
+            "name": [keys.names[i] for i in dk.tolist()],
+            "value": _round(dv[dk], d), "rank": dr[dk].tolist(), "percentile": _round(dp[dk], 1),
+        },
+        "talukas": {
+            "name": [keys.talukas[i] for i in tk.tolist()],
+            "district": [keys.slugs[keys.taluka_district[i]] for i in tk.tolist()],
+            "value": _round(tv[tk], d), "rank": tr[tk].tolist(), "percentile": _round(tp[tk], 1),
+        },
+    }
+
+
+def write_state_stats(stores, out_dir=".", min_districts=MIN_DISTRICTS):
+    """Compute every pipeline's state metrics and update state-averages.json /
+    state-rankings.json in out_dir.  `stores` is [(pipeline, DistrictStore)].
+    Returns the paths written."""
+    avg_path = os.path.join(out_dir, AVERAGES_FILE)
+    rank_path = os.path.join(out_dir, RANKINGS_FILE)
+    averages = {}
+    if os.path.exists(avg_path):
+        with open(avg_path, "r", encoding="utf-8") as f:
+            averages = json.load(f)
+    rankings = {}
+    for pipeline, store in stores:
+        for stem, metric in pipeline.state_metrics.items():
+            stats = state_stats(store, metric, min_districts)
+            if stats is None:
+                print(f"State stats: fewer than {min_districts} districts have {stem} data "
+                      f"– keeping the existing {AVERAGES_FILE} entry")
+                continue
+            averages[stem] = averages_entry(metric, stats)
+            rankings[stem] = rankings_entry(metric, stats)
+            print(f"State stats: {stem} over {int(stats['counts'].max())} districts, "
+                  f"{len(rankings[stem]['talukas']['name'])} talukas, {len(stats['years'])} years")
+    if not rankings:
+        return []
+    with open(avg_path, "w", encoding="utf-8") as f:
+        json.dump(averages, f, indent=2)
+    with open(rank_path, "w", encoding="utf-8") as f:
+        json.dump(rankings, f, separators=(",", ":"))
+    print(f"Wrote {AVERAGES_FILE} and {RANKINGS_FILE} ({len(rankings)} metric(s))")
+    return [avg_path, rank_path]
+
+
+def main(argv=None):
+    from aggregate_health import HEALTH
+    from aggregate_livestock import LIVESTOCK_PIPELINE
+    pipelines = {"health": HEALTH, "livestock": LIVESTOCK_PIPELINE}
+    parser = argparse.ArgumentParser(description="Compute state-wide averages and rankings.")
+    for prefix, p in pipelines.items():
+        parser.add_argument(f"--{prefix}-input", default=p.input, help=f"{p.name} extract (default: {p.input})")
+    parser.add_argument("--out-dir", default=".", help="output directory (default: .)")
+    parser.add_argument("--min-districts", type=int, default=MIN_DISTRICTS,
+                        help=f"years need this many districts with data (default: {MIN_DISTRICTS})")
+    parser.add_argument("--no-cache", action="store_true", help="don't use the binary extract cache")
+    args = parser.parse_args(argv)
+    stores = [(p, p.load_store(getattr(args, f"{prefix}_input"), cache=not args.no_cache))
+              for prefix, p in pipelines.items()]
+    write_state_stats(stores, args.out_dir, args.min_districts)
+
+
+if __name__ == "__main__":
+    main()
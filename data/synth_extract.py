@@ -0,0 +1,152 @@
+"""
+synth_extract.py
+Synthetic extracts in the same sheet schema as a real one, at any scale.
+
+Every sheet of a template extract (health_extract.json by default) is
+reproduced with its headers, padding columns and text columns:
+taluka-level (DSA) sheets get a row per district × taluka × year, two if the
+sheet has a Rural/Urban column; district-level (HMIS / NFHS) sheets a row per
+district × year.  Values are random but deterministic for a seed, drawn
+around each column's magnitude in the template.  A matching districts.json
+is written next to the extract.
+
+Run: python synth_extract.py OUT_DIR [--districts N] [--talukas N] [--years N]
+                             [--template FILE] [--seed N]
+     (from project/data/ directory, needs numpy)
+"""
+import json, os, argparse
+import numpy as np
+
+from sheet_index import ExtractIndex
+
+TEMPLATE = "health_extract.json"
+LAST_YEAR = 2025
+SAMPLE_ROWS = 5
+
+
+def make_districts(n_districts, n_talukas):
+    """districts.json entries: `n_talukas` talukas spread over `n_districts`."""
+    n_talukas = max(n_talukas, n_districts)
+    districts = []
+    for d in range(n_districts):
+        k = n_talukas // n_districts + (d < n_talukas % n_districts)
+        lng, lat = 73.0 + d % 6, 16.0 + d // 6
+        districts.append({
+            # Sheets name districts by slug (any case), see talukas.norm_district
+            "slug": f"synth{d:02d}", "name": f"Synth{d:02d}",
+            "center": [lng, lat], "zoom": 9,
+            "talukas": [{"name": f"Taluka {d:02d}-{t:02d}", "lng": round(lng + t * 0.05, 4),
+                         "lat": round(lat + t * 0.03, 4)} for t in range(k)],
+        })
+    return districts
+
+
+class SheetTemplate:
+    """What a synthetic sheet needs from its template: headers, numeric
+    columns with a typical magnitude, text columns with their labels and
+    how often they are filled."""
+
+    def __init__(self, name, headers, idx):
+        self.name = name
+        self.headers = headers
+        self.taluka_level = "Taluka" in headers
+        self.rural_urban = "Rural/Urban" in headers
+        self.scale = {}
+        for c in idx.schema.value_columns:
+            v = np.asarray(idx.columns[c])
+            v = v[~np.isnan(v)]
+            self.scale[c] = float(np.median(np.abs(v))) if len(v) else 0.0
+        self.labels = {c: (labels, float(np.mean(np.asarray(codes) >= 0)))
+                       for c, (codes, labels) in idx.categories.items() if labels}
+
+
+def load_templates(path=TEMPLATE):
+    index = ExtractIndex.open(path)
+    templates = []
+    for name in index.sheet_names():
+        meta = index.cache.sheet_meta(name) if index.cache else index.reader.sheet_meta(name)
+        headers = meta.get("headers") if isinstance(meta, dict) else None
+        if not headers:
+            continue
+        templates.append(SheetTemplate(name, headers, index.sheet(name)))
+    return templates
+
+
+def sheet_rows(t, districts, years, rng):
+    """Row dicts of one synthetic sheet."""
+    keys = []
+    for d in districts:
+        talukas = [x["name"] for x in d["talukas"]] if t.taluka_level else [None]
+        for yr in years:
+            for taluka in talukas:
+                for ru in (("Rural", "Urban") if t.rural_urban else (None,)):
+                    keys.append((d["name"], yr, taluka, ru))
+    n = len(keys)
+    values = {c: np.round(rng.uniform(0.5, 1.5, n) * s, 2).tolist() for c, s in t.scale.items()}
+    texts = {c: [labels[i] if hit else None
+                 for i, hit in zip(rng.integers(0, len(labels), n), rng.random(n) < filled)]
+             for c, (labels, filled) in t.labels.items()}
+    rows = []
+    for i, (district, yr, taluka, ru) in enumerate(keys):
+        row = {}
+        for h in t.headers:
+            if h == "District":
+                row[h] = district
+            elif h == "Year":
+                row[h] = float(yr)
+            elif h == "Taluka":
+                row[h] = taluka
+            elif h == "Rural/Urban":
+                row[h] = ru
+            elif h in values:
+                row[h] = values[h][i]
+            elif h in texts:
+                row[h] = texts[h][i]
+            else:
+                row[h] = None  # padding column
+        rows.append(row)
+    return rows
+
+
+def write_extract(out_dir, n_districts=6, n_talukas=14, n_years=10, template=TEMPLATE, seed=0):
+    """Write <out_dir>/synth_extract.json and districts.json; returns
+    (extract path, districts path, rows written)."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    districts = make_districts(n_districts, n_talukas)
+    years = list(range(LAST_YEAR - n_years + 1, LAST_YEAR + 1))
+    districts_path = os.path.join(out_dir, "districts.json")
+    with open(districts_path, "w", encoding="utf-8") as f:
+        json.dump({"districts": districts}, f, indent=2)
+
+    path = os.path.join(out_dir, "synth_extract.json")
+    total = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for i, t in enumerate(load_templates(template)):
+            rows = sheet_rows(t, districts, years, rng)
+            total += len(rows)
+            sheet = {"headers": t.headers, "row_count": len(rows),
+                     "sample_all": rows[:SAMPLE_ROWS], "rows": rows}
+            f.write(("," if i else "") + "\n" + json.dumps(t.name) + ": ")
+            json.dump(sheet, f)
+        f.write("\n}\n")
+    return path, districts_path, total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic extract + districts.json.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--districts", type=int, default=6)
+    parser.add_argument("--talukas", type=int, default=14, help="total talukas across districts")
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--template", default=TEMPLATE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    path, _, rows = write_extract(args.out_dir, args.districts, args.talukas, args.years,
+                                  args.template, args.seed)
+    print(f"Wrote {path} ({rows:,} rows, {os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+talukas.py
+District / taluka reference data shared by the aggregation scripts:
+Ahilyanagar's taluka coordinates & colours, the Excel name aliases and the
+district list from districts.json.
+"""
+import json
+from collections import deque
+from functools import lru_cache
+
+DISTRICTS_FILE = "districts.json"
+DEFAULT_DISTRICT = "ahilyanagar"
+
+# ── Taluka coordinates & colors (same 14 as livestock) ──────────────────────
+TALUKA_META = {
+    "Akole":     {"lng": 73.9009, "lat": 19.5333, "color": "#2c699a"},
+    "Sangamner": {"lng": 74.2142, "lat": 19.5687, "color": "#0b8457"},
+    "Kopargaon": {"lng": 74.4787, "lat": 19.8826, "color": "#d4af37"},
+    "Rahata":    {"lng": 74.4833, "lat": 19.7167, "color": "#e07b39"},
+    "Shrirampur":{"lng": 74.6559, "lat": 19.6164, "color": "#8b5cf6"},
+    "Newasa":    {"lng": 74.9864, "lat": 19.5566, "color": "#0891b2"},
+    "Shevgaon":  {"lng": 75.0999, "lat": 19.3527, "color": "#7c3aed"},
+    "Pathardi":  {"lng": 75.2068, "lat": 19.1687, "color": "#059669"},
+    "Nagar":     {"lng": 74.7479, "lat": 19.0948, "color": "#3c4e6a"},
+    "Rahuri":    {"lng": 74.6482, "lat": 19.3920, "color": "#10b981"},
+    "Parner":    {"lng": 74.4437, "lat": 19.0000, "color": "#f59e0b"},
+    "Shrigonda": {"lng": 74.6897, "lat": 18.8631, "color": "#ef4444"},
+    "Karjat":    {"lng": 75.0366, "lat": 18.9077, "color": "#6366f1"},
+    "Jamkhed":   {"lng": 75.3145, "lat": 18.7223, "color": "#ec4899"},
+}
+
+# Map taluka names from Excel to standard names
+TALUKA_MAP = {}
+for name in TALUKA_META:
+    TALUKA_MAP[name.lower()] = name
+# Common aliases
+TALUKA_MAP["srirampur"] = "Shrirampur"
+TALUKA_MAP["nevasa"] = "Newasa"
+TALUKA_MAP["srigonda"] = "Shrigonda"
+TALUKA_MAP["a.nagar"] = "Nagar"
+TALUKA_MAP["ahilyanagar city"] = "Nagar"
+TALUKA_MAP["nagar (rural)"] = "Nagar"
+TALUKA_MAP["a.nagar city"] = "Nagar"
+TALUKA_MAP["ahmadnagar"] = "Nagar"
+TALUKA_MAP["ahmednagar"] = "Nagar"
+TALUKA_MAP["nagar city"] = "Nagar"
+TALUKA_MAP["nagar rural"] = "Nagar"
+
+# District spellings used by the DSA / HMIS / NFHS sheets → districts.json slug
+DISTRICT_ALIASES = {
+    "ahmadnagar": "ahilyanagar",
+    "ahmednagar": "ahilyanagar",
+    "amaravati": "amravati",
+}
+
+# Same palette scripts/generate-district-data.js uses for non-Ahilyanagar talukas
+TALUKA_COLORS = [
+    "#2c699a", "#008450", "#cf5c36", "#3c4e6a", "#d4af37",
+    "#10b981", "#e07b39", "#dc2626", "#7c3aed", "#0891b2",
+    "#65a30d", "#c026d3", "#ea580c", "#0d9488",
+]
+
+
+def load_districts(path=DISTRICTS_FILE):
+    """District list from districts.json."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["districts"]
+
+
+def district_key(name):
+    """Canonical key of a sheet's District cell (the slug for districts.json
+    districts), or None if blank."""
+    if not name:
+        return None
+    n = str(name).strip().lower()
+    return DISTRICT_ALIASES.get(n, n) or None
+
+
+def norm_district(name, slugs):
+    """Map a sheet's District cell to a districts.json slug (None if unknown)."""
+    n = district_key(name)
+    return n if n in slugs else None
+
+
+def district_talukas(district):
+    """{ taluka: {lng, lat, color} } for a districts.json entry.
+
+    Ahilyanagar keeps TALUKA_META (its dashboard names and colours); other
+    districts use their districts.json list with the shared palette.
+    """
+    if district["slug"] == DEFAULT_DISTRICT:
+        return TALUKA_META
+    return {
+        t["name"]: {"lng": t["lng"], "lat": t["lat"],
+                    "color": TALUKA_COLORS[i % len(TALUKA_COLORS)]}
+        for i, t in enumerate(district["talukas"])
+    }
+
+
+# ── Compiled alias matching ─────────────────────────────────────────────────
+# Resolution rules (unchanged from the old linear norm_taluka): an exact alias
+# wins; otherwise the first alias (in priority order) that occurs inside the
+# name, or that contains the name, is taken.  Both partial checks are
+# compiled: an Aho-Corasick automaton finds aliases inside the name and a
+# trie of every alias suffix finds aliases containing it, so a lookup costs
+# O(len(name)) however many aliases a district has.
+NO_MATCH = 1 << 30
+
+
+class AliasMatcher:
+    """Compiled matcher over one district's (alias, standard name) list."""
+
+    def __init__(self, aliases):
+        self.names = []
+        goto, exact = [{}], [NO_MATCH]
+        sub, sub_best = [{}], [NO_MATCH]
+        for alias, standard in aliases:
+            if not alias:
+                continue
+            p = len(self.names)
+            self.names.append(standard)
+            node = 0
+            for ch in alias:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = goto[node][ch] = len(goto)
+                    goto.append({})
+                    exact.append(NO_MATCH)
+                node = nxt
+            exact[node] = min(exact[node], p)
+            for start in range(len(alias)):
+                node = 0
+                for ch in alias[start:]:
+                    nxt = sub[node].get(ch)
+                    if nxt is None:
+                        nxt = sub[node][ch] = len(sub)
+                        sub.append({})
+                        sub_best.append(NO_MATCH)
+                    node = nxt
+                    sub_best[node] = min(sub_best[node], p)
+
+        # Failure links (BFS); out[n] = best alias ending at n or any suffix state
+        fail, out = [0] * len(goto), list(exact)
+        queue = deque(goto[0].values())  # depth-1 states fail to the root
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = min(out[nxt], out[fail[nxt]])
+                queue.append(nxt)
+        self.goto, self.exact, self.fail, self.out = goto, exact, fail, out
+        self.sub, self.sub_best = sub, sub_best
+
+    def match(self, n):
+        """Standard name for a normalised (stripped, lower-case) string, or None."""
+        goto = self.goto
+        node = 0
+        for ch in n:
+            node = goto[node].get(ch)
+            if node is None:
+                break
+        else:
+            if self.exact[node] != NO_MATCH:
+                return self.names[self.exact[node]]
+
+        best = NO_MATCH
+        state = 0
+        for ch in n:
+            while state and ch not in goto[state]:
+                state = self.fail[state]
+            state = goto[state].get(ch, 0)
+            if self.out[state] < best:
+                best = self.out[state]
+        node = 0
+        for ch in n:
+            node = self.sub[node].get(ch)
+            if node is None:
+                break
+        else:
+            best = min(best, self.sub_best[node])
+        return self.names[best] if best != NO_MATCH else None
+
+
+def district_aliases(district):
+    """(alias, standard name) pairs for a districts.json entry, in priority order."""
+    talukas = district_talukas(district)
+    if district["slug"] == DEFAULT_DISTRICT:
+        pairs = list(TALUKA_MAP.items())
+    else:
+        pairs = [(t.lower(), t) for t in talukas]
+    # districts.json spellings resolve to the dashboard name where one is known
+    known = dict(pairs)
+    for t in district["talukas"]:
+        n = t["name"].lower()
+        if n not in known and t["name"] in talukas:
+            pairs.append((n, t["name"]))
+            known[n] = t["name"]
+    return pairs
+
+
+class TalukaResolver:
+    """Shared taluka-name resolver for every district.
+
+    One compiled AliasMatcher per district, an LRU memo of raw strings already
+    resolved, and a record of names that never resolved (see report()).
+    """
+
+    def __init__(self, districts, memo_size=4096):
+        self.matchers = {d["slug"]: AliasMatcher(district_aliases(d)) for d in districts}
+        self.misses = {}  # (district slug, raw name) → lookups that failed
+        self._lookup = lru_cache(maxsize=memo_size)(self._match)
+
+    def _match(self, district, name):
+        matcher = self.matchers.get(district)
+        n = str(name).strip().lower()
+        if matcher is None or not n:
+            return None
+        return matcher.match(n)
+
+    def resolve(self, name, district=DEFAULT_DISTRICT):
+        """Raw Taluka cell → standard taluka name of `district`, or None."""
+        if not name:
+            return None
+        t = self._lookup(district, name)
+        if t is None:
+            key = (district, name)
+            self.misses[key] = self.misses.get(key, 0) + 1
+        return t
+
+    def report(self):
+        """[(district, raw name, failed lookups)] for names that never resolved."""
+        return [(d, n, c) for (d, n), c in sorted(self.misses.items(), key=lambda kv: (kv[0][0], str(kv[0][1])))]
+
+
+_default_resolver = None
+
+
+def default_resolver():
+    """TalukaResolver over districts.json (or Ahilyanagar alone without it)."""
+    global _default_resolver
+    if _default_resolver is None:
+        try:
+            districts = load_districts()
+        except FileNotFoundError:
+            districts = [{"slug": DEFAULT_DISTRICT, "name": "Ahilyanagar", "talukas": []}]
+        _default_resolver = TalukaResolver(districts)
+    return _default_resolver
+
+
+def norm_taluka(name):
+    """Normalise a taluka name to our standard set."""
+    return default_resolver().resolve(name, DEFAULT_DISTRICT)
@@ -0,0 +1,128 @@
+"""
+trends.py
+Trend statistics over aggregated (entity, year, metric) arrays — every
+taluka, district and column of a sheet in one vectorized pass.
+
+  yoy        % change from the previous year on the axis
+  cagr_<w>y  compound annual growth (%) from the value w years earlier
+  mean_<w>y  mean of the values in the trailing w-year window
+  slope_<w>y least-squares change per year over that window
+
+Windows are in calendar years, so gaps in the year axis shorten a window
+rather than stretch it.  Baselines follow trend_calc: a zero or missing
+previous value gives no change (NaN here, "N/A" on the dashboard), and a
+missing current value gives no trend either.  CAGR also needs a positive
+baseline.  Rolling sums come from one cumulative sum per quantity along
+the year axis, so every window costs two array lookups, not a loop.
+
+    t = compute(agg.taluka_values, agg.taluka_counts, agg.years)
+    t["cagr_5y"][key, year, col]
+"""
+import numpy as np
+
+WINDOWS = (3, 5)
+
+
+def pct_change(old, new):
+    """% change from `old` to `new`; NaN for a zero baseline (trend_calc's rule)."""
+    if old == 0:
+        return float("nan")
+    return (new - old) / abs(old) * 100
+
+
+def trend_entry(pct, context=""):
+    """Dashboard trend dict for a % change (NaN → "N/A")."""
+    if pct != pct:
+        return {"direction": "neutral", "value": "N/A", "context": ""}
+    d = "up" if pct > 0 else ("down" if pct < 0 else "neutral")
+    return {"direction": d, "value": f"{pct:+.1f}%", "context": context}
+
+
+def stat_names(windows=WINDOWS):
+    return ["yoy"] + [f"{s}_{w}y" for w in windows for s in ("cagr", "mean", "slope")]
+
+
+def _div(a, b, where):
+    return np.divide(a, b, out=np.full(np.broadcast(a, b).shape, np.nan), where=where)
+
+
+def _cumsum(a):
+    """Cumulative sum along the year axis with a leading zero plane."""
+    out = np.zeros((a.shape[0], a.shape[1] + 1) + a.shape[2:])
+    np.cumsum(a, axis=1, out=out[:, 1:])
+    return out
+
+
+def compute(values, counts, years, windows=WINDOWS):
+    """{ stat: array shaped like `values` } (NaN where a stat is undefined).
+
+    `values[entity, year, metric]` with `counts[entity, year]` rows behind
+    each cell (0 = no data); `years` is the sorted year axis.
+    """
+    years = np.asarray(years, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    shape = values.shape
+    if not len(years) or not values.size:
+        return {s: np.full(shape, np.nan) for s in stat_names(windows)}
+    v = np.where((np.asarray(counts) > 0)[..., None], values, np.nan)
+    ok = ~np.isnan(v)
+
+    out = {}
+    prev, cur = v[:, :-1], v[:, 1:]
+    yoy = np.full(shape, np.nan)
+    yoy[:, 1:] = _div(cur - prev, np.abs(prev), ok[:, :-1] & ok[:, 1:] & (prev != 0)) * 100
+    out["yoy"] = yoy
+
+    # Window sums of n, y, x, x², xy as differences of cumulative sums
+    x = np.broadcast_to((years - years[0]).astype(np.float64)[None, :, None], shape)
+    y0 = np.where(ok, v, 0.0)
+    x0 = np.where(ok, x, 0.0)
+    cums = [_cumsum(a) for a in (ok.astype(np.float64), y0, x0, x0 * x0, x0 * y0)]
+    end = np.arange(1, len(years) + 1)
+    for w in windows:
+        start = np.searchsorted(years, years - w + 1)
+        n, sy, sx, sxx, sxy = (c[:, end] - c[:, start] for c in cums)
+        base_pos = np.searchsorted(years, years - w)
+        has_base = (base_pos < len(years)) & (years[np.minimum(base_pos, len(years) - 1)] == years - w)
+        base = np.where(has_base[None, :, None], v[:, np.minimum(base_pos, len(years) - 1)], np.nan)
+        growth = _div(v, base, ok & (base > 0) & (v >= 0))
+        out[f"cagr_{w}y"] = (np.power(growth, 1.0 / w) - 1) * 100
+        out[f"mean_{w}y"] = _div(sy, n, ok & (n > 0))
+        den = n * sxx - sx * sx
+        out[f"slope_{w}y"] = _div(n * sxy - sx * sy, den, ok & (n >= 2) & (den > 0))
+    return out
+
+
+class SheetTrends:
+    """Trend stats of one SheetAggregate: taluka[stat][key, year, col] (None for
+    district-level reductions) and district[stat][district, year, col]."""
+
+    __slots__ = ("columns", "years", "windows", "taluka", "district")
+
+    def __init__(self, agg, windows=WINDOWS):
+        self.columns = list(agg.columns)
+        self.years = agg.years
+        self.windows = windows
+        self.taluka = None
+        if agg.taluka_values is not None:
+            # Talukas and district totals in one pass over stacked entities
+            k = agg.taluka_values.shape[0]
+            stats = compute(np.concatenate([agg.taluka_values, agg.district_values]),
+                            np.concatenate([agg.taluka_counts, agg.district_counts]),
+                            agg.years, windows)
+            self.taluka = {s: a[:k] for s, a in stats.items()}
+            self.district = {s: a[k:] for s, a in stats.items()}
+        else:
+            self.district = compute(agg.district_values, agg.district_counts, agg.years, windows)
+
+
+def to_dict(stats, years, columns, digits=4):
+    """{ year: { col: { stat: value } } } of the defined values in
+    {stat: (year, col) array}."""
+    years = np.asarray(years).tolist()
+    out = {}
+    for stat, a in stats.items():
+        a = np.asarray(a)
+        for y, j in zip(*np.nonzero(~np.isnan(a))):
+            out.setdefault(years[y], {}).setdefault(columns[j], {})[stat] = round(float(a[y, j]), digits)
+    return {y: out[y] for y in sorted(out)}
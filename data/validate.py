@@ -0,0 +1,256 @@
+"""
+validate.py
+Data-quality pass over the sheets a pipeline reads, run on the columnar
+SheetIndex arrays (one vectorized pass per check and sheet) so it is cheap
+enough to run before every build.
+
+Checks (issue → what it counts):
+  unparseable       filled-in cells that aren't numbers, Year included
+                    (the builders read them as 0 / blank)
+  negative          negative values in count columns
+  share_sum         rows whose shares don't add up to a total, e.g. Normal +
+                    MAM + SAM % in DSA_Malnutrition (pipeline `checks`)
+  year_range        rows whose Year is outside the store's window (sheets
+                    read with a taluka-level reduction, which drop them)
+  year_gap          district / taluka years missing between the first and
+                    last year the sheet has for it
+  unknown_district  District spellings that resolve to no districts.json
+                    district but are close to one (or to another spelling
+                    in the same sheet) – Ahmednagar vs Ahmadnagar
+  unknown_taluka    Taluka spellings of a known district that don't resolve
+
+Every issue carries a row / cell count and a few examples.  unparseable,
+negative, share_sum and the unknown_* checks are errors (rows are silently
+dropped or zeroed); year_range and year_gap are warnings.
+
+Run: python validate.py [--health-input FILE] [--livestock-input FILE]
+                        [--out FILE] [--strict] [--no-cache]
+     (from project/data/ directory, needs numpy; the aggregators and
+     build_dashboards.py run it too, see --validation / --strict)
+"""
+import json, re, sys, argparse, difflib
+import numpy as np
+
+import instrument
+from talukas import DISTRICT_ALIASES, district_key
+
+EXAMPLES = 5
+ERRORS = ("unparseable", "negative", "share_sum", "unknown_district", "unknown_taluka")
+# Columns that may legitimately go below zero
+SIGNED = re.compile(r"change|growth|difference|net\b|balance", re.I)
+SIMILARITY = 0.8
+
+
+class ShareSum:
+    """Rows where `columns` (shares of one whole) don't sum to `total` ±
+    `tolerance`; rows with none of them filled in are skipped."""
+
+    def __init__(self, columns, total=100.0, tolerance=1.0):
+        self.columns = list(columns)
+        self.total = total
+        self.tolerance = tolerance
+
+    def __call__(self, idx, labels):
+        m = idx.matrix(self.columns)
+        filled = ~np.isnan(m).all(axis=1)
+        s = np.nansum(m, axis=1)
+        bad = np.flatnonzero(filled & (np.abs(s - self.total) > self.tolerance))
+        if not len(bad):
+            return []
+        return [issue("share_sum", idx.name, len(bad),
+                      [f"{labels(i)}: {round(float(s[i]), 2)}" for i in bad[:EXAMPLES]],
+                      column=" + ".join(self.columns))]
+
+
+def issue(check, sheet, count, examples, column=None):
+    out = {"check": check, "level": "error" if check in ERRORS else "warning",
+           "sheet": sheet, "count": int(count), "examples": examples}
+    if column is not None:
+        out["column"] = column
+    return out
+
+
+def _row_labels(idx):
+    """row → "District / Taluka Year" for examples."""
+    def label(i):
+        d, t, y = idx.district[i], idx.taluka[i], idx.year[i]
+        parts = [idx.district_labels[d] if d >= 0 else "?"]
+        if t >= 0:
+            parts.append(idx.taluka_labels[t])
+        return " / ".join(str(p) for p in parts) + (f" {y}" if y >= 0 else "")
+    return label
+
+
+# ── Checks ──────────────────────────────────────────────────────────────────
+def check_cells(idx, labels):
+    """unparseable cells (counted while the sheet was indexed) and negatives."""
+    out = [issue("unparseable", idx.name, n, [f"{labels(i)}: {v!r}" for i, v in examples], column=c)
+           for c, (n, examples) in idx.bad_cells.items()]
+    cols = [c for c in idx.columns if not SIGNED.search(c)]
+    if cols:
+        m = idx.matrix(cols)
+        neg = m < 0
+        for j in np.flatnonzero(neg.any(axis=0)):
+            rows = np.flatnonzero(neg[:, j])
+            out.append(issue("negative", idx.name, len(rows),
+                             [f"{labels(i)}: {m[i, j]:g}" for i in rows[:EXAMPLES]], column=cols[j]))
+    return out
+
+
+def check_years(idx, window=None):
+    """Rows outside the (first, last) year `window` if given, and per
+    district / taluka the years missing inside its own first–last range."""
+    out = []
+    ok = idx.year >= 0
+    outside = np.zeros(idx.n_rows, dtype=bool)
+    if window is not None:
+        lo, hi = window
+        outside = ok & ((idx.year < lo) | (idx.year > hi))
+    if outside.any():
+        ys, n = np.unique(idx.year[outside], return_counts=True)
+        out.append(issue("year_range", idx.name, int(outside.sum()),
+                         [f"{y}: {c} row(s)" for y, c in zip(ys.tolist(), n.tolist())][:EXAMPLES]))
+    ok &= ~outside & (idx.district >= 0)
+    if not ok.any():
+        return out
+    # Entities: (district key, taluka label), aliases folded
+    keys = [district_key(l) for l in idx.district_labels]
+    key_code = {k: i for i, k in enumerate(dict.fromkeys(keys))}
+    dcode = np.array([key_code[k] for k in keys], dtype=np.int64)[idx.district[ok]]
+    width = len(idx.taluka_labels) + 1
+    ent, inv = np.unique(dcode * width + idx.taluka[ok] + 1, return_inverse=True)
+    y0 = int(idx.year[ok].min())
+    n_years = int(idx.year[ok].max()) - y0 + 1
+    present = np.zeros((len(ent), n_years), dtype=bool)
+    present[inv.ravel(), idx.year[ok] - y0] = True
+    # Missing years with data both before and after them
+    inside = np.maximum.accumulate(present, axis=1) & np.maximum.accumulate(present[:, ::-1], axis=1)[:, ::-1]
+    gaps = inside & ~present
+    hit = np.flatnonzero(gaps.any(axis=1))
+    if len(hit):
+        names = list(key_code)
+        examples = []
+        for e in hit[:EXAMPLES].tolist():
+            d, t = divmod(int(ent[e]), width)
+            who = names[d] + (f" / {idx.taluka_labels[t - 1]}" if t else "")
+            examples.append(f"{who}: {', '.join(str(y0 + y) for y in np.flatnonzero(gaps[e]))}")
+        out.append(issue("year_gap", idx.name, int(gaps.sum()), examples))
+    return out
+
+
+def _closest(name, candidates):
+    m = difflib.get_close_matches(str(name).strip().lower(), candidates, n=1, cutoff=SIMILARITY)
+    return m[0] if m else None
+
+
+def check_names(store, sheet, idx):
+    """District spellings close to a known one, and unresolved talukas of
+    known districts, with their row counts."""
+    out = []
+    dpos, tkey = store.row_keys(sheet)
+    known = list(store.slugs) + list(DISTRICT_ALIASES)
+    labels = idx.district_labels
+    keys = [district_key(l) for l in labels]
+    rows = np.bincount(idx.district[idx.district >= 0], minlength=len(labels))
+    unknown = np.unique(idx.district[(dpos < 0) & (idx.district >= 0)]).tolist()
+    examples, n = [], 0
+    for i in sorted(unknown, key=lambda i: -rows[i]):
+        others = known + [k for k in keys if k and k != keys[i]]
+        near = _closest(labels[i], others)
+        if near is not None:
+            n += int(rows[i])
+            examples.append(f"{labels[i]!r} ({rows[i]} rows) ~ {near!r}")
+    if examples:
+        out.append(issue("unknown_district", sheet, n, examples[:EXAMPLES]))
+
+    miss = (dpos >= 0) & (idx.taluka >= 0) & (tkey < 0)
+    if miss.any():
+        pairs, n = np.unique(np.stack([dpos[miss], idx.taluka[miss]]), axis=1, return_counts=True)
+        examples = []
+        for (d, t), c in sorted(zip(pairs.T.tolist(), n.tolist()), key=lambda p: -p[1]):
+            names = {k.lower(): k for k in store.talukas[d]}
+            near = _closest(idx.taluka_labels[t], list(names))
+            hint = f" ~ {names[near]!r}" if near else ""
+            examples.append(f"{store.slugs[d]}: {idx.taluka_labels[t]!r} ({c} rows){hint}")
+        out.append(issue("unknown_taluka", sheet, int(miss.sum()), examples[:EXAMPLES]))
+    return out
+
+
+# ── Driver ──────────────────────────────────────────────────────────────────
+def validate_sheet(store, sheet, checks=(), windowed=True):
+    """Issues of one sheet (`windowed`: its reads drop rows outside the
+    store's year window)."""
+    idx = store.index.sheet(sheet)
+    with instrument.stage("validate", sheet=sheet) as s:
+        labels = _row_labels(idx)
+        issues = check_cells(idx, labels) + check_years(idx, store.years if windowed else None)
+        if "District" in idx.schema.keys:
+            issues += check_names(store, sheet, idx)
+        for check in checks:
+            issues += check(idx, labels)
+        if s is not None:
+            s.update(rows_in=idx.n_rows, issues=len(issues))
+    return issues
+
+
+def validate(pipeline, store, sections=None):
+    """Issues of the source sheets of a pipeline's `sections` (default: all;
+    pivoted sheets are checked as the sheet they come from)."""
+    hows = {}
+    for sheet, how in pipeline.groups(sections):
+        sheet = pipeline.pivots[sheet][0] if sheet in pipeline.pivots else sheet
+        hows.setdefault(sheet, set()).add(how)
+    issues = []
+    for sheet in sorted(hows):
+        issues += validate_sheet(store, sheet, pipeline.checks.get(sheet, ()),
+                                 windowed=hows[sheet] != {"last"})
+    return issues
+
+
+def summary(name, issues):
+    """Print one line per issue, errors first."""
+    errors = sum(i["level"] == "error" for i in issues)
+    print(f"Validation ({name}): {errors} error(s), {len(issues) - errors} warning(s)")
+    for i in sorted(issues, key=lambda i: (i["level"] != "error", i["sheet"], i["check"])):
+        col = f" [{i['column']}]" if "column" in i else ""
+        print(f"  {i['level'].upper()} {i['check']} {i['sheet']}{col}: {i['count']} "
+              f"– {'; '.join(i['examples'])}")
+    return errors
+
+
+def check_stores(stores, out=None, sections=None):
+    """Validate [(pipeline, store)] (only the sheets of the sections picked in
+    `sections`, { pipeline name: [section, …] or None }), print the issues and
+    optionally write them to `out` as { pipeline: [issue, …] }; returns the
+    error count."""
+    results, errors = {}, 0
+    for pipeline, store in stores:
+        results[pipeline.name] = validate(pipeline, store, (sections or {}).get(pipeline.name))
+        errors += summary(pipeline.name, results[pipeline.name])
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Wrote validation report {out}")
+    return errors
+
+
+def main(argv=None):
+    from aggregate_health import HEALTH
+    from aggregate_livestock import LIVESTOCK_PIPELINE
+    pipelines = {"health": HEALTH, "livestock": LIVESTOCK_PIPELINE}
+    parser = argparse.ArgumentParser(description="Check the extracts' data quality.")
+    for prefix, p in pipelines.items():
+        parser.add_argument(f"--{prefix}-input", default=p.input, help=f"{p.name} extract (default: {p.input})")
+    parser.add_argument("--out", metavar="FILE", help="write the issues as JSON")
+    parser.add_argument("--strict", action="store_true", help="exit with status 1 on any error")
+    parser.add_argument("--no-cache", action="store_true", help="don't use the binary extract cache")
+    args = parser.parse_args(argv)
+
+    stores = [(p, p.load_store(getattr(args, f"{prefix}_input"), cache=not args.no_cache))
+              for prefix, p in pipelines.items()]
+    errors = check_stores(stores, args.out)
+    return 1 if args.strict and errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
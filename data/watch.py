@@ -0,0 +1,229 @@
+"""
+watch.py
+Long-running build for monthly updates: keeps both extracts' parsed sheets
+in memory and refreshes the Livestock and Health dashboard JSON files
+whenever an extract or districts.json changes.
+
+The inputs are polled (size and mtime) every --interval seconds, and a
+change is picked up once the file has stopped changing for one interval.
+An edited extract is rescanned and only the sheets whose JSON text changed
+(the reader's sheet_digest) are parsed again; every other sheet, with its
+resolved taluka keys and aggregates, stays resident.  The pipelines'
+incremental build (build_state.py) then rewrites just the outputs whose
+source rows changed, followed by state-averages.json / state-rankings.json.
+An edited districts.json re-resolves the resident sheets without reading
+any JSON and rebuilds the districts whose entry changed (the entry is part
+of each output's build key).  Edits to the
+generator code (any .py file here) restart the process.
+
+While watching, the binary extract cache (extract_cache.py) is left as it
+was; the next regular run refreshes it.
+
+Run: python watch.py [--livestock-section NAME ...] [--health-section NAME ...]
+                     [--livestock-input FILE] [--health-input FILE]
+                     [--districts FILE] [--out-dir DIR] [--interval SECONDS]
+                     [--no-cache] [--compact] [--gzip] [--validation FILE]
+                     [--strict] [--no-validate] [--min-districts N] [--no-state-stats]
+     (from project/data/ directory, needs numpy; Ctrl-C stops)
+"""
+import argparse, glob, json, os, sys, time
+import validate
+from build_dashboards import PIPELINES
+from district_store import DistrictStore
+from extract_reader import ExtractReader
+from state_stats import MIN_DISTRICTS, write_state_stats
+from talukas import DISTRICTS_FILE, load_districts
+from xlsx_reader import XlsxReader, is_workbook
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+INTERVAL = 0.25  # seconds between polls
+
+
+def signature(path):
+    """(size, mtime) of a file, or None while it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def sheet_digests(path):
+    """(reader, { sheet: digest of its text }) for one version of an extract."""
+    reader = XlsxReader(path) if is_workbook(path) else ExtractReader(path)
+    return reader, {name: reader.sheet_digest(name) for name in reader.sheet_names()}
+
+
+class Resident:
+    """One pipeline's store, kept in memory between rebuilds."""
+
+    def __init__(self, pipeline, path, districts, sections=None, cache=True):
+        self.pipeline = pipeline
+        self.path = path
+        self.selected = sections or list(pipeline.sections)
+        self.store = pipeline.open_store(path, districts, cache)
+        _, self.digests = sheet_digests(path)
+        for sheet in pipeline.source_sheets(self.selected):
+            self.store.index.sheet(sheet)
+
+    def reload(self):
+        """Re-read the sheets whose text changed; returns their names (pivots
+        of them included)."""
+        reader, digests = sheet_digests(self.path)
+        changed = {s for s in set(digests) | set(self.digests) if digests.get(s) != self.digests.get(s)}
+        self.digests = digests
+        changed = self.store.index.forget(changed, reader)
+        self.store.forget(changed)
+        return changed
+
+    def reresolve(self, districts):
+        """Same resident sheets over a new district list."""
+        store = self.store
+        self.store = DistrictStore(store.index, districts, derived=self.pipeline.derived, years=store.years)
+
+    def sections(self, sheets):
+        """Selected sections reading any of `sheets`."""
+        return [name for name in self.selected
+                if any(sheet in sheets for sheet, _ in self.pipeline.sections[name][2])]
+
+
+class Watcher:
+    """Polls the inputs and rebuilds what their changes affect."""
+
+    def __init__(self, args):
+        self.args = args
+        self.districts_file = args.districts
+        self.districts = load_districts(self.districts_file)
+        self.residents = [Resident(p, getattr(args, f"{prefix}_input"), self.districts,
+                                   getattr(args, f"{prefix}_section"), not args.no_cache)
+                          for prefix, p in PIPELINES.items()]
+        self.code = sorted(glob.glob(os.path.join(HERE, "*.py")))
+        self.seen = {path: signature(path) for path in self.inputs() + self.code}
+
+    def inputs(self):
+        return [r.path for r in self.residents] + [self.districts_file]
+
+    # ── Rebuilding ──────────────────────────────────────────────────────────
+    def build(self, jobs):
+        """Run [(resident, sections, districts or None)]; returns the paths
+        written."""
+        args, written = self.args, []
+        if not args.no_validate:
+            picked = {}  # resident → sections to build, in order
+            for r, sections, _ in jobs:
+                for name in sections:
+                    if name not in picked.setdefault(r, []):
+                        picked[r].append(name)
+            checked = [(r.pipeline, r.store) for r in picked]
+            names = {r.pipeline.name: sections for r, sections in picked.items()}
+            if validate.check_stores(checked, args.validation, names) and args.strict:
+                print("Validation found errors – not building until the next change")
+                return []
+        for r, sections, districts in jobs:
+            if sections:
+                written += r.pipeline.run(r.store, sections, districts, args.out_dir, False, 1,
+                                          compact=args.compact, gz=args.gzip)
+        if written and not args.no_state_stats:
+            write_state_stats([(r.pipeline, r.store) for r in self.residents],
+                              args.out_dir, args.min_districts)
+        return written
+
+    def reload_districts(self):
+        """Re-resolve every resident store over the new district list;
+        returns the slugs whose entry changed or was added."""
+        districts = load_districts(self.districts_file)
+        before = {d["slug"]: json.dumps(d, sort_keys=True) for d in self.districts}
+        slugs = [d["slug"] for d in districts if before.get(d["slug"]) != json.dumps(d, sort_keys=True)]
+        self.districts = districts
+        for r in self.residents:
+            r.reresolve(districts)
+        print(f"{os.path.basename(self.districts_file)}: {len(slugs)} district(s) changed"
+              + (f" ({', '.join(slugs)})" if slugs else ""))
+        return slugs
+
+    def changed(self, paths):
+        """Rebuild for settled changes to the inputs `paths`."""
+        start = time.perf_counter()
+        slugs = self.reload_districts() if self.districts_file in paths else []
+        jobs = []
+        for r in self.residents:
+            if r.path in paths:
+                sheets = r.reload()
+                print(f"{os.path.basename(r.path)}: {len(sheets)} sheet(s) changed"
+                      + (f" ({', '.join(sorted(sheets))})" if sheets else ""))
+                jobs.append((r, r.sections(sheets), None))
+            if slugs:
+                jobs.append((r, r.selected, slugs))
+        written = self.build(jobs) if any(sections for _, sections, _ in jobs) else []
+        print(f"Refreshed {len(written)} file(s) in {time.perf_counter() - start:.2f} s – watching")
+
+    # ── Polling ─────────────────────────────────────────────────────────────
+    def poll(self):
+        """Paths whose signature changed since the last poll."""
+        moved = []
+        for path, seen in self.seen.items():
+            now = signature(path)
+            if now != seen:
+                self.seen[path] = now
+                moved.append(path)
+        return moved
+
+    def run(self, interval=INTERVAL):
+        print(f"Watching {', '.join(self.inputs())} (every {interval:g} s, Ctrl-C stops)")
+        pending = set()
+        while True:
+            time.sleep(interval)
+            moved = self.poll()
+            if moved:
+                pending.update(moved)
+                continue  # still being written: wait for a quiet interval
+            if not pending:
+                continue
+            paths, pending = pending, set()
+            if any(p in self.code for p in paths):
+                print(f"{', '.join(os.path.basename(p) for p in paths if p in self.code)} changed – restarting")
+                os.execv(sys.executable, [sys.executable] + sys.argv)
+            missing = [p for p in paths if self.seen[p] is None]
+            if missing:
+                print(f"{', '.join(missing)} missing – waiting for it to come back")
+                continue
+            try:
+                self.changed(paths)
+            except Exception as e:  # a half-saved or broken input: keep the last build
+                print(f"Rebuild failed ({type(e).__name__}: {e}) – waiting for the next change")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the dashboard JSON files whenever their inputs change.")
+    for prefix, p in PIPELINES.items():
+        p.add_arguments(parser, prefix)
+    parser.add_argument("--districts", default=DISTRICTS_FILE,
+                        help=f"district list (default: {DISTRICTS_FILE})")
+    parser.add_argument("--out-dir", default=".", help="output directory (default: .)")
+    parser.add_argument("--interval", type=float, default=INTERVAL,
+                        help=f"seconds between polls of the inputs (default: {INTERVAL:g})")
+    parser.add_argument("--no-cache", action="store_true", help="don't use the binary extract cache at start-up")
+    parser.add_argument("--compact", action="store_true",
+                        help="write the minified numeric-only form the app formats (see compact.py)")
+    parser.add_argument("--gzip", action="store_true", help="also write a pre-compressed .gz of every output")
+    parser.add_argument("--validation", metavar="FILE", help="write the data-quality issues as JSON")
+    parser.add_argument("--strict", action="store_true",
+                        help="don't build while validation finds errors")
+    parser.add_argument("--no-validate", action="store_true", help="skip the data-quality checks")
+    parser.add_argument("--min-districts", type=int, default=MIN_DISTRICTS,
+                        help=f"state stats: years need this many districts with data (default: {MIN_DISTRICTS})")
+    parser.add_argument("--no-state-stats", action="store_true",
+                        help="don't recompute state-averages.json / state-rankings.json")
+    args = parser.parse_args(argv)
+
+    watcher = Watcher(args)
+    # Catch up with edits made while nothing was watching
+    watcher.build([(r, r.selected, None) for r in watcher.residents])
+    try:
+        watcher.run(args.interval)
+    except KeyboardInterrupt:
+        print("Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+xlsx_reader.py
+Streaming reader for the source Excel workbooks, with the ExtractReader
+interface (extract_reader.py), so ExtractIndex and the binary cache read a
+workbook exactly like an extract JSON.
+
+Each worksheet is a sheet whose first row is the header row (blank header
+cells become col_<i>, as in the JSON exports) and whose `rows` list is every
+non-empty row below it, for all districts.  Worksheets are opened with
+openpyxl in read-only mode, so rows are parsed from the XML as they are
+iterated and only the current one exists as a dict.
+
+    reader = XlsxReader("health.xlsx")
+    for row in reader.iter_rows("DSA_DeathCause", "rows"):
+        ...
+
+Needs openpyxl (pip install openpyxl); it is only imported when a workbook
+is actually read.
+"""
+import hashlib, itertools, posixpath, zipfile
+import xml.etree.ElementTree as ET
+
+XLSX_SUFFIXES = (".xlsx", ".xlsm")
+ROWS_KEY = "rows"
+_NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+       "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+       "p": "http://schemas.openxmlformats.org/package/2006/relationships"}
+
+
+def is_workbook(path):
+    return str(path).lower().endswith(XLSX_SUFFIXES)
+
+
+def _open_workbook(path):
+    try:
+        import openpyxl
+    except ImportError:
+        raise SystemExit(f"Reading {path} needs openpyxl: pip install openpyxl")
+    return openpyxl.load_workbook(path, read_only=True, data_only=True)
+
+
+def header_names(cells):
+    """Header row cells → names, blank cells as col_<index>."""
+    return [str(c).strip() if c is not None and str(c).strip() else f"col_{i}"
+            for i, c in enumerate(cells)]
+
+
+def sheet_members(path):
+    """{ sheet name: worksheet XML member } from the workbook's own parts
+    (no openpyxl needed)."""
+    with zipfile.ZipFile(path) as z:
+        book = ET.fromstring(z.read("xl/workbook.xml"))
+        rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+    target = {r.get("Id"): r.get("Target") for r in rels.findall("p:Relationship", _NS)}
+    out = {}
+    for sheet in book.findall("m:sheets/m:sheet", _NS):
+        t = target[sheet.get(f"{{{_NS['r']}}}id")]
+        out[sheet.get("name")] = t.lstrip("/") if t.startswith("/") else posixpath.normpath("xl/" + t)
+    return out
+
+
+def _cell(v):
+    if isinstance(v, str):
+        v = v.strip()
+        return v or None
+    return v
+
+
+class XlsxReader:
+    """Sheets of one workbook, streamed a row at a time."""
+
+    def __init__(self, path):
+        self.path = path
+        self._wb = None
+        self._headers = {}
+
+    def workbook(self):
+        if self._wb is None:
+            self._wb = _open_workbook(self.path)
+        return self._wb
+
+    def close(self):
+        if self._wb is not None:
+            self._wb.close()
+            self._wb = None
+
+    def offsets(self):
+        """{ sheet name: position } (ExtractReader keys sheets by byte offset)."""
+        return {name: i for i, name in enumerate(self.workbook().sheetnames)}
+
+    def sheet_names(self):
+        return list(self.workbook().sheetnames)
+
+    def _rows(self, name):
+        """(headers, iterator of raw row tuples after the header row)."""
+        if name not in self.workbook().sheetnames:
+            raise KeyError(name)
+        rows = self.workbook()[name].iter_rows(values_only=True)
+        first = next(rows, None)
+        headers = self._headers[name] = header_names(first or ())
+        return headers, rows
+
+    def sheet_meta(self, name, skip=(ROWS_KEY,)):
+        """{"headers": […], "row_count": n (None if the sheet doesn't say), "rows": None}."""
+        headers, _ = self._rows(name)
+        ws = self.workbook()[name]
+        n = ws.max_row - 1 if ws.max_row else None
+        meta = {"headers": headers, "row_count": n}
+        if ROWS_KEY in skip:
+            meta[ROWS_KEY] = None
+        return meta
+
+    def sheet_digest(self, name):
+        """SHA-1 of the worksheet's XML and the shared strings its text cells
+        point into; changes whenever the sheet does."""
+        members = [sheet_members(self.path)[name], "xl/sharedStrings.xml"]
+        h = hashlib.sha1()
+        with zipfile.ZipFile(self.path) as z:
+            for member in members:
+                if member not in z.namelist():
+                    continue
+                with z.open(member) as f:
+                    for block in iter(lambda: f.read(1 << 16), b""):
+                        h.update(block)
+        return h.hexdigest()
+
+    def iter_rows(self, name, rows_key=ROWS_KEY):
+        """Yield the sheet's rows as dicts, one at a time (only `rows` exists)."""
+        if rows_key != ROWS_KEY:
+            return
+        headers, rows = self._rows(name)
+        width = len(headers)
+        for cells in rows:
+            if cells is None or all(c is None or c == "" for c in cells):
+                continue
+            yield dict(zip(headers, map(_cell, itertools.islice(cells, width))))
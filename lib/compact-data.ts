@@ -0,0 +1,101 @@
+/**
+ * Compact Section Data
+ * ────────────────────
+ * Expands the numeric-only section JSON written with --compact
+ * (data/compact.py) back into the usual chartData / tableData / talukas
+ * rows, formatting numbers client-side from per-field descriptors.
+ * Sections in the regular form are returned unchanged.
+ */
+
+export const COMPACT_VERSION = 1;
+
+const ROW_KEYS = ["chartData", "tableData"];
+
+// ── Types ─────────────────────────────────────────────────
+
+type Value = number | string | null;
+
+export interface FieldFormat {
+  col: string;
+  str?: boolean;
+  div?: number;
+  decimals?: number;
+  group?: "en" | "in";
+  prefix?: string;
+  suffix?: string;
+}
+
+export type FieldRef = string | FieldFormat;
+
+// ── Formatting ────────────────────────────────────────────
+
+function groupDigits(digits: string, style: "en" | "in"): string {
+  let tail = digits.slice(-3);
+  let head = digits.slice(0, -3);
+  const size = style === "in" ? 2 : 3;
+  while (head.length > 0) {
+    tail = head.slice(-size) + "," + tail;
+    head = head.slice(0, -size);
+  }
+  return tail;
+}
+
+/** A column value rendered under a field reference. */
+export function formatValue(value: Value, ref: FieldRef): Value {
+  if (typeof ref === "string" || value === null || typeof value === "string") return value;
+  const v = ref.div ? value / ref.div : value;
+  if (ref.str) return String(v);
+  const styled = ref.decimals !== undefined || ref.group || ref.prefix || ref.suffix;
+  if (!styled) return ref.div ? Math.round(v) : v;
+  let s = v.toFixed(ref.decimals ?? 0);
+  if (ref.group) {
+    const sign = s.charAt(0) === "-" ? "-" : "";
+    const [whole, frac] = s.slice(sign.length).split(".");
+    s = sign + groupDigits(whole, ref.group) + (frac ? "." + frac : "");
+  }
+  return (ref.prefix ?? "") + s + (ref.suffix ?? "");
+}
+
+// ── Expansion ─────────────────────────────────────────────
+
+function columnsToRows(fields: Record<string, Value[]>): Record<string, Value>[] {
+  const names = Object.keys(fields);
+  const n = names.length ? fields[names[0]].length : 0;
+  const rows: Record<string, Value>[] = [];
+  for (let i = 0; i < n; i++) {
+    const row: Record<string, Value> = {};
+    for (const name of names) row[name] = fields[name][i];
+    rows.push(row);
+  }
+  return rows;
+}
+
+/**
+ * Section data in the regular row form.
+ * Compact sections are expanded; anything else is returned as is.
+ */
+// eslint-disable-next-line @typescript-eslint/no-explicit-any
+export function expandSection(data: any): any {
+  if (!data || data.format !== COMPACT_VERSION) return data;
+  const columns: Record<string, Value[]> = data.columns;
+  // eslint-disable-next-line @typescript-eslint/no-explicit-any
+  const out: Record<string, any> = {};
+  for (const key of Object.keys(data)) {
+    const value = data[key];
+    if (key === "format" || key === "columns") continue;
+    if (ROW_KEYS.indexOf(key) >= 0 && value && !Array.isArray(value)) {
+      const fields: Record<string, Value[]> = {};
+      for (const name of Object.keys(value)) {
+        const ref: FieldRef = value[name];
+        const col = columns[typeof ref === "string" ? ref : ref.col];
+        fields[name] = col.map((v) => formatValue(v, ref));
+      }
+      out[key] = columnsToRows(fields);
+    } else if (key === "talukas" && value && !Array.isArray(value)) {
+      out[key] = columnsToRows(value);
+    } else {
+      out[key] = value;
+    }
+  }
+  return out;
+}
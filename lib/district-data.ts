@@ -5,6 +5,8 @@
  * Uses a switch-based approach so Next.js can tree-shake unused districts.
  */
 
+import { expandSection } from "@/lib/compact-data";
+
 // ── Sector-specific imports per district ──────────────────
 
 // Milk Production
@@ -159,13 +161,26 @@ const DATA_MAP: Record<SectorKey, Record<DistrictSlug, any>> = {
   },
 };
 
+// Expanded sections by "sector/district", so every render gets the same
+// object and the pages' memos keep their inputs
+// eslint-disable-next-line @typescript-eslint/no-explicit-any
+const EXPANDED = new Map<string, any>();
+
 /**
  * Get data for a given sector and district.
  * Falls back to Ahilyanagar if the district slug is not found.
+ * Compact (--compact) files are expanded to the regular row form, once.
  */
 // eslint-disable-next-line @typescript-eslint/no-explicit-any
 export function getDistrictData(sector: SectorKey, district: string): any {
   const sectorMap = DATA_MAP[sector];
   if (!sectorMap) return null;
-  return sectorMap[district as DistrictSlug] ?? sectorMap.ahilyanagar;
+  const slug: DistrictSlug = sectorMap[district as DistrictSlug] ? (district as DistrictSlug) : "ahilyanagar";
+  const key = `${sector}/${slug}`;
+  let data = EXPANDED.get(key);
+  if (data === undefined) {
+    data = expandSection(sectorMap[slug]);
+    EXPANDED.set(key, data);
+  }
+  return data;
 }
@@ -3,6 +3,12 @@
  * ─────────────────────────
  * Generates per-district dashboard JSON files for all 6 districts.
  * Ahilyanagar keeps its original data; other districts get scaled variants.
+ * Health and livestock sectors are written per district from the source
+ * extracts by data/aggregate_health.py and data/aggregate_livestock.py
+ * (data/build_dashboards.py runs both).  Districts the extracts have no rows
+ * for get scaled placeholders from here instead, marked "placeholder": true;
+ * a file without the marker came from the pipelines and is left alone.  Re-run
+ * this script after adding a district to districts.json.
  *
  * Run: node scripts/generate-district-data.js
  */
@@ -16,6 +22,13 @@ const { districts } = JSON.parse(fs.readFileSync(DISTRICTS_FILE, "utf8"));
 
 // Sector template files (Ahilyanagar originals)
 const SECTOR_FILES = [
+  "funding",
+  "overview",
+  "geographic",
+];
+
+// Sectors the pipelines own; only placeholders are written for them
+const PIPELINE_SECTOR_FILES = [
   "milk-production",
   "infrastructure",
   "artificial-insemination",
@@ -24,9 +37,6 @@ const SECTOR_FILES = [
   "health-infrastructure",
   "health-maternal-child",
   "health-nutrition",
-  "funding",
-  "overview",
-  "geographic",
 ];
 
 // Deterministic seeded random (mulberry32)
@@ -283,6 +293,24 @@ districts.forEach((district) => {
       console.log(`  ✓ ${sector}--${district.slug}.json (scaled ×${DISTRICT_SCALE[district.slug]})`);
     }
   });
+  if (district.slug !== "ahilyanagar") {
+    PIPELINE_SECTOR_FILES.forEach((sector) => {
+      const templatePath = path.join(DATA_DIR, `${sector}.json`);
+      const outPath = path.join(DATA_DIR, `${sector}--${district.slug}.json`);
+      if (!fs.existsSync(templatePath)) {
+        console.log(`  ⚠ Template not found: ${sector}.json — skipping`);
+        return;
+      }
+      if (fs.existsSync(outPath) && !JSON.parse(fs.readFileSync(outPath, "utf8")).placeholder) {
+        console.log(`  · ${sector}--${district.slug}.json (built from the extracts, kept)`);
+        return;
+      }
+      const template = JSON.parse(fs.readFileSync(templatePath, "utf8"));
+      const data = { placeholder: true, ...generateDistrictData(district, template, sector) };
+      fs.writeFileSync(outPath, JSON.stringify(data, null, 2));
+      console.log(`  ✓ ${sector}--${district.slug}.json (placeholder, scaled ×${DISTRICT_SCALE[district.slug]})`);
+    });
+  }
   console.log("");
 });
 